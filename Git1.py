@@ -1,5 +1,6 @@
 import time
 import pandas as pd
+import numpy as np
 import undetected_chromedriver as uc
 import os
 import datetime
@@ -7,6 +8,17 @@ import re
 import random
 import yaml
 import json
+import functools
+import itertools
+import sqlite3
+import glob
+import hashlib
+import base64
+import argparse
+import statistics
+import tracemalloc
+import queue
+import threading
 import smtplib
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
@@ -18,21 +30,36 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, ElementClickInterceptedException
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, ElementClickInterceptedException, JavascriptException
 from selenium.webdriver.common.action_chains import ActionChains
 from dotenv import load_dotenv
 from thefuzz import fuzz 
+from thefuzz import utils as fuzz_utils
+from rapidfuzz import process as rf_process, fuzz as rf_fuzz
 from dateutil.relativedelta import relativedelta 
 import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urljoin, urlparse, parse_qsl
+import lxml.html
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeRemainingColumn, TimeElapsedColumn, TaskProgressColumn
 from rich.theme import Theme
+from rich.table import Table
 
 # --- SETUP & CONFIG ---
 try:
     from fake_useragent import UserAgent
 except ImportError:
     UserAgent = None
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None # ไม่มี Pillow -> แนบรูปต้นฉบับแบบเดิม
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:
+    Fernet = None # ไม่มี cryptography -> ไม่เก็บ Session (Login เต็มทุกรอบแบบเดิม)
 
 logging.getLogger("fake_useragent").setLevel(logging.CRITICAL)
 
@@ -62,6 +89,61 @@ MY_PASSWORD = os.getenv("JOBTHAI_PASS")
 G_SHEET_KEY_JSON = os.getenv("G_SHEET_KEY")
 G_SHEET_NAME = os.getenv("G_SHEET_NAME")
 
+# 🟢 จำนวน Chrome ที่ช่วยกันดูดหน้ารายละเอียด (1 = โหมดเดิมตัวเดียว, "auto" = ตามจำนวน CPU ของเครื่อง)
+_workers_env = str(os.getenv("SCRAPE_WORKERS", "1")).strip().lower()
+try: SCRAPE_WORKERS = max(1, os.cpu_count() or 1) if _workers_env == "auto" else max(1, int(_workers_env))
+except ValueError: SCRAPE_WORKERS = 1
+
+FIND_RESUME_URL = "https://www3.jobthai.com/findresume/findresume.php?l=th"
+# 🟢 วิธีเปิดหน้า ResumeDetail: "browser" = เปิดผ่าน Chrome (เดิม), "http" = ยิง HTTP ตรงด้วย Cookie ของ Chrome แล้ว Parse HTML เอง
+DETAIL_FETCH_MODE = str(os.getenv("DETAIL_FETCH_MODE", "browser")).strip().lower()
+# 🟢 ตั้งโฟลเดอร์นี้เพื่อเก็บ HTML หน้า ResumeDetail ไว้เป็น Fixture สำหรับ --bench-parse (ว่าง = ไม่เก็บ)
+RESUME_FIXTURE_DIR = os.getenv("RESUME_FIXTURE_DIR", "")
+# 🟢 Cache โปรไฟล์ข้ามวัน (SQLite) -> ถ้าวันที่อัพเดทในหน้าผลค้นหาไม่เปลี่ยน จะไม่เปิดหน้า ResumeDetail ซ้ำ (ว่าง = ปิด)
+RESUME_CACHE_PATH = os.getenv("RESUME_CACHE_PATH", "resume_cache.sqlite")
+# 🟢 หยุดเปิดหน้าผลค้นหาถัดไป เมื่อเจอหน้าที่ทุกคนเคยเห็นแล้วและไม่มีอัพเดท (ต้องเปิด Resume Cache)
+INCREMENTAL_PAGING = str(os.getenv("INCREMENTAL_PAGING", "1")).strip().lower() not in ("0", "false", "no")
+WATERMARK_FULL_SCAN_DAYS = int(os.getenv("WATERMARK_FULL_SCAN_DAYS", "7")) # ไล่ครบทุกหน้าอย่างน้อยทุกกี่วัน
+# 🟢 ช่วงหน่วงต่อโปรไฟล์ที่ตัวปรับจังหวะ (PacingController) ขยับได้ (วินาที)
+PACING_MIN_DELAY = float(os.getenv("PACING_MIN_DELAY", "1.0"))
+PACING_MAX_DELAY = float(os.getenv("PACING_MAX_DELAY", "30.0"))
+# 🟢 ไฟล์ JSON Lines ที่เขียนโปรไฟล์ต่อท้ายทันทีที่ Parse เสร็จ (ว่าง = ตั้งชื่อตามเวลาเริ่มรัน)
+RECORD_SINK_PATH = os.getenv("RECORD_SINK_PATH", "")
+RECORD_SINK_FLUSH_EVERY = int(os.getenv("RECORD_SINK_FLUSH_EVERY", "10"))     # Flush ทุกกี่ Record (Checkpoint ขยับตามจังหวะนี้)
+RECORD_SINK_FLUSH_SECONDS = float(os.getenv("RECORD_SINK_FLUSH_SECONDS", "15")) # หรือทุกกี่วินาที
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))               # Clean/อัปโหลดทีละกี่แถว
+# 🟢 ไฟล์ Checkpoint สำหรับ --resume (ลบทิ้งเองเมื่อรันจบครบ)
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", "scrape_checkpoint.json")
+# 🟢 ประวัติการส่งเมล (History_*) เขียนลง Sheet เป็นก้อน: ครบกี่แถว / ค้างนานกี่วินาที ถึงส่ง + ไฟล์พักแถวที่ยังส่งไม่สำเร็จ
+HISTORY_FLUSH_ROWS = int(os.getenv("HISTORY_FLUSH_ROWS", "50"))
+HISTORY_FLUSH_SECONDS = float(os.getenv("HISTORY_FLUSH_SECONDS", "60"))
+HISTORY_SPILL_PATH = os.getenv("HISTORY_SPILL_PATH", "history_pending.jsonl")
+HISTORY_MIRROR_PATH = os.getenv("HISTORY_MIRROR_PATH", "history_mirror.sqlite") # สำเนาประวัติทุก Tab ในเครื่อง
+SHEETS_MAX_ATTEMPTS = int(os.getenv("SHEETS_MAX_ATTEMPTS", "6"))
+# 🟢 อัปโหลดผลรายวันทีละก้อน: ไม่เกินกี่แถว / กี่ไบต์ ต่อการเรียก append_rows หนึ่งครั้ง
+SHEETS_UPLOAD_ROWS = int(os.getenv("SHEETS_UPLOAD_ROWS", "500"))
+SHEETS_UPLOAD_BYTES = int(os.getenv("SHEETS_UPLOAD_BYTES", "2000000"))
+# 🟢 ส่งอีเมลผ่าน Thread เบื้องหลัง (Connection เดียวค้างไว้): ลองใหม่กี่ครั้งเมื่อหลุด / เงียบกี่วินาทีแล้วเช็ค NOOP ก่อนส่ง
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_MAX_ATTEMPTS = int(os.getenv("SMTP_MAX_ATTEMPTS", "3"))
+SMTP_IDLE_SECONDS = float(os.getenv("SMTP_IDLE_SECONDS", "120"))
+# 🟢 รูปในอีเมล: ย่อเป็น Thumbnail JPEG ครั้งเดียวแล้วใช้ซ้ำ + แบ่งอีเมลสรุปเป็นหลายฉบับไม่ให้เกินขนาดนี้ (ไบต์หลัง Base64)
+THUMBNAIL_FOLDER = os.getenv("THUMBNAIL_FOLDER", os.path.join(RESUME_IMAGE_FOLDER, "thumbs"))
+THUMBNAIL_SIZE = int(os.getenv("THUMBNAIL_SIZE", "140"))       # ด้านยาวสุด (px) / ในเมลแสดง 70px -> 2x สำหรับจอ Retina
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))
+EMAIL_MAX_BYTES = int(os.getenv("EMAIL_MAX_BYTES", "15000000")) # Gmail จำกัด 25MB รวม Header/Encoding -> เผื่อไว้
+# 🟢 Pipeline ใน run(): จำนวนรายการที่ค้างได้ต่อคิวของแต่ละขั้น (เต็มแล้ว Browser จะรอ ไม่ให้ RAM บวม)
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "32"))
+# 🟢 เก็บ Cookie หลัง Login ไว้ในไฟล์เข้ารหัส (Fernet) -> รอบหน้าเช็คด้วย Request เดียวแล้วใช้ต่อ ไม่ต้องกรอกฟอร์ม
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", "jobthai_session.enc")
+SESSION_STORE_KEY = os.getenv("SESSION_STORE_KEY") # ต้องตั้งเอง (ไม่ตั้ง = ไม่เก็บ Session): Fernet Key หรือ Passphrase (แปลงด้วย scrypt + salt)
+SESSION_PROBE_TIMEOUT = float(os.getenv("SESSION_PROBE_TIMEOUT", "15"))
+# 🟢 รอจากเหตุการณ์จริงในหน้า (Element / URL / DOM เปลี่ยน / Network เงียบ) แทน time.sleep ตายตัว
+WAIT_POLL_SECONDS = float(os.getenv("WAIT_POLL_SECONDS", "0.1"))        # ความถี่เช็ค Element / URL จากฝั่ง Python
+WAIT_NETWORK_IDLE_MS = int(os.getenv("WAIT_NETWORK_IDLE_MS", "500"))    # ไม่มี Request ใหม่นานเท่านี้ = หน้านิ่งแล้ว
+CDP_COOKIE_FIELDS = ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite", "expires")
+
 TIER1_TARGETS = {}
 if os.path.exists(TIER1_PATH):
     try:
@@ -93,6 +175,51 @@ if os.path.exists(CLIENTS_PATH):
                 elif not isinstance(CLIENTS_TARGETS[k], list): CLIENTS_TARGETS[k] = [str(CLIENTS_TARGETS[k])]
     except: pass
 
+class CompanyMatcher:
+    """
+    ดัชนีจับคู่ชื่อบริษัทกับ Clients / Tier1 / Tier2 ที่สร้างครั้งเดียวจากไฟล์ YAML (ใช้ Highlight บริษัทเป้าหมายในอีเมล)
+    - Keyword ทุกตัวถูก Normalize ไว้ล่วงหน้า (แบบเดียวกับที่ fuzz.token_set_ratio ทำภายใน) และตัดตัวซ้ำ
+    - ให้คะแนนชื่อบริษัทกับ Keyword ทั้งหมดในการเรียก rapidfuzz ครั้งเดียว แล้วจำผลไว้ตามชื่อที่ Normalize แล้ว
+    - ใช้ฝั่งอีเมลอย่างเดียว: ตอนดูดข้อมูลไม่ได้แยก Tier บริษัทแล้ว (เคยทำบริษัทคู่แข่ง = ชื่อบริษัทที่เคยทำงานทั้งหมด เหมือนเดิม)
+    """
+    def __init__(self, clients_targets, tier1_targets, tier2_competitors):
+        self.keywords = []   # Keyword ที่ Normalize แล้ว (ไม่ซ้ำ)
+        self._kw_index = {}
+        for keywords in list(clients_targets.values()) + list(tier1_targets.values()):
+            for kw in keywords: self._add_keyword(kw)
+        for competitor in tier2_competitors: self._add_keyword(competitor)
+        self._scores = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(text):
+        return fuzz_utils.full_process(str(text).lower(), force_ascii=True)
+
+    def _add_keyword(self, kw):
+        norm = self.normalize(kw)
+        if norm not in self._kw_index:
+            self._kw_index[norm] = len(self.keywords)
+            self.keywords.append(norm)
+        return self._kw_index[norm]
+
+    def scores(self, company):
+        """ คะแนน token_set_ratio ของชื่อบริษัทกับ Keyword ทุกตัว (เรียงตาม self.keywords) """
+        norm = self.normalize(company)
+        cached = self._scores.get(norm)
+        if cached is not None: return cached
+        result = [0] * len(self.keywords)
+        if norm and self.keywords:
+            for _, score, idx in rf_process.extract(norm, self.keywords, scorer=rf_fuzz.token_set_ratio, processor=None, limit=None):
+                result[idx] = int(round(score))
+        with self._lock: self._scores[norm] = result
+        return result
+
+    def is_target(self, company, threshold=85):
+        """ ใช้ตอน Highlight ในอีเมล: ตรงกับ Tier1 / Clients / Tier2 ตัวใดตัวหนึ่งหรือไม่ """
+        return any(score >= threshold for score in self.scores(company))
+
+COMPANY_MATCHER = CompanyMatcher(CLIENTS_TARGETS, TIER1_TARGETS, TARGET_COMPETITORS_TIER2)
+
 # --- TARGET CONFIG ---
 TARGET_UNIVERSITIES = ["วไลยอลงกรณ์", "Valaya Alongkorn Rajabhat University under the Royal Patronage"]  
 TARGET_FACULTIES = ["เครื่องสำอาง","Cosmetic"] 
@@ -105,6 +232,12 @@ MEMORY_GROUPS = {
     "วไลยอลงกรณ์_Cosmetic": ["วไลยอลงกรณ์ เครื่องสำอาง","Cosmetic Valaya Alongkorn"],
 }
 
+def memory_group_of(keyword):
+    """ ชื่อกลุ่มใน MEMORY_GROUPS ที่ Keyword นี้อยู่ (None = ไม่อยู่กลุ่มไหน) """
+    for group_name, keywords in MEMORY_GROUPS.items():
+        if keyword in keywords: return group_name
+    return None
+
 
 KEYWORDS_CONFIG = {
     "NPD": {"titles": ["NPD", "R&D", "RD", "Research", "Development", "วิจัย", "พัฒนา", "Formulation", "สูตร"]},
@@ -138,8 +271,2286 @@ def analyze_row_department(row):
     best_dept, max_score = sorted_scores[0]
     return pd.Series([best_dept, int(min(max_score, 100)), ", ".join([f"{k}({v})" for k, v in sorted_scores if v > 0])])
 
+# --- RESUME FIELD SCHEMA (ดึงทั้งโปรไฟล์ด้วย execute_script ครั้งเดียว) ---
+# ทุก Selector เป็น XPath (แปลงจาก CSS เดิม) เรียงตามลำดับ Fallback -> ใช้ตัวแรกที่มีข้อความ
+def _xp_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+_RESUME_MAIN = '//*[@id="mainTableTwoColumn"]'
+_RESUME_POSITIONS = f'{_RESUME_MAIN}/tbody/tr/td[1]/table/tbody/tr[5]/td[2]/table/tbody/tr[3]/td'
+
+RESUME_SCHEMA = {
+    "fields": {
+        "full_text": [_RESUME_MAIN],
+        "app_id": [f'//*[@id="ResumeViewDiv"]//*[@align="left"]//span[{_xp_class("white")}]'],   # #ResumeViewDiv [align='left'] span.white
+        "update_date": ['//*[@id="ResumeViewDiv"]/table/tbody/tr[2]/td[3]/span[2]'],
+        "first_name": [f'{_RESUME_MAIN}//td/span[{_xp_class("head1")}]'],                       # #mainTableTwoColumn td > span.head1
+        "last_name": [f'//span[count(preceding-sibling::span) = 2][{_xp_class("black")}]'],     # span.black:nth-of-type(3)
+        "phone": [f'{_RESUME_MAIN}//div[count(preceding-sibling::div) = 5]//span[{_xp_class("black")}]'],
+        "email": [f'{_RESUME_MAIN}//a'],
+        "address": [f'{_RESUME_MAIN}//div[count(preceding-sibling::div) = 0]//span[{_xp_class("head1")}]'],
+        "province": [f'{_RESUME_MAIN}//table//*[@width][@align="left"]//div//span[{_xp_class("headNormal")}]'],
+        "position_1": [f'{_RESUME_POSITIONS}/span[2]'],
+        "position_2": [f'{_RESUME_POSITIONS}/span[4]'],
+        "position_3": [f'{_RESUME_POSITIONS}/span[6]'],
+        "salary_expected": ["//td[contains(., 'เงินเดือนที่ต้องการ')]/following-sibling::td[1]"],
+        "photo_src": ['//*[@id="DefaultPictureResume2Column"]/@src', '//*[@id="DefaultPictureResume2Column"]//img/@src'],
+    },
+    # ตารางที่มีหลายชุด: rows = XPath ของแต่ละตาราง, fields = XPath ย่อยเทียบกับตารางนั้น
+    "tables": {
+        "education": {
+            "rows": f'{_RESUME_MAIN}/tbody/tr/td[1]/table/tbody/tr[7]/td[2]/table',
+            "fields": {
+                "university": ['./tbody/tr[2]/td/div', './tbody/tr[1]/td/div'],
+                "degree": ['.//td[contains(., "ระดับการศึกษา")]/following-sibling::td[1]', './tbody/tr[1]/td'],
+                "faculty": ['.//td[contains(., "คณะ")]/following-sibling::td[1]'],
+                "major": ['.//td[contains(., "สาขา")]/following-sibling::td[1]'],
+            },
+        },
+        "work": {
+            "rows": f'{_RESUME_MAIN}/tbody/tr/td[2]/table/tbody/tr[2]/td[2]/table',
+            "fields": {
+                "level": ['./tbody/tr[7]/td[2]/span'],
+                "duration": ['./tbody/tr[2]/td/div'],
+                "duties": ['./tbody/tr[8]/td/div/span'],
+                "company": ['./tbody/tr[3]/td/div/span', './tbody/tr[3]/td'],
+            },
+        },
+    },
+}
+
+def build_resume_extractor_js(schema):
+    """ คอมไพล์ Schema เป็น JavaScript ก้อนเดียว คืนค่าทั้งโปรไฟล์เป็น Object (fields + tables แบนอยู่ใน dict เดียว) """
+    return """
+        const schema = %s;
+        const textOf = (node) => {
+            if (!node) return "";
+            const raw = node.nodeType === 1 ? (node.innerText || node.textContent || "") : (node.nodeValue || "");
+            return raw.replace(/\\u00a0/g, " ").trim();
+        };
+        const first = (xpath, ctx) => {
+            try { return document.evaluate(xpath, ctx || document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue; }
+            catch (e) { return null; }
+        };
+        const all = (xpath) => {
+            const found = [];
+            try {
+                const snap = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+                for (let i = 0; i < snap.snapshotLength; i++) found.push(snap.snapshotItem(i));
+            } catch (e) {}
+            return found;
+        };
+        const pick = (selectors, ctx) => {
+            for (const xp of selectors) { const v = textOf(first(xp, ctx)); if (v) return v; }
+            return "";
+        };
+        const out = {};
+        for (const [name, selectors] of Object.entries(schema.fields)) out[name] = pick(selectors);
+        for (const [name, spec] of Object.entries(schema.tables)) {
+            out[name] = all(spec.rows).map((row) => {
+                const rec = {};
+                for (const [field, selectors] of Object.entries(spec.fields)) rec[field] = pick(selectors, row);
+                return rec;
+            });
+        }
+        return out;
+    """ % json.dumps(schema, ensure_ascii=False)
+
+RESUME_EXTRACTOR_JS = build_resume_extractor_js(RESUME_SCHEMA)
+
+# ชุดเล็กสำหรับคัดคนก่อน: อ่านแค่ตารางการศึกษา + วันที่อัพเดท (ไม่ผ่าน = ไม่ต้อง Scroll / หน่วง / แคปรูป / อ่านประวัติงาน)
+RESUME_QUALIFY_SCHEMA = {
+    "fields": {"update_date": RESUME_SCHEMA["fields"]["update_date"]},
+    "tables": {"education": RESUME_SCHEMA["tables"]["education"]},
+}
+RESUME_QUALIFY_JS = build_resume_extractor_js(RESUME_QUALIFY_SCHEMA)
+
+# --- OFFLINE EXTRACTOR (HTML ดิบ -> dict เดียวกับ JS Extractor) ---
+_BLOCK_TAGS = {"div", "p", "tr", "table", "tbody", "thead", "li", "ul", "ol", "form", "center", "h1", "h2", "h3", "h4", "h5", "h6"}
+_SKIP_TAGS = {"script", "style", "noscript"}
+
+def _html_inner_text(node):
+    """ เลียนแบบ innerText ของ Browser แบบคร่าวๆ (บล็อก/BR = ขึ้นบรรทัดใหม่, เว้นวรรคซ้อนยุบเหลือตัวเดียว) """
+    if isinstance(node, str): return node.replace("\u00a0", " ").strip()
+    parts = []
+    def walk(el):
+        tag = el.tag if isinstance(el.tag, str) else ""
+        if tag in _SKIP_TAGS: return
+        if tag == "br": parts.append("\n")
+        elif tag in _BLOCK_TAGS: parts.append("\n")
+        if el.text: parts.append(el.text)
+        for child in el:
+            walk(child)
+            if child.tail: parts.append(child.tail)
+        if tag in _BLOCK_TAGS: parts.append("\n")
+        elif tag in ("td", "th"): parts.append(" ")
+    walk(node)
+    lines = (re.sub(r"[ \t\r\f\v\u00a0]+", " ", line).strip() for line in "".join(parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+def _normalize_html_tables(root):
+    """ ใส่ <tbody> ให้ตารางที่ไม่มี (Browser ทำเองตอนสร้าง DOM ทำให้ XPath ใน Schema มี /tbody/) """
+    for table in list(root.iter("table")):
+        rows = [child for child in table if child.tag == "tr"]
+        if not rows: continue
+        tbody = lxml.html.Element("tbody")
+        table.insert(table.index(rows[0]), tbody)
+        for row in rows: tbody.append(row)
+
+def parse_resume_html(html):
+    """ HTML -> lxml root ที่ตารางมี <tbody> เหมือน DOM ของ Browser """
+    try: root = lxml.html.document_fromstring(html)
+    except ValueError: root = lxml.html.document_fromstring(html.encode("utf-8"))
+    _normalize_html_tables(root)
+    return root
+
+def extract_resume_raw_from_html(html, schema=RESUME_SCHEMA):
+    """ Parse HTML ของหน้า ResumeDetail ด้วย Schema เดียวกับ JS Extractor (ไม่ต้องใช้ Browser) """
+    root = html if isinstance(html, lxml.html.HtmlElement) else parse_resume_html(html)
+
+    def pick(selectors, ctx):
+        for xp in selectors:
+            try: found = ctx.xpath(xp)
+            except Exception: continue
+            value = _html_inner_text(found[0]) if found else ""
+            if value: return value
+        return ""
+
+    out = {name: pick(selectors, root) for name, selectors in schema["fields"].items()}
+    for name, spec in schema["tables"].items():
+        out[name] = [{field: pick(selectors, row) for field, selectors in spec["fields"].items()} for row in root.xpath(spec["rows"])]
+    return out
+
+
+# --- OFFLINE RESUME PARSER (ไม่ผูกกับ Driver -> จับเวลา/จูนได้โดยไม่ต้องเปิด Browser) ---
+DEGREE_SCORE_MAP = {"ปริญญาเอก": 3, "ดุษฎีบัณฑิต": 3, "Doctor": 3, "Ph.D": 3, "ปริญญาโท": 2, "มหาบัณฑิต": 2, "Master": 2, "ปริญญาตรี": 1, "บัณฑิต": 1, "Bachelor": 1}
+# --- THAI DATE ENGINE (ตารางเดือนชุดเดียว + จำผล Scalar + เส้นทาง Pandas แบบทั้งคอลัมน์) ---
+THAI_MONTHS = {'มกราคม': 1, 'กุมภาพันธ์': 2, 'มีนาคม': 3, 'เมษายน': 4, 'พฤษภาคม': 5, 'มิถุนายน': 6, 'กรกฎาคม': 7, 'สิงหาคม': 8, 'กันยายน': 9, 'ตุลาคม': 10, 'พฤศจิกายน': 11, 'ธันวาคม': 12}
+THAI_MONTHS_PATTERN = "|".join(THAI_MONTHS)
+BE_YEAR_OFFSET = 543
+DATE_NOW_TOKEN = "ปัจจุบัน"
+
+@functools.lru_cache(maxsize=8192)
+def parse_thai_date_exact(date_str):
+    """ "5 มกราคม 2567" -> date(2024, 1, 5) / อ่านไม่ได้ -> None """
+    if not date_str: return None
+    try:
+        parts = date_str.strip().split()
+        if len(parts) < 3: return None
+        return datetime.date(int(parts[2]) - BE_YEAR_OFFSET, THAI_MONTHS.get(parts[1]), int(parts[0]))
+    except: return None
+
+@functools.lru_cache(maxsize=8192)
+def parse_thai_month_year(text):
+    """ "มกราคม 2560" -> datetime(2017, 1, 1) / อ่านไม่ได้ -> None (คำว่า "ปัจจุบัน" ให้ผู้เรียกจัดการเอง) """
+    parts = text.split()
+    if len(parts) < 2: return None
+    month = THAI_MONTHS.get(parts[0])
+    if not month: return None
+    try: return datetime.datetime(int(parts[1]) - BE_YEAR_OFFSET, month, 1)
+    except ValueError: return None
+
+def format_duration(years, months):
+    txt = []
+    if years > 0: txt.append(f"{years} ปี")
+    if months > 0: txt.append(f"{months} เดือน")
+    return " ".join(txt) if txt else "น้อยกว่า 1 เดือน"
+
+@functools.lru_cache(maxsize=8192)
+def _duration_text_on(date_range_str, today):
+    clean_str = " ".join(date_range_str.split())
+    if clean_str.count('-') != 1: return ""
+    now = datetime.datetime.combine(today, datetime.time())
+    dates = [now if DATE_NOW_TOKEN in side else parse_thai_month_year(side) for side in clean_str.split('-')]
+    if not all(dates): return ""
+    diff = relativedelta(dates[1], dates[0])
+    return format_duration(diff.years, diff.months)
+
+def calculate_duration_text(date_range_str, today=None):
+    """ "มกราคม 2560 - ปัจจุบัน" -> "7 ปี 9 เดือน" / อ่านไม่ได้ -> "" """
+    if not date_range_str: return ""
+    return _duration_text_on(date_range_str, today or datetime.date.today())
+
+@functools.lru_cache(maxsize=8192)
+def _last_update_text_on(date_str, today):
+    try:
+        parts = date_str.split()
+        if len(parts) < 3: return "-"
+        update_dt = datetime.datetime(int(parts[2]) - BE_YEAR_OFFSET, THAI_MONTHS.get(parts[1], 1), int(parts[0]))
+        diff = relativedelta(datetime.datetime.combine(today, datetime.time()), update_dt)
+        txt = []
+        if diff.years > 0: txt.append(f"{diff.years}ปี")
+        if diff.months > 0: txt.append(f"{diff.months}เดือน")
+        if diff.days > 0: txt.append(f"{diff.days}วัน")
+        if not txt: return "วันนี้"
+        return " ".join(txt)
+    except: return "-"
+
+def calculate_last_update(date_str, today=None):
+    """ "5 มกราคม 2567" -> "2ปี 9เดือน 13วัน" (นับถึงวันนี้) / อ่านไม่ได้ -> "-" """
+    if not date_str: return "-"
+    return _last_update_text_on(date_str, today or datetime.date.today())
+
+def _month_index_series(side, today):
+    """ ส่วนหนึ่งของช่วงวันที่ (Series) -> เลขเดือนต่อเนื่อง ปี*12 + (เดือน-1) / "ปัจจุบัน" = เดือนนี้ """
+    tokens = side.str.extract(r"^\s*(\S+)\s+(\d+)(?:\s|$)")
+    month = tokens[0].map(THAI_MONTHS)
+    year = pd.to_numeric(tokens[1], errors="coerce") - BE_YEAR_OFFSET
+    index = (year * 12 + month - 1).where((year >= 1) & (year <= 9999))
+    is_now = side.str.contains(DATE_NOW_TOKEN, regex=False)
+    return index.where(~is_now, today.year * 12 + today.month - 1), is_now
+
+def _map_unique(values, convert):
+    """ ค่าในคอลัมน์ที่เก็บไว้ซ้ำกันเยอะมาก -> แปลงเฉพาะค่าที่ไม่ซ้ำ (convert รับ/คืน Series) แล้วกระจายกลับด้วย codes """
+    if values.empty: return pd.Series([], index=values.index, dtype=object)
+    codes, uniques = pd.factorize(values.fillna("").astype(str))
+    converted = convert(pd.Series(uniques, dtype=object)).to_numpy()
+    return pd.Series(converted[codes], index=values.index)
+
+def duration_text_series(ranges, today=None):
+    """ calculate_duration_text ทั้งคอลัมน์ ระยะเวลาที่ทำงาน_N ในรอบเดียว (ผลเท่ากับแบบ Scalar) """
+    return _map_unique(ranges, lambda uniques: _duration_text_uniques(uniques, today or datetime.date.today()))
+
+def _duration_text_uniques(ranges, today):
+    clean = ranges.str.split().str.join(" ")
+    valid = clean.str.count("-") == 1
+    sides = clean.where(valid, "-").str.split("-", n=1, expand=True)
+    start, start_is_now = _month_index_series(sides[0], today)
+    end, _ = _month_index_series(sides[1], today)
+    total = end - start
+    # เริ่ม "ปัจจุบัน" (วันนี้) ไปจบวันที่ 1 ของเดือนอื่น -> relativedelta ยังไม่ครบเดือนสุดท้าย ถ้าวันนี้ไม่ใช่วันที่ 1
+    if today.day > 1: total = total.where(~(start_is_now & (total > 0)), total - 1)
+    valid &= total.notna()
+    total = total.fillna(0).astype(int)
+    years, months = total // 12, total % 12
+    text = (years.astype(str) + " ปี").where(years > 0, "") + " " + (months.astype(str) + " เดือน").where(months > 0, "")
+    text = text.str.strip().where(total > 0, "น้อยกว่า 1 เดือน")
+    return text.where(valid, "")
+
+def thai_date_series(dates):
+    """ parse_thai_date_exact ทั้งคอลัมน์ -> datetime64 (อ่านไม่ได้ = NaT) """
+    return pd.to_datetime(_map_unique(dates, _thai_date_uniques))
+
+def _thai_date_uniques(dates):
+    tokens = dates.str.extract(r"^\s*(\d+)\s+(\S+)\s+(\d+)(?:\s|$)")
+    parts = pd.DataFrame({
+        "year": pd.to_numeric(tokens[2], errors="coerce") - BE_YEAR_OFFSET,
+        "month": tokens[1].map(THAI_MONTHS),
+        "day": pd.to_numeric(tokens[0], errors="coerce"),
+    })
+    return pd.to_datetime(parts, errors="coerce")
+
+def update_age_days_series(dates, today=None):
+    """ จำนวนวันนับจากวันที่อัพเดทถึงวันนี้ ทั้งคอลัมน์ (อ่านไม่ได้ = 999 แบบเดียวกับ days_diff) """
+    today = pd.Timestamp(today or datetime.date.today())
+    return (today - thai_date_series(dates)).dt.days.fillna(999).astype(int)
+
+def last_update_text_series(dates, today=None):
+    """ calculate_last_update ทั้งคอลัมน์: คำนวณเฉพาะค่าที่ไม่ซ้ำ แล้ว map กลับ """
+    today = today or datetime.date.today()
+    return _map_unique(dates, lambda uniques: uniques.map(lambda v: calculate_last_update(v, today)))
+
+class EducationMatcher:
+    """
+    จับคู่ มหาลัย/คณะ/สาขา กับเป้าหมาย (partial_ratio >= threshold) แบบ Normalize ชื่อไทย/อังกฤษก่อนเทียบ
+    - เป้าหมายถูก Normalize ไว้ครั้งเดียวตอนสร้าง
+    - ชื่อสถาบันชุดเดิม ๆ วนมาซ้ำทุกโปรไฟล์ -> จำผลไว้ทั้งรายช่องและราย (มหาลัย, คณะ, สาขา)
+    - ระดับวุฒิใช้ Regex ที่ Compile ไว้ต่อระดับ (สูง -> ต่ำ) แทนการไล่ DEGREE_SCORE_MAP ทีละคำ
+    """
+    # ส่วนท้ายชื่อที่ไม่ช่วยแยกสถาบัน (ตัดทิ้งทั้งไทย/อังกฤษ)
+    SUFFIX_PATTERN = re.compile(r"\s*(?:ในพระบรมราชูปถัมภ์|ในพระราชูปถัมภ์|ในพระอุปถัมภ์|under\s+the\s+royal\s+patronage(?:\s+of\s+h\.?m\.?\s+the\s+king)?)\s*", re.IGNORECASE)
+    # คำย่อที่เจอบ่อยในช่องการศึกษา -> ชื่อเต็ม
+    ABBREVIATIONS = [
+        (re.compile(r"(?<![ก-๙])มรภ\.?\s*"), "มหาวิทยาลัยราชภัฏ"),
+        (re.compile(r"(?<![ก-๙])มทร\.?\s*"), "มหาวิทยาลัยเทคโนโลยีราชมงคล"),
+        (re.compile(r"^ม\.\s*"), "มหาวิทยาลัย"),
+        (re.compile(r"\bunivs?\b\.?", re.IGNORECASE), "university"),
+        (re.compile(r"\bfac\b\.?", re.IGNORECASE), "faculty"),
+        (re.compile(r"\bsci\b\.?", re.IGNORECASE), "science"),
+        (re.compile(r"\btech\b\.?", re.IGNORECASE), "technology"),
+        (re.compile(r"\brajaphat\b", re.IGNORECASE), "rajabhat"),
+        (re.compile(r"\s*&\s*"), " and "),
+    ]
+    THAI_GAP_PATTERN = re.compile(r"(?<=[ก-๙])\s+(?=[ก-๙])")
+    SPACE_PATTERN = re.compile(r"\s+")
+
+    def __init__(self, universities, faculties, majors, degree_score_map, threshold=85):
+        self.threshold = threshold
+        self.targets = {
+            "university": self._signatures(universities),
+            "faculty": self._signatures(faculties),
+            "major": self._signatures(majors),
+        }
+        levels = {}
+        for key, val in degree_score_map.items(): levels.setdefault(val, []).append(re.escape(key))
+        self.degree_levels = [(val, re.compile("|".join(keys))) for val, keys in sorted(levels.items(), reverse=True)]
+        self._field_cache = {}
+        self._verdict_cache = {}
+        self._degree_cache = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock() # Thread ของ Pipeline / Worker เรียกพร้อมกัน -> ล็อกตัวนับ
+
+    @classmethod
+    def normalize(cls, text):
+        text = str(text or "").strip()
+        if not text: return ""
+        text = cls.SUFFIX_PATTERN.sub(" ", text)
+        for pattern, repl in cls.ABBREVIATIONS: text = pattern.sub(repl, text)
+        text = cls.THAI_GAP_PATTERN.sub("", text) # "วไลย อลงกรณ์" == "วไลยอลงกรณ์"
+        return cls.SPACE_PATTERN.sub(" ", text).strip().lower()
+
+    def _signatures(self, targets):
+        return list(dict.fromkeys(sig for sig in (self.normalize(t) for t in targets) if sig))
+
+    def field_matches(self, field, text):
+        """ ไม่มีเป้าหมาย = ผ่าน / ไม่มีข้อความ = ไม่ผ่าน (เหมือน check_fuzzy เดิม) """
+        targets = self.targets[field]
+        if not targets: return True
+        key = (field, text)
+        cached = self._field_cache.get(key)
+        if cached is not None: return cached
+        norm = self.normalize(text)
+        verdict = False
+        if norm:
+            best = rf_process.extractOne(norm, targets, scorer=rf_fuzz.partial_ratio, processor=None)
+            verdict = bool(best) and int(round(best[1])) >= self.threshold
+        self._field_cache[key] = verdict
+        return verdict
+
+    def matches(self, university, faculty, major):
+        key = (university, faculty, major)
+        cached = self._verdict_cache.get(key)
+        if cached is not None:
+            with self.lock: self.hits += 1
+            return cached
+        with self.lock: self.misses += 1
+        verdict = self.field_matches("university", university) and (self.field_matches("faculty", faculty) or self.field_matches("major", major))
+        self._verdict_cache[key] = verdict
+        return verdict
+
+    def degree_score(self, degree):
+        degree = str(degree)
+        score = self._degree_cache.get(degree)
+        if score is None:
+            score = next((val for val, pattern in self.degree_levels if pattern.search(degree)), 0)
+            self._degree_cache[degree] = score
+        return score
+
+EDUCATION_MATCHER = EducationMatcher(TARGET_UNIVERSITIES, TARGET_FACULTIES, TARGET_MAJORS, DEGREE_SCORE_MAP)
+
+def qualify_education(education_rows):
+    """ หาวุฒิสูงสุด + เช็คว่ามีวุฒิไหนตรง มหาลัย/คณะ/สาขา เป้าหมาย """
+    result = {"qualified": False, "degree": "-", "university": "", "faculty": "", "major": ""}
+    max_degree_score = -1
+    for edu in education_rows:
+        curr_uni = edu.get('university', '')
+        curr_degree = edu.get('degree', '')
+        curr_faculty = edu.get('faculty', '')
+        curr_major = edu.get('major', '')
+
+        score = EDUCATION_MATCHER.degree_score(curr_degree)
+        if score > max_degree_score: max_degree_score = score; result["degree"] = curr_degree
+        elif score == max_degree_score and result["degree"] == "-": result["degree"] = curr_degree
+
+        if not result["qualified"] and EDUCATION_MATCHER.matches(curr_uni, curr_faculty, curr_major):
+            result.update(qualified=True, university=curr_uni, faculty=curr_faculty, major=curr_major)
+    return result
+
+def rejected_early(head):
+    """
+    ผลอ่านแบบย่อ (RESUME_QUALIFY_SCHEMA) พอจะตัดทิ้งได้เลยไหม: ต้องอ่านตารางการศึกษาได้ และไม่มีวุฒิไหนผ่าน
+    ตารางว่าง (หน้ายังโหลดไม่ครบ / โครงหน้าเปลี่ยน) -> ยังไม่ตัด ให้อ่านทั้งหน้าแล้วตัดสินใน build_resume_record
+    ใช้ร่วมกันทุกโหมด (HTTP / Browser / parse_resume) ให้คนเดียวกันได้ผลเหมือนกัน
+    """
+    if not isinstance(head, dict) or not head.get('education'): return False
+    return not qualify_education(head['education'])["qualified"]
+
+def parse_salary_range(raw_salary):
+    """ "20k - 25,000" -> ("20,000", "25,000") / อ่านไม่ได้ -> ("-", "-") """
+    salary_min_txt = "-"
+    salary_max_txt = "-"
+    try:
+        if raw_salary and 'ปิดข้อมูล' not in str(raw_salary):
+            s = str(raw_salary).lower().replace(',', '')
+            s = re.sub(r'(\d+(\.\d+)?)\s*k', lambda m: str(float(m.group(1)) * 1000), s)
+            nums = re.findall(r'\d+(?:\.\d+)?', s)
+            nums = [float(n) for n in nums]
+            if nums:
+                mn, mx = nums[0], nums[0]
+                if len(nums) >= 2: mn, mx = nums[0], nums[1]
+                if mx > 1000 and mn < 1000 and mn > 0: mn *= 1000
+                salary_min_txt = f"{int(mn):,}"
+                salary_max_txt = f"{int(mx):,}"
+    except: pass
+    return salary_min_txt, salary_max_txt
+
+def split_work_history_blocks(full_text):
+    """ ตัดข้อความส่วน "ประวัติการทำงาน/ฝึกงาน" เป็นก้อนละงาน (ขึ้นต้นด้วย "เดือน ปี - ") """
+    if "ประวัติการทำงาน/ฝึกงาน" in full_text:
+        history_text = full_text.split("ประวัติการทำงาน/ฝึกงาน")[1].split("ความสามารถ")[0]
+    else: history_text = ""
+    raw_chunks = re.split(f"({THAI_MONTHS_PATTERN})\\s+\\d{{4}}\\s+-\\s+", history_text)
+    jobs = []
+    if len(raw_chunks) > 1:
+        for k in range(1, len(raw_chunks), 2):
+            if k+1 < len(raw_chunks): jobs.append(raw_chunks[k] + raw_chunks[k+1]) 
+    return jobs
+
+def build_resume_record(raw, url="", keyword="", photo_saver=None):
+    """
+    แปลงข้อมูลดิบตาม RESUME_SCHEMA เป็น (data, days_diff, person_data) แบบเดียวกับ scrape_detail_from_json
+    ไม่ผ่านเกณฑ์การศึกษา -> (None, 999, None) / photo_saver(app_id, raw) ใช้บันทึกรูปเฉพาะคนที่ผ่าน
+    """
+    data = {'Link': url}
+    full_text = raw.get('full_text', '')
+
+    edu = qualify_education(raw.get('education', []))
+    if not edu["qualified"]:
+        return None, 999, None
+    highest_degree_text = edu["degree"]
+
+    data['ระดับการศึกษา'] = highest_degree_text
+    data['มหาลัย'] = edu["university"]
+    data['คณะ'] = edu["faculty"]
+    data['สาขา'] = edu["major"]
+    data['รหัสใบสมัคร'] = raw.get('app_id', '')
+    data['รูปภาพ'] = (photo_saver(data['รหัสใบสมัคร'], raw) if photo_saver else "") or ""
+
+    raw_update_date = raw.get('update_date', '')
+    data['อัพเดทล่าสุด'] = calculate_last_update(raw_update_date)
+
+    data['ชื่อ'] = raw.get('first_name', '')
+    data['นามสกุล'] = raw.get('last_name', '')
+    age_match = re.search(r"อายุ\s*[:]?\s*(\d+)", full_text)
+    data['อายุ'] = age_match.group(1) if age_match else ""
+    gender_match = re.search(r"เพศ\s*[:]?\s*(ชาย|หญิง|Male|Female)", full_text)
+    data['เพศ'] = gender_match.group(1) if gender_match else ""
+    data['เบอร์โทร'] = raw.get('phone', '')
+    data['Email'] = raw.get('email', '')
+    data['ที่อยู่'] = raw.get('address', '')
+    data['จังหวัดที่อยู่'] = raw.get('province', '')
+
+    pos1 = raw.get('position_1', '')
+    pos2 = raw.get('position_2', '')
+    pos3 = raw.get('position_3', '')
+    data['ตำแหน่งที่ต้องการสมัคร_1'] = pos1
+    data['ตำแหน่งที่ต้องการสมัคร_2'] = pos2
+    data['ตำแหน่งที่ต้องการสมัคร_3'] = pos3
+    combined_positions = ", ".join([p for p in [pos1, pos2, pos3] if p])
+
+    data['เงินเดือนที่ต้องการ'] = raw.get('salary_expected', '')
+    salary_min_txt, salary_max_txt = parse_salary_range(data['เงินเดือนที่ต้องการ'])
+    data['Salary_Min'] = salary_min_txt
+    data['Salary_Max'] = salary_max_txt
+
+    all_work_history = [] 
+    try:
+        jobs = split_work_history_blocks(full_text)
+        for i, work in enumerate(raw.get('work', [])):
+            suffix = f"_{i+1}"
+            data[f'ระดับหน้าที่รับผิดชอบ{suffix}'] = work.get('level', '')
+            duration_str = work.get('duration', '')
+            data[f'ระยะเวลาที่ทำงาน{suffix}'] = duration_str
+            data[f'รวมอายุงาน{suffix}'] = calculate_duration_text(duration_str)
+            data[f'หน้าที่รับผิดชอบ{suffix}'] = work.get('duties', '')
+            company = work.get('company', '')
+
+            position = ""; salary = ""
+            if i < len(jobs):
+                block = jobs[i]
+                if not company:
+                    comp_match = re.search(r"^.*(บริษัท|Ltd|Inc|Group|Organization|หจก|Limited).*$", block, re.MULTILINE | re.IGNORECASE)
+                    company = comp_match.group(0).strip() if comp_match else ""
+                    if not company:
+                         lines = [l.strip() for l in block.split('\n') if l.strip()]
+                         if len(lines) > 1: company = lines[1]
+                pos_match = re.search(r"ตำแหน่ง\s+(.*)", block)
+                sal_match = re.search(r"เงินเดือน\s+(.*)", block)
+                position = pos_match.group(1).strip() if pos_match else ""
+                salary = sal_match.group(1).strip() if sal_match else ""
+
+            data[f'ชื่อบริษัทที่เคยทำงาน{suffix}'] = company
+            data[f'ตำแหน่งที่เคยเป็น{suffix}'] = position
+            data[f'เงินเดือนที่เคยได้{suffix}'] = salary
+
+            if company:
+                clean_name = company.strip()
+                if clean_name and clean_name not in all_work_history:
+                    all_work_history.append(clean_name)
+    except: pass
+
+    competitor_str = ", ".join(all_work_history)
+    data['เคยทำบริษัทคู่แข่ง'] = competitor_str
+
+    today_date = datetime.date.today()
+    update_date = parse_thai_date_exact(raw_update_date)
+    days_diff = 999
+    if update_date: days_diff = (today_date - update_date).days
+
+    app_id = data.get('รหัสใบสมัคร', '').strip()
+    full_name = f"{data.get('ชื่อ', '')} {data.get('นามสกุล', '')}"
+
+    person_data = {
+        "keyword": keyword, 
+        "company": competitor_str,
+        "degree": highest_degree_text,
+        "salary_min": salary_min_txt,
+        "salary_max": salary_max_txt,
+        "id": app_id,
+        "name": full_name,
+        "age": data.get('อายุ', '-'),
+        "positions": combined_positions, 
+        "last_update": data['อัพเดทล่าสุด'],
+        "link": url,
+        "image_path": data.get('รูปภาพ', '')
+    }
+    return data, days_diff, person_data
+
+def parse_resume(html, url="", keyword=""):
+    """ HTML หน้า ResumeDetail -> (data, days_diff, person_data) โดยไม่ใช้ Browser เลย (ไม่มีรูปภาพ) """
+    root = parse_resume_html(html)
+    # คัดด้วยตารางการศึกษาก่อน ไม่ผ่านก็ไม่ต้องอ่านช่องที่เหลือ
+    head = extract_resume_raw_from_html(root, RESUME_QUALIFY_SCHEMA)
+    if rejected_early(head): return None, 999, None
+    return build_resume_record(extract_resume_raw_from_html(root), url, keyword)
+
+# --- RESUME CACHE (ข้ามวัน) ---
+_RESUME_ID_PARAMS = ("resumeid", "resume_id", "resid", "rid", "id")
+# วันที่ในแถวผลค้นหา (เต็ม / ย่อ / ตัวเลข) ใช้เป็นตัวบอกว่าโปรไฟล์มีการอัพเดทหรือไม่
+LISTING_DATE_PATTERN = (r"\d{1,2}\s*(?:" + THAI_MONTHS_PATTERN +
+                        r"|ม\.ค\.|ก\.พ\.|มี\.ค\.|เม\.ย\.|พ\.ค\.|มิ\.ย\.|ก\.ค\.|ส\.ค\.|ก\.ย\.|ต\.ค\.|พ\.ย\.|ธ\.ค\.)\s*\d{2,4}"
+                        r"|\d{1,2}/\d{1,2}/\d{2,4}")
+# ดึงลิงก์ทุกคนในหน้าผลค้นหา + วันที่ในแถวนั้น ด้วย execute_script ครั้งเดียว -> [[href, marker], ...]
+RESULT_LINKS_JS = """
+    const re = new RegExp(arguments[0], "g");
+    return Array.from(document.querySelectorAll("a[href*='ResumeDetail'], a[href*='/resume/']")).map((a) => {
+        const row = a.closest("tr") || a.parentElement;
+        const found = ((row && row.innerText) || "").match(re);
+        return [a.href, found ? found.join("|") : ""];
+    });
+"""
+RESULT_LINK_SELECTOR = "a[href*='ResumeDetail'], a[href*='/resume/']"
+RESULTS_PAGER_XPATH = '//*[@id="content-l"]/div[2]/div[1]/table'
+RESULTS_NEXT_XPATH = '//*[@id="content-l"]/div[2]/div[1]/table/tbody/tr/td[8]/a'
+# กดเลขหน้าที่ใกล้ target ที่สุดที่มองเห็นในแถบเลขหน้า (กระโดดข้ามหน้าได้) ถ้าไม่มีค่อยกดปุ่ม "ถัดไป" -> คืนเลขหน้าที่ไป (0 = ไปต่อไม่ได้)
+RESULTS_GOTO_PAGE_JS = """
+    const [target, current, pagerXpath, nextXpath] = arguments;
+    const find = (xp) => document.evaluate(xp, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    const pager = find(pagerXpath);
+    let best = null;
+    if (pager) {
+        for (const a of pager.querySelectorAll("a")) {
+            const n = parseInt((a.innerText || "").trim(), 10);
+            if (!isNaN(n) && n > current && n <= target && (!best || n > best[0])) best = [n, a];
+        }
+    }
+    if (best) { best[1].click(); return best[0]; }
+    const next = find(nextXpath);
+    if (next && next.offsetParent !== null) { next.click(); return current + 1; }
+    return 0;
+"""
+
+def resume_key_from_url(url):
+    """ แปลงลิงก์ ResumeDetail เป็นรหัสเรซูเม่ (ลิงก์ที่ต่างกันแค่ Query อื่นๆ จะได้ค่าเดียวกัน) """
+    parsed = urlparse(str(url).strip())
+    params = {k.lower(): v.strip() for k, v in parse_qsl(parsed.query)}
+    for name in _RESUME_ID_PARAMS:
+        if params.get(name): return params[name]
+    for name, value in params.items():
+        if "resume" in name and value: return value
+    m = re.search(r"/resume/([^/?#]+)", parsed.path, re.IGNORECASE)
+    if m: return m.group(1)
+    return f"{parsed.netloc}{parsed.path}?{parsed.query}"
+
+class ResumeCache:
+    """
+    เก็บข้อมูลดิบ (ตาม RESUME_SCHEMA) ของทุกโปรไฟล์ที่เคยเปิด คู่กับวันที่อัพเดท
+    ถ้าวันที่ในหน้าผลค้นหายังเท่าเดิม -> ใช้ข้อมูลเดิมสร้าง Record ใหม่ได้เลยโดยไม่ต้อง driver.get
+    """
+    def __init__(self, path=RESUME_CACHE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS resumes (
+                resume_key TEXT PRIMARY KEY,
+                app_id TEXT,
+                raw_update_date TEXT,
+                listing_marker TEXT,
+                qualified INTEGER,
+                raw_json TEXT,
+                scraped_at TEXT
+            )""")
+        # Watermark ของแต่ละ Keyword: ใครเคยอยู่ในผลค้นหา + วันที่ที่เห็นล่าสุด
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS watermarks (
+                keyword TEXT,
+                resume_key TEXT,
+                listing_marker TEXT,
+                last_seen TEXT,
+                PRIMARY KEY (keyword, resume_key)
+            )""")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS watermark_scans (keyword TEXT PRIMARY KEY, last_full_scan TEXT)")
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, url, listing_marker):
+        """ คืนข้อมูลดิบเดิมถ้าวันที่ในหน้าผลค้นหาตรงกับตอนที่เก็บไว้ (ไม่รู้วันที่ = ถือว่าไม่ตรง) """
+        row = None
+        if listing_marker:
+            with self.lock:
+                row = self.conn.execute("SELECT listing_marker, raw_json FROM resumes WHERE resume_key = ?",
+                                        (resume_key_from_url(url),)).fetchone()
+        if row and row[0] == listing_marker:
+            self.hits += 1
+            return json.loads(row[1])
+        self.misses += 1
+        return None
+
+    def store(self, url, listing_marker, raw, qualified):
+        try:
+            with self.lock:
+                self.conn.execute("INSERT OR REPLACE INTO resumes VALUES (?, ?, ?, ?, ?, ?, ?)", (
+                    resume_key_from_url(url), str(raw.get('app_id', '')).strip(), raw.get('update_date', ''),
+                    listing_marker or "", 1 if qualified else 0, json.dumps(raw, ensure_ascii=False),
+                    datetime.datetime.now().isoformat(timespec="seconds")))
+                self.conn.commit()
+        except Exception as e: console.print(f"⚠️ บันทึก Cache ไม่สำเร็จ: {e}", style="yellow")
+
+    def needs_full_scan(self, keyword):
+        """ ครบรอบไล่ทุกหน้าหรือยัง (ยังไม่เคยไล่ครบ / เกิน WATERMARK_FULL_SCAN_DAYS) """
+        with self.lock:
+            row = self.conn.execute("SELECT last_full_scan FROM watermark_scans WHERE keyword = ?", (keyword,)).fetchone()
+        if not row or not row[0]: return True
+        try: last = datetime.date.fromisoformat(row[0])
+        except ValueError: return True
+        return (datetime.date.today() - last).days >= WATERMARK_FULL_SCAN_DAYS
+
+    def page_is_unchanged(self, keyword, page_markers):
+        """ ทุกลิงก์ในหน้านี้เคยเห็นแล้วด้วยวันที่เดิม? (มีลิงก์ไหนไม่รู้วันที่ = ถือว่าเปลี่ยน) """
+        if not page_markers or not all(page_markers.values()): return False
+        keys = {resume_key_from_url(url): marker for url, marker in page_markers.items()}
+        with self.lock:
+            placeholders = ",".join("?" * len(keys))
+            rows = self.conn.execute(f"SELECT resume_key, listing_marker FROM watermarks WHERE keyword = ? AND resume_key IN ({placeholders})",
+                                     (keyword, *keys.keys())).fetchall()
+        known = dict(rows)
+        return all(known.get(key) == marker for key, marker in keys.items())
+
+    def update_watermark(self, keyword, link_markers, full_scan=False):
+        now = datetime.datetime.now().isoformat(timespec="seconds")
+        rows = [(keyword, resume_key_from_url(url), marker or "", now) for url, marker in link_markers.items()]
+        try:
+            with self.lock:
+                self.conn.executemany("INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?, ?)", rows)
+                if full_scan:
+                    self.conn.execute("INSERT OR REPLACE INTO watermark_scans VALUES (?, ?)", (keyword, datetime.date.today().isoformat()))
+                self.conn.commit()
+        except Exception as e: console.print(f"⚠️ บันทึก Watermark ไม่สำเร็จ: {e}", style="yellow")
+
+    def close(self):
+        try: self.conn.close()
+        except: pass
+
+# --- PAGE WAITS (คืนทันทีที่หน้าพร้อม แทน time.sleep / page_source วนเช็ค) ---
+# ตัวนับ fetch/XHR ที่ค้าง + ธง leaving (เริ่มเปลี่ยนหน้าแล้ว) ติดตั้งครั้งเดียวต่อ Document
+# นับได้เฉพาะ Request ที่เริ่มหลังติดตั้ง -> ติดตั้งตั้งแต่ page_load() / snapshot() ก่อนกด (ตัวที่ค้างมาก่อนจะเห็นตอนจบผ่านจำนวน Resource)
+WAIT_NET_HOOK_JS = """
+    if (!window.__jtNet) {
+        const net = window.__jtNet = {pending: 0, leaving: false};
+        window.addEventListener("beforeunload", () => { net.leaving = true; });
+        try { performance.setResourceTimingBufferSize(10000); } catch (e) {}
+        if (window.fetch) {
+            const origFetch = window.fetch;
+            window.fetch = function () {
+                net.pending++;
+                return origFetch.apply(this, arguments).finally(() => { net.pending--; });
+            };
+        }
+        const origSend = XMLHttpRequest.prototype.send;
+        XMLHttpRequest.prototype.send = function () {
+            net.pending++;
+            this.addEventListener("loadend", () => { net.pending--; }, {once: true});
+            return origSend.apply(this, arguments);
+        };
+    }
+"""
+# จำหน้าปัจจุบันก่อนกด: ฝัง Token ไว้ใน window (หน้าใหม่จะไม่มี) + ลิงก์ผลค้นหาที่เห็นอยู่
+WAIT_SNAPSHOT_JS = WAIT_NET_HOOK_JS + """
+    window.__jtWaitToken = arguments[0];
+    return Array.from(document.querySelectorAll(arguments[1])).map((a) => a.href || "").join("|");
+"""
+# MutationObserver ในหน้า: resolve เมื่อเจอ Selector (ที่ไม่ใช่ชุดเดิมของหน้าเก่า) / ข้อความ / หรือ DOM เปลี่ยนอะไรก็ได้ (ไม่ส่งเงื่อนไข)
+# settleMs: ยังเป็น Document เดิม แต่ไม่ได้กำลังเปลี่ยนหน้า + Network นิ่งครบเวลา -> ผลอาจซ้ำหน้าเก่าจริง (ลิงก์ชุดเดิม / ไม่พบข้อมูลอีกรอบ) ก็รับได้
+WAIT_MUTATION_JS = """
+    const [selector, texts, token, signature, settleMs, timeoutMs, done] = arguments;
+    const anyChange = !selector && !texts.length;
+    let settled = false;
+    const check = () => {
+        const fresh = !token || window.__jtWaitToken !== token || settled;
+        if (anyChange) return token && fresh ? "navigated" : null;
+        if (selector) {
+            const sig = Array.from(document.querySelectorAll(selector)).map((a) => a.href || "").join("|");
+            if (sig && (fresh || sig !== signature)) return "selector";
+        }
+        if (fresh && texts.length) {
+            const body = document.body ? document.body.textContent : "";
+            for (const t of texts) if (body.includes(t)) return "text:" + t;
+        }
+        return null;
+    };
+    let finished = false, scheduled = false, settleTimer = null;
+    const observer = new MutationObserver(() => {
+        if (anyChange) return finish("mutated");
+        if (scheduled) return;
+        scheduled = true;
+        setTimeout(() => { scheduled = false; const found = check(); if (found) finish(found); }, 0);
+    });
+    const timer = setTimeout(() => finish(null), timeoutMs);
+    const finish = (result) => {
+        if (finished) return;
+        finished = true;
+        observer.disconnect();
+        clearTimeout(timer);
+        clearInterval(settleTimer);
+        done(result);
+    };
+    const net = window.__jtNet;
+    if (token && settleMs && net && !anyChange) {
+        let lastCount = -1, lastChange = performance.now();
+        settleTimer = setInterval(() => {
+            const now = performance.now();
+            const count = performance.getEntriesByType("resource").length;
+            if (net.leaving || net.pending > 0 || count !== lastCount || document.readyState !== "complete") {
+                lastCount = count;
+                lastChange = now;
+            } else if (now - lastChange >= settleMs) {
+                clearInterval(settleTimer);
+                settled = true;
+                const found = check();
+                if (found) finish(found);
+            }
+        }, 50);
+    }
+    const found = check();
+    if (found) finish(found);
+    else observer.observe(document, {childList: true, subtree: true, characterData: true, attributes: anyChange});
+"""
+# Network เงียบ: ไม่มี fetch/XHR ค้าง + จำนวน Resource ไม่เพิ่ม + readyState complete ติดกันนาน idleMs (เช็คในหน้า ไม่ต้องวิ่งกลับมาถาม Python)
+WAIT_NETWORK_IDLE_JS = WAIT_NET_HOOK_JS + """
+    const [idleMs, timeoutMs, done] = arguments;
+    const started = performance.now();
+    let lastCount = -1, lastChange = started;
+    const timer = setInterval(() => {
+        const now = performance.now();
+        const count = performance.getEntriesByType("resource").length;
+        if (count !== lastCount || window.__jtNet.pending > 0 || document.readyState !== "complete") {
+            lastCount = count;
+            lastChange = now;
+        }
+        if (now - lastChange >= idleMs) { clearInterval(timer); done(true); }
+        else if (now - started >= timeoutMs) { clearInterval(timer); done(false); }
+    }, 50);
+"""
+
+class PageWaiter:
+    """
+    รอจากสัญญาณจริงของหน้าเว็บ (คืนทันทีที่เงื่อนไขเป็นจริง / timeout = เพดาน ไม่ใช่เวลาที่ต้องรอเสมอ) + จับเวลาที่รอจริงแยกตามชนิด
+    - presence: Element ปรากฏ / มองเห็น / กดได้    - url: URL เปลี่ยนหรือตรงเงื่อนไข    - load: readyState == complete
+    - mutation: MutationObserver ในหน้า (execute_async_script) รอ Selector / ข้อความ / หน้าเปลี่ยนจาก snapshot()
+    - network_idle: ไม่มี fetch/XHR ค้างและไม่มี Resource ใหม่นาน WAIT_NETWORK_IDLE_MS
+      (ตัวนับ fetch/XHR ติดตั้งตอน page_load() / snapshot() -> Request ที่เริ่มก่อนหน้านั้นนับได้แค่ตอนจบผ่านจำนวน Resource)
+    - Driver ตาย / หลุด -> โยน WebDriverException ทันที ไม่วนรอจนหมดเวลา
+    """
+    def __init__(self, driver):
+        self.driver = driver
+        self.script_timeout = None
+        self.stats = {} # ชนิด -> [ครั้ง, เวลารวม, นานสุด, หมดเวลา]
+        self.lock = threading.Lock()
+
+    def record(self, kind, seconds, ok):
+        with self.lock:
+            st = self.stats.setdefault(kind, [0, 0.0, 0.0, 0])
+            st[0] += 1
+            st[1] += seconds
+            st[2] = max(st[2], seconds)
+            if not ok: st[3] += 1
+
+    def until(self, kind, condition, timeout):
+        """ WebDriverWait ที่จับเวลา -> ค่าที่ condition คืน หรือ None ถ้าหมดเวลา """
+        started = time.perf_counter()
+        result = None
+        try: result = WebDriverWait(self.driver, timeout, poll_frequency=WAIT_POLL_SECONDS).until(condition)
+        except TimeoutException: pass
+        finally: self.record(kind, time.perf_counter() - started, result is not None)
+        return result
+
+    def presence(self, locator, timeout=10, visible=False, clickable=False):
+        if clickable: condition = EC.element_to_be_clickable(locator)
+        elif visible: condition = EC.visibility_of_element_located(locator)
+        else: condition = EC.presence_of_element_located(locator)
+        return self.until("presence", condition, timeout)
+
+    def url_change(self, old_url, timeout=10):
+        return self.until("url", lambda d: d.current_url != old_url, timeout) is not None
+
+    def url_matches(self, predicate, timeout=10):
+        return self.until("url", lambda d: predicate(d.current_url), timeout) is not None
+
+    def page_load(self, timeout=10):
+        loaded = self.until("load", lambda d: d.execute_script("return document.readyState") == "complete", timeout) is not None
+        self.driver.execute_script(WAIT_NET_HOOK_JS) # เริ่มนับ fetch/XHR ของหน้านี้ทันทีหลังโหลด
+        return loaded
+
+    def run_async(self, script, timeout, *args):
+        """ execute_async_script (ต่อท้าย args ด้วย timeout เป็น ms) / หน้า Unload ระหว่างรอ -> เช็คต่อในหน้าใหม่จนหมดเวลา """
+        if self.script_timeout is None or self.script_timeout < timeout + 5:
+            self.script_timeout = timeout + 5
+            self.driver.set_script_timeout(self.script_timeout)
+        deadline = time.perf_counter() + timeout
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0: return None
+            try: return self.driver.execute_async_script(script, *args, int(remaining * 1000))
+            except (JavascriptException, TimeoutException): time.sleep(WAIT_POLL_SECONDS) # Script ถูกทิ้งเพราะเปลี่ยนหน้า -> รอ Document ใหม่
+
+    def snapshot(self, selector=RESULT_LINK_SELECTOR):
+        """ จำหน้าปัจจุบันไว้ก่อนกด -> ส่งให้ mutation(since=...) เพื่อไม่ให้หน้าเก่านับเป็นผลลัพธ์ """
+        token = f"{time.time():.6f}-{random.random():.6f}"
+        try: signature = self.driver.execute_script(WAIT_SNAPSHOT_JS, token, selector)
+        except Exception: signature = None
+        return token, signature
+
+    def mutation(self, selector=None, texts=(), since=None, timeout=10, settle_ms=None):
+        """
+        "selector" / "text:<ข้อความ>" / "navigated" / "mutated" ตามที่เจอก่อน หรือ None ถ้าหมดเวลา
+        settle_ms (ใช้คู่กับ since): หน้าไม่เปลี่ยนแต่ Network นิ่งแล้ว -> รับหน้าที่เห็นอยู่ (ผลซ้ำหน้าเก่าไม่ใช่ความล้มเหลว)
+        """
+        token, signature = since or (None, None)
+        started = time.perf_counter()
+        result = self.run_async(WAIT_MUTATION_JS, timeout, selector, list(texts), token, signature, settle_ms)
+        self.record("mutation", time.perf_counter() - started, result is not None)
+        return result
+
+    def network_idle(self, timeout=5, idle_ms=WAIT_NETWORK_IDLE_MS):
+        started = time.perf_counter()
+        idle = bool(self.run_async(WAIT_NETWORK_IDLE_JS, timeout, idle_ms))
+        self.record("network_idle", time.perf_counter() - started, idle)
+        return idle
+
+    def summary_table(self):
+        total = sum(st[1] for st in self.stats.values())
+        table = Table(title=f"⏳ รอหน้าเว็บ (รวม {total:.1f}s)", show_header=True, header_style="bold cyan")
+        for column in ("ชนิด", "ครั้ง", "รอจริงรวม (s)", "เฉลี่ย (s)", "นานสุด (s)", "หมดเวลา"):
+            table.add_column(column, justify="left" if column == "ชนิด" else "right")
+        for kind, (count, seconds, longest, timeouts) in self.stats.items():
+            table.add_row(kind, f"{count:,}", f"{seconds:.2f}", f"{seconds / count:.2f}", f"{longest:.2f}", str(timeouts))
+        return table
+
+# --- ADAPTIVE PACING ---
+# เช็คสุขภาพหน้าที่เพิ่งโหลด: [URL, โดนบล็อก/Captcha หรือไม่]
+PAGE_HEALTH_JS = """
+    const text = ((document.title || "") + " " + (document.body ? document.body.innerText.slice(0, 3000) : "")).toLowerCase();
+    const blocked = /captcha|recaptcha|access denied|too many requests|unusual traffic|are you a robot|ขออภัย.*ถูกระงับ/.test(text);
+    return [location.href, blocked];
+"""
+
+class PacingController:
+    """
+    ปรับความถี่การเปิดโปรไฟล์ตามสัญญาณจากเว็บ (แบบ AIMD):
+    เว็บปกติ -> ลดเวลาหน่วงทีละน้อย / โหลดช้า, โหลดพัง, เด้งไป Login, เจอ Captcha -> เพิ่มเวลาหน่วงทันทีและพักยาว
+    """
+    def __init__(self, name="main", initial_delay=3.5, min_delay=None, max_delay=None):
+        self.name = name
+        self.min_delay = PACING_MIN_DELAY if min_delay is None else min_delay
+        self.max_delay = PACING_MAX_DELAY if max_delay is None else max_delay
+        self.delay = min(max(initial_delay, self.min_delay), self.max_delay)
+        self.best_delay = self.delay # เวลาหน่วงต่ำสุดที่ยังไม่โดนเตือน
+        self.cooldown_until = 0.0
+        self.latency_ewma = None
+        self.healthy_streak = 0
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.stats = {"requests": 0, "failed": 0, "login_redirect": 0, "blocked": 0, "slow": 0}
+
+    def before_request(self):
+        """ ถ้าอยู่ในช่วงพักหลังเจอสัญญาณอันตราย ให้รอจนครบก่อนยิงหน้าถัดไป """
+        wait = self.cooldown_until - time.time()
+        if wait > 0: time.sleep(wait)
+
+    def observe(self, latency=None, ok=True, login_redirect=False, blocked=False):
+        with self.lock:
+            self.stats["requests"] += 1
+            if blocked or login_redirect:
+                self.stats["blocked" if blocked else "login_redirect"] += 1
+                self.delay = min(self.max_delay, self.delay * 2)
+                self.cooldown_until = time.time() + (240 if blocked else 60)
+                self.healthy_streak = 0
+                return
+            if not ok:
+                self.stats["failed"] += 1
+                self.delay = min(self.max_delay, self.delay * 1.5)
+                self.healthy_streak = 0
+                return
+            if latency is not None:
+                if self.latency_ewma is not None and latency > self.latency_ewma * 2.5:
+                    # โหลดช้ากว่าปกติมาก = เว็บเริ่มตึง -> ถอยนิดหน่อย
+                    self.stats["slow"] += 1
+                    self.delay = min(self.max_delay, self.delay * 1.2)
+                    self.healthy_streak = 0
+                self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+            self.healthy_streak += 1
+            if self.healthy_streak >= 5:
+                self.delay = max(self.min_delay, self.delay - 0.25)
+                self.best_delay = min(self.best_delay, self.delay)
+                self.healthy_streak = 0
+
+    def dwell(self):
+        """ หน่วงเวลาระหว่างโปรไฟล์ (สุ่มรอบๆ ค่าปัจจุบันให้ดูเป็นคน) """
+        time.sleep(random.uniform(self.delay * 0.6, self.delay * 1.4))
+
+    def backoff(self, attempt):
+        """ รอก่อนลองโหลดซ้ำ (ยิ่งพังหลายรอบยิ่งรอนาน) """
+        time.sleep(min(self.max_delay, self.delay * (2 ** attempt)) * random.uniform(0.8, 1.2))
+
+    def effective_rate(self):
+        """ โปรไฟล์ต่อนาทีที่ทำได้จริงตั้งแต่เริ่ม """
+        elapsed = max(1e-6, time.time() - self.started)
+        return self.stats["requests"] * 60.0 / elapsed
+
+    def summary(self):
+        st = self.stats
+        return (f"[{self.name}] {self.effective_rate():.1f} โปรไฟล์/นาที | หน่วงตอนนี้ {self.delay:.2f}s (ต่ำสุดที่ปลอดภัย {self.best_delay:.2f}s) | "
+                f"โหลด {st['requests']} พัง {st['failed']} ช้า {st['slow']} เด้ง Login {st['login_redirect']} Captcha/Block {st['blocked']}")
+
+def save_resume_fixture(url, html):
+    """ เก็บ HTML หน้า ResumeDetail ลง RESUME_FIXTURE_DIR (ชื่อไฟล์ = hash ของลิงก์) """
+    if not RESUME_FIXTURE_DIR or not html: return
+    try:
+        os.makedirs(RESUME_FIXTURE_DIR, exist_ok=True)
+        name = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+        with open(os.path.join(RESUME_FIXTURE_DIR, f"{name}.html"), 'w', encoding='utf-8') as f: f.write(html)
+    except Exception as e: console.print(f"⚠️ เก็บ Fixture ไม่สำเร็จ: {e}", style="yellow")
+
+def benchmark_parse_resume(fixture_dir, rounds=5):
+    """ วัดความเร็ว parse_resume กับไฟล์ HTML ใน fixture_dir: profiles/sec, p50/p99 และหน่วยความจำต่อโปรไฟล์ """
+    files = sorted(glob.glob(os.path.join(fixture_dir, "*.html")) + glob.glob(os.path.join(fixture_dir, "*.htm")))
+    if not files:
+        console.print(f"❌ ไม่พบไฟล์ .html ใน {fixture_dir}", style="error")
+        return None
+    pages = []
+    for path in files:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f: pages.append(f.read())
+
+    for html in pages: parse_resume(html)  # Warm-up (Regex / XPath cache)
+
+    latencies = []
+    qualified = 0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for html in pages:
+            t0 = time.perf_counter()
+            data, _, _ = parse_resume(html)
+            latencies.append(time.perf_counter() - t0)
+            if data is not None: qualified += 1
+    elapsed = time.perf_counter() - started
+
+    # วัดหน่วยความจำแยกรอบ (tracemalloc ทำให้ช้าลง ไม่เอามาปนกับการจับเวลา)
+    peaks = []; blocks = []
+    tracemalloc.start()
+    for html in pages:
+        tracemalloc.reset_peak()
+        before_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+        base, _ = tracemalloc.get_traced_memory()
+        parse_resume(html)
+        _, peak = tracemalloc.get_traced_memory()
+        after_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+        peaks.append(peak - base); blocks.append(after_blocks - before_blocks)
+    tracemalloc.stop()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    table = Table(title=f"parse_resume benchmark ({len(pages)} fixtures x {rounds} rounds)")
+    table.add_column("Metric"); table.add_column("Value", justify="right")
+    table.add_row("profiles/sec", f"{len(latencies) / elapsed:,.1f}")
+    table.add_row("p50 latency", f"{p50 * 1000:.2f} ms")
+    table.add_row("p99 latency", f"{p99 * 1000:.2f} ms")
+    table.add_row("mean latency", f"{statistics.mean(latencies) * 1000:.2f} ms")
+    table.add_row("peak alloc / profile", f"{statistics.mean(peaks) / 1024:,.1f} KiB")
+    table.add_row("retained blocks / profile", f"{statistics.mean(blocks):,.1f}")
+    table.add_row("qualified", f"{qualified // rounds}/{len(pages)}")
+    console.print(table)
+    return {"profiles_per_sec": len(latencies) / elapsed, "p50": p50, "p99": p99, "peak_bytes": statistics.mean(peaks)}
+
+# --- RECORD SINK (เขียนโปรไฟล์ลงไฟล์ทันทีที่ Parse เสร็จ -> รันพัง/Timeout กลางทางข้อมูลไม่หาย) ---
+class RecordSink:
+    """
+    ไฟล์ JSON Lines แบบเขียนต่อท้ายอย่างเดียว: 1 บรรทัด = 1 Record, Flush (fsync) ตามจำนวน/เวลาเท่านั้น
+    write() / flush_if_due() บอกว่า Record ทั้งหมดถึงดิสก์แล้วหรือยัง -> ผู้เรียกค่อยบันทึก Checkpoint ตามจังหวะนั้น
+    """
+    def __init__(self, path, flush_every=RECORD_SINK_FLUSH_EVERY, flush_interval=RECORD_SINK_FLUSH_SECONDS, append=True):
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self.count = 0
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        if append: self._drop_partial_tail(path)
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+
+    @staticmethod
+    def _drop_partial_tail(path):
+        """ บรรทัดสุดท้ายที่เขียนไม่จบ (โปรแกรมตายกลางบรรทัด) -> ตัดทิ้ง ไม่ให้ Record ถัดไปไปต่อท้ายบรรทัดเสีย """
+        if not os.path.exists(path): return
+        with open(path, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            if end == 0: return
+            f.seek(end - 1)
+            if f.read(1) == b"\n": return
+            pos = end
+            while pos > 0:
+                start = max(0, pos - 65536)
+                f.seek(start)
+                cut = f.read(pos - start).rfind(b"\n")
+                if cut >= 0:
+                    f.truncate(start + cut + 1)
+                    break
+                pos = start
+            else: f.truncate(0)
+        console.print(f"⚠️ ตัดบรรทัดที่เขียนไม่จบท้าย {path}", style="yellow")
+
+    def write(self, record):
+        """ เขียนต่อท้าย (Flush เมื่อครบจำนวน/เวลา) -> คืน True ถ้าทุก Record ที่เขียนไปแล้วถึงดิสก์ """
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self.count += 1
+            self._pending += 1
+            return self._flush_if_due_locked()
+
+    def flush_if_due(self):
+        """ ไม่มี Record ใหม่ก็ยัง Flush ตามเวลา (เช่น ช่วงที่โปรไฟล์ไม่ผ่านเกณฑ์ติดกัน) -> คืน True ถ้าทุก Record ถึงดิสก์แล้ว """
+        with self._lock:
+            if self._file.closed: return True
+            return self._flush_if_due_locked()
+
+    def _flush_if_due_locked(self):
+        if self._pending and (self._pending >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval):
+            self._flush_locked()
+        return self._pending == 0
+
+    def _flush_locked(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            if not self._file.closed: self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            if self._file.closed: return
+            self._flush_locked()
+            self._file.close()
+
+def iter_sink_records(path):
+    """ อ่าน Record ทีละบรรทัด (บรรทัดสุดท้ายที่เขียนไม่จบเพราะโปรแกรมตายกลางทาง -> ข้าม) """
+    if not path or not os.path.exists(path): return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line: continue
+            try: yield json.loads(line)
+            except json.JSONDecodeError: console.print(f"⚠️ ข้ามบรรทัดเสียใน {path}", style="yellow")
+
+class RunCheckpoint:
+    """
+    จุดบันทึกความคืบหน้าของรอบ -> Chrome ตาย/Job ถูกยกเลิก แล้วรันใหม่ด้วย --resume ต่อจากเดิมได้
+    เก็บ: Keyword ที่ทำอยู่, ลิงก์ที่เก็บได้ + วันที่ในหน้าผลค้นหา, ลิงก์ที่ทำเสร็จ, Batch ที่ยังไม่ส่ง, ID ที่ส่ง HOT แล้ว, ตัวนับ
+    - โครงของรอบ (Keyword / ลิงก์ที่เก็บได้) -> ไฟล์ JSON เขียนทับแบบ Atomic
+    - ความคืบหน้ารายโปรไฟล์ (ลิงก์ที่เสร็จ / HOT / Batch / ตัวนับ) -> ต่อท้าย <path>.log ทีละบรรทัด
+      แล้วรวมกลับเข้า JSON ตอนเขียนทับครั้งถัดไป (เช่น จบ Keyword) -> ไม่ต้องเขียนทั้งไฟล์ใหม่ทุกโปรไฟล์
+    """
+    def __init__(self, path, state=None):
+        self.path = path
+        self.log_path = f"{path}.log"
+        self.state = state or {}
+        self.processed = set(self.state.get("processed", []))
+        self.hot_sent = set(self.state.get("hot_sent", []))
+        self.lock = threading.RLock() # ขั้น notify / persist ของ Pipeline บันทึกพร้อมกันได้
+        self._log = None
+
+    @classmethod
+    def load(cls, path):
+        if not path or not os.path.exists(path): return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f: checkpoint = cls(path, json.load(f))
+        except Exception as e:
+            console.print(f"⚠️ อ่าน Checkpoint ไม่ได้ ({e}) -> เริ่มรอบใหม่", style="yellow")
+            return None
+        if checkpoint.replay_log(): checkpoint.save() # รวม Log เข้า JSON (บรรทัดเสียท้าย Log หายไปด้วย)
+        return checkpoint
+
+    def replay_log(self):
+        """ ต่อความคืบหน้าจาก Log ทับ State ใน JSON (บรรทัดท้ายที่เขียนไม่จบ -> ข้าม) / คืน True ถ้ามี Log """
+        if not os.path.exists(self.log_path): return False
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try: entry = json.loads(line)
+                except json.JSONDecodeError: continue
+                self.processed.update(entry.get("processed", ()))
+                self.hot_sent.update(entry.get("hot_sent", ()))
+                for key in ("batch", "counters", "saved_at"):
+                    if key in entry: self.state[key] = entry[key]
+        return True
+
+    def _append(self, entry, counters=None):
+        """ ต่อท้าย Log 1 บรรทัด (fsync) แทนการเขียน JSON ทั้งไฟล์ใหม่ """
+        with self.lock:
+            if counters is not None: self.state["counters"] = entry["counters"] = counters
+            entry["saved_at"] = self.state["saved_at"] = datetime.datetime.now().isoformat(timespec="seconds")
+            if self._log is None: self._log = open(self.log_path, 'a', encoding='utf-8')
+            self._log.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._log.flush(); os.fsync(self._log.fileno())
+
+    def _drop_log(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        try: os.remove(self.log_path)
+        except FileNotFoundError: pass
+
+    @classmethod
+    def start(cls, path, sink_path):
+        checkpoint = cls(path, {"started_at": datetime.datetime.now().isoformat(timespec="seconds"), "run_date": str(datetime.date.today()),
+                                "sink_path": sink_path, "keyword_index": 0, "keyword": None, "links": None, "markers": {},
+                                "batch": [], "counters": {}})
+        checkpoint.save()
+        return checkpoint
+
+    def begin_keyword(self, index, keyword):
+        """ เริ่ม Keyword ใหม่ (ยังไม่ได้เก็บลิงก์) """
+        if self.state.get("keyword_index") == index and self.state.get("keyword") == keyword: return
+        self.state.update(keyword_index=index, keyword=keyword, links=None, markers={}, batch=[])
+        self.processed.clear(); self.hot_sent.clear()
+        self.save()
+
+    def set_links(self, links, markers):
+        self.state.update(links=list(links), markers=dict(markers))
+        self.save()
+
+    def set_collected(self, index, links, markers, full_scan=False, last_page=None):
+        """
+        ลิงก์ของ Keyword ที่ index (เก็บทุก Keyword ก่อนเริ่มดูด) -> --resume ไม่ต้องค้นหาใหม่ / full_scan = ไล่ครบทุกหน้า (ใช้ตอนขยับ Watermark)
+        last_page = ยังเก็บไม่ครบ (ถึงหน้านี้แล้ว) -> --resume ค้นหาใหม่แล้วกระโดดไปหน้าถัดไป
+        """
+        entry = {"links": list(links), "markers": dict(markers), "full_scan": bool(full_scan)}
+        if last_page: entry["last_page"] = last_page
+        with self.lock:
+            self.state.setdefault("collected", {})[str(index)] = entry
+            self.save()
+
+    def pending_links(self):
+        return [link for link in (self.state.get("links") or []) if link not in self.processed]
+
+    def mark_hot_sent(self, person_id, counters=None):
+        with self.lock:
+            self.hot_sent.add(person_id)
+            self._append({"hot_sent": [person_id]}, counters)
+
+    def mark_processed(self, links, batch, counters=None):
+        """ links = ลิงก์เดียวหรือหลายลิงก์ที่ Record ถึงดิสก์แล้ว / batch = Batch ณ ลิงก์สุดท้าย (ลง Log เฉพาะตอนเปลี่ยน) """
+        if isinstance(links, str): links = [links]
+        with self.lock:
+            entry = {"processed": list(links)}
+            batch = list(batch)
+            if batch != self.state.get("batch"): self.state["batch"] = entry["batch"] = batch
+            self.processed.update(links)
+            self._append(entry, counters)
+
+    def set_batch(self, batch, counters=None):
+        with self.lock:
+            self.state["batch"] = list(batch)
+            self._append({"batch": self.state["batch"]}, counters)
+
+    def finish_keyword(self, index, counters=None):
+        self.state.update(keyword_index=index + 1, keyword=None, links=None, markers={}, batch=[])
+        self.processed.clear(); self.hot_sent.clear()
+        self.save(counters=counters)
+
+    def save(self, counters=None):
+        """ เขียน State ทั้งหมด (รวมความคืบหน้าใน Log) ลง JSON แบบ Atomic แล้วเริ่ม Log ใหม่ """
+        with self.lock:
+            if counters is not None: self.state["counters"] = counters
+            self.state["processed"] = sorted(self.processed)
+            self.state["hot_sent"] = sorted(self.hot_sent)
+            self.state["saved_at"] = datetime.datetime.now().isoformat(timespec="seconds")
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, ensure_ascii=False)
+                f.flush(); os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._drop_log() # JSON มีทุกอย่างใน Log แล้ว (ตายก่อนบรรทัดนี้ -> replay ซ้ำได้ผลเดิม)
+
+    def clear(self):
+        with self.lock: self._drop_log()
+        try: os.remove(self.path)
+        except FileNotFoundError: pass
+
+# --- SESSION STORE (Cookie หลัง Login แบบเข้ารหัส + เช็คอายุด้วย Request เดียว) ---
+SESSION_KDF_PREFIX = b"scrypt1." # หัวไฟล์เมื่อ Key มาจาก Passphrase: scrypt1.<salt base64>.<Fernet token>
+# มีเฉพาะตอน Login แล้ว: ฟอร์มค้นหาเรซูเม่ (ช่องเดียวกับที่ step2_search ใช้)
+SESSION_LOGGED_IN_PATTERN = re.compile(r"""id\s*=\s*["']?(?:KeyWord|buttonsearch)\b""")
+
+def session_cipher(secret, salt=None):
+    """ Fernet จาก SESSION_STORE_KEY: salt=None -> ต้องเป็น Fernet Key (ไม่ใช่คืน None) / มี salt -> Passphrase ผ่าน scrypt """
+    if Fernet is None or not secret: return None
+    if salt is None:
+        try: return Fernet(secret.encode())
+        except (ValueError, TypeError): return None
+    key = hashlib.scrypt(secret.encode(), salt=salt, n=2 ** 14, r=8, p=1, dklen=32)
+    return Fernet(base64.urlsafe_b64encode(key))
+
+class SessionStore:
+    """
+    ไฟล์ Session ที่เข้ารหัส: {"saved_at", "user_agent", "cookies": [Cookie แบบ CDP]}
+    SESSION_STORE_KEY เป็น Fernet Key -> ใช้ตรงๆ / เป็น Passphrase -> สุ่ม salt ใหม่ทุกครั้งที่บันทึก แล้วเก็บไว้หน้าไฟล์
+    """
+    def __init__(self, path=SESSION_STORE_PATH, secret=SESSION_STORE_KEY):
+        self.path = path
+        self.secret = secret
+        self.cipher = session_cipher(secret)
+
+    @property
+    def enabled(self): return Fernet is not None and bool(self.secret) and bool(self.path)
+
+    def seal(self, payload):
+        if self.cipher is not None: return self.cipher.encrypt(payload)
+        salt = os.urandom(16)
+        return SESSION_KDF_PREFIX + base64.urlsafe_b64encode(salt) + b"." + session_cipher(self.secret, salt).encrypt(payload)
+
+    def unseal(self, blob):
+        if blob.startswith(SESSION_KDF_PREFIX):
+            salt, _, token = blob[len(SESSION_KDF_PREFIX):].partition(b".")
+            return session_cipher(self.secret, base64.urlsafe_b64decode(salt)).decrypt(token)
+        if self.cipher is None: raise InvalidToken
+        return self.cipher.decrypt(blob)
+
+    def load(self):
+        if not self.enabled or not os.path.exists(self.path): return None
+        try:
+            with open(self.path, 'rb') as f: data = json.loads(self.unseal(f.read()))
+        except (InvalidToken, ValueError, OSError) as e:
+            console.print(f"⚠️ อ่านไฟล์ Session ไม่ได้ (Key เปลี่ยน/ไฟล์เสีย) -> Login ใหม่: {type(e).__name__}", style="yellow")
+            return None
+        now = time.time()
+        # ตัด Cookie ที่หมดอายุแล้วทิ้ง (expires <= 0 = Session Cookie)
+        data["cookies"] = [c for c in data.get("cookies", []) if not c.get("expires") or c["expires"] <= 0 or c["expires"] > now]
+        return data if data["cookies"] else None
+
+    def save(self, cookies, user_agent=""):
+        if not self.enabled or not cookies: return False
+        payload = json.dumps({"saved_at": datetime.datetime.now().isoformat(timespec="seconds"), "user_agent": user_agent, "cookies": cookies}, ensure_ascii=False)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(self.seal(payload.encode("utf-8")))
+            f.flush(); os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        return True
+
+    def clear(self):
+        try: os.remove(self.path)
+        except FileNotFoundError: pass
+
+def probe_session(cookies, user_agent="", url=FIND_RESUME_URL, timeout=SESSION_PROBE_TIMEOUT):
+    """
+    เช็ค Session ด้วย GET หน้าค้นหาเรซูเม่ครั้งเดียว (ไม่เปิด Chrome)
+    คืน "valid" (เห็นฟอร์มค้นหาที่มีเฉพาะตอน Login แล้ว) / "expired" (โดนดีดไป Login / หน้าไม่มีฟอร์มค้นหา) / "unknown" (เน็ต/Server มีปัญหา บอกไม่ได้)
+    """
+    try:
+        with requests.Session() as session:
+            if user_agent: session.headers["User-Agent"] = user_agent
+            for c in cookies:
+                session.cookies.set(c['name'], c['value'], domain=c.get('domain'), path=c.get('path', '/'))
+            resp = session.get(url, timeout=timeout, allow_redirects=True)
+    except requests.exceptions.RequestException:
+        return "unknown"
+    if "auth.jobthai.com" in resp.url or "login" in urlparse(resp.url).path.lower(): return "expired"
+    if resp.status_code >= 500 or resp.status_code in (403, 429): return "unknown"
+    return "valid" if resp.ok and SESSION_LOGGED_IN_PATTERN.search(resp.text or "") else "expired"
+
+# --- STAGED PIPELINE (Browser ไม่ต้องรอ CPU/SMTP/Sheets: แต่ละขั้นเป็น Thread ต่อกันด้วยคิวที่จำกัดขนาด) ---
+PIPELINE_DONE = object()
+
+class PipelineStats:
+    """ ตัวนับของแต่ละขั้น: จำนวนรายการ / เวลาทำงานจริง / เวลาที่ต้องรอคิวขั้นถัดไป (Backpressure) / คิวยาวสุด """
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.peak_queue = 0
+        self.lock = threading.Lock()
+
+    def record(self, seconds, items=1):
+        with self.lock:
+            self.items += items
+            self.busy += seconds
+
+class StagedPipeline:
+    """
+    ขั้นตอนต่อกันเป็นสาย: put() -> stages[0] -> stages[1] -> ... (แต่ละขั้นมี Thread + queue.Queue(maxsize) ของตัวเอง)
+    - handler(item) คืนค่าที่ส่งต่อขั้นถัดไป (None = จบที่ขั้นนี้) / รายการออกจากขั้นตามลำดับที่เข้าเสมอ
+    - คิวเต็ม -> ขั้นก่อนหน้า (หรือคนเรียก put) หยุดรอ ไม่ให้ RAM โตตามจำนวนโปรไฟล์
+    - handler พัง -> on_error(ชื่อขั้น, item, exception) แล้วทิ้งรายการนั้น
+    - ขั้นที่ทำใน Thread หลัก (เช่น ใช้ Browser) ขอตัวนับด้วย track(name)
+    """
+    def __init__(self, stages, maxsize=None, on_error=None):
+        self.stages = list(stages)
+        self.maxsize = maxsize or PIPELINE_QUEUE_SIZE
+        self.on_error = on_error
+        self.queues = [queue.Queue(maxsize=self.maxsize) for _ in self.stages]
+        self.stats = {}
+        self.threads = []
+        self.started_at = None
+
+    def track(self, name):
+        if name not in self.stats: self.stats[name] = PipelineStats(name)
+        return self.stats[name]
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        for index, (name, _) in enumerate(self.stages):
+            self.track(name)
+            thread = threading.Thread(target=self._worker, args=(index,), name=f"pipeline-{name}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def _forward(self, index, item, sender):
+        """ ส่ง item เข้าคิวของขั้นที่ index: เวลาที่รอคิวเต็มนับให้ขั้นที่ส่ง / ความยาวคิวนับให้ขั้นที่รับ """
+        target_queue = self.queues[index]
+        started = time.perf_counter()
+        target_queue.put(item)
+        with sender.lock: sender.blocked += time.perf_counter() - started
+        receiver = self.stats[self.stages[index][0]]
+        with receiver.lock: receiver.peak_queue = max(receiver.peak_queue, target_queue.qsize())
+
+    def put(self, item, stats=None):
+        """ ส่งเข้าขั้นแรก (รอถ้าคิวเต็ม) / stats = ตัวนับของขั้นที่ส่ง ใช้เก็บเวลาที่ต้องรอ """
+        self._forward(0, item, stats or self.track("source"))
+
+    def _worker(self, index):
+        name, handler = self.stages[index]
+        stats = self.stats[name]
+        inbox = self.queues[index]
+        outbox = index + 1 if index + 1 < len(self.queues) else None
+        while True:
+            item = inbox.get()
+            try:
+                if item is PIPELINE_DONE:
+                    if outbox is not None: self.queues[outbox].put(item)
+                    return
+                started = time.perf_counter()
+                try: result = handler(item)
+                except Exception as e:
+                    result = None
+                    if self.on_error is not None: self.on_error(name, item, e)
+                stats.record(time.perf_counter() - started)
+                if result is not None and outbox is not None: self._forward(outbox, result, stats)
+            finally:
+                inbox.task_done()
+
+    def drain(self):
+        """ รอจนทุกรายการที่ส่งเข้าไปแล้วผ่านครบทุกขั้น """
+        for inbox in self.queues: inbox.join()
+
+    def close(self):
+        self.queues[0].put(PIPELINE_DONE)
+        for thread in self.threads: thread.join()
+
+    def summary_table(self):
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        table = Table(title=f"🏭 Pipeline ({elapsed:.1f}s)", show_header=True, header_style="bold cyan")
+        for column in ("ขั้น", "รายการ", "เวลาทำงาน (s)", "รายการ/วินาที", "รอขั้นถัดไป (s)", "คิวยาวสุด"):
+            table.add_column(column, justify="left" if column == "ขั้น" else "right")
+        for stats in self.stats.values():
+            rate = stats.items / stats.busy if stats.busy > 0 else 0.0
+            table.add_row(stats.name, f"{stats.items:,}", f"{stats.busy:.2f}", f"{rate:,.1f}", f"{stats.blocked:.2f}", str(stats.peak_queue))
+        return table
+
+# --- GOOGLE SHEETS WRITES (รวมเป็นก้อน + Retry แบบ Exponential Backoff เมื่อโดน Quota/Server Error) ---
+SHEETS_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+class SheetsWriteError(Exception):
+    pass
+
+def sheets_call_with_backoff(fn, *args, what="Google Sheets", max_attempts=SHEETS_MAX_ATTEMPTS, base_delay=2.0, **kwargs):
+    """ เรียก gspread ซ้ำเมื่อเจอ 429/5xx หรือเน็ตหลุด (รอ 2, 4, 8, ... วินาที + สุ่มเล็กน้อย) / Error แบบอื่นโยนออกทันที """
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return fn(*args, **kwargs)
+        except gspread.exceptions.APIError as e:
+            status = getattr(getattr(e, "response", None), "status_code", None) or getattr(e, "code", None)
+            if status not in SHEETS_RETRY_STATUS or attempt == max_attempts: raise
+            reason = f"HTTP {status}"
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt == max_attempts: raise
+            reason = type(e).__name__
+        delay = min(base_delay * (2 ** (attempt - 1)), 64.0) + random.uniform(0, 1)
+        console.print(f"   ⏳ {what}: {reason} -> รอ {delay:.1f}s แล้วลองใหม่ ({attempt}/{max_attempts})", style="yellow")
+        time.sleep(delay)
+
+def iter_upload_batches(rows, max_rows=None, max_bytes=None):
+    """ แบ่งแถวเป็นก้อนที่ไม่เกิน max_rows แถว และขนาด (JSON โดยประมาณ) ไม่เกิน max_bytes ต่อการเรียก API หนึ่งครั้ง """
+    max_rows = max_rows or SHEETS_UPLOAD_ROWS
+    max_bytes = max_bytes or SHEETS_UPLOAD_BYTES
+    batch = []; batch_bytes = 0
+    for row in rows:
+        row_bytes = len(json.dumps(row, ensure_ascii=False, default=str).encode("utf-8"))
+        if batch and (len(batch) >= max_rows or batch_bytes + row_bytes > max_bytes):
+            yield batch
+            batch = []; batch_bytes = 0
+        batch.append(row); batch_bytes += row_bytes
+    if batch: yield batch
+
+class HistoryWriter:
+    """
+    บัฟเฟอร์แถวประวัติ (History_*) แล้วส่งทีละก้อนด้วย append_rows แทน append_row ทีละคน
+    - Flush เมื่อครบ flush_rows แถว / ค้างนานเกิน flush_seconds / จบ Keyword / จบรอบ
+    - แถวที่ยังไม่ได้ส่งถูกเขียนลง spill_path ทันที -> Flush ไม่สำเร็จหรือโปรแกรมตาย รอบหน้าจะส่งต่อให้ (ไม่มีแถวหาย)
+    """
+    def __init__(self, spreadsheet, spill_path=HISTORY_SPILL_PATH, flush_rows=HISTORY_FLUSH_ROWS, flush_seconds=HISTORY_FLUSH_SECONDS):
+        self.spreadsheet = spreadsheet
+        self.spill_path = spill_path
+        self.flush_rows = max(1, flush_rows)
+        self.flush_seconds = flush_seconds
+        self.pending = {} # ชื่อ Tab -> [แถว, ...] (เรียงตามลำดับที่เพิ่ม)
+        self.worksheets = {}
+        self.rows_written = 0
+        self.api_calls = 0
+        self._oldest_pending = None
+        self._retry_after = 0.0 # Flush ล่าสุดไม่สำเร็จ -> ไม่ลองตาม Threshold ซ้ำจนกว่าจะพ้นเวลานี้ (ไม่ให้ Loop ดูดข้อมูลค้าง)
+        for record in iter_sink_records(spill_path):
+            self.pending.setdefault(record["tab"], []).append(record["row"])
+        if self.pending:
+            self._oldest_pending = time.monotonic()
+            console.print(f"♻️ พบประวัติค้างส่งจากรอบก่อน {self.pending_count()} แถว -> จะส่งรอบนี้", style="yellow")
+
+    def pending_count(self):
+        return sum(len(rows) for rows in self.pending.values())
+
+    def pending_rows(self, tab):
+        return list(self.pending.get(tab, []))
+
+    def register(self, worksheet):
+        self.worksheets[worksheet.title] = worksheet
+
+    def append(self, worksheet, row):
+        tab = worksheet.title
+        self.worksheets[tab] = worksheet
+        self.pending.setdefault(tab, []).append(row)
+        with open(self.spill_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({"tab": tab, "row": row}, ensure_ascii=False) + "\n")
+        if self._oldest_pending is None: self._oldest_pending = time.monotonic()
+        now = time.monotonic()
+        if now >= self._retry_after and (self.pending_count() >= self.flush_rows or now - self._oldest_pending >= self.flush_seconds):
+            self.flush("threshold")
+
+    def flush(self, reason=""):
+        """ ส่งทุก Tab ที่ค้าง / คืน True เมื่อไม่เหลือแถวค้าง """
+        for tab in list(self.pending):
+            rows = self.pending[tab]
+            if not rows:
+                del self.pending[tab]; continue
+            sent = 0
+            try:
+                worksheet = self.worksheets.get(tab)
+                if worksheet is None:
+                    worksheet = sheets_call_with_backoff(self.spreadsheet.worksheet, tab, what=f"เปิด Tab {tab}")
+                    self.worksheets[tab] = worksheet
+                for batch in iter_upload_batches(rows):
+                    sheets_call_with_backoff(worksheet.append_rows, batch, what=f"บันทึกประวัติ {tab}")
+                    self.api_calls += 1
+                    sent += len(batch)
+                del self.pending[tab]
+                console.print(f"   📝 บันทึกประวัติ {len(rows)} แถวลง '{tab}'" + (f" ({reason})" if reason else ""), style="dim")
+            except Exception as e:
+                self.pending[tab] = rows[sent:]
+                console.print(f"⚠️ บันทึกประวัติลง '{tab}' ยังไม่สำเร็จ ({e}) -> เก็บ {len(rows) - sent} แถวไว้ส่งรอบถัดไป", style="red")
+            self.rows_written += sent
+        self._rewrite_spill()
+        self._oldest_pending = time.monotonic() if self.pending else None
+        self._retry_after = time.monotonic() + self.flush_seconds if self.pending else 0.0
+        return not self.pending
+
+    def _rewrite_spill(self):
+        if not self.pending:
+            try: os.remove(self.spill_path)
+            except FileNotFoundError: pass
+            return
+        tmp_path = f"{self.spill_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for tab, rows in self.pending.items():
+                for row in rows: f.write(json.dumps({"tab": tab, "row": row}, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.spill_path)
+
+class HistoryMirror:
+    """
+    สำเนาประวัติการส่งเมล (ทุก Tab History_*) ใน SQLite ของเครื่อง
+    - ตอนเริ่มรอบ: ดึงเฉพาะแถวที่ต่อท้ายมาใหม่ของทุก Tab ในการเรียก values_batch_get ครั้งเดียว (จำจำนวนแถวที่ Sync แล้วไว้)
+    - ค้นหา/บันทึกผ่านตารางที่มี Index (แทน get_all_values ทั้ง Tab ทุก Keyword)
+    - Google Sheets ต่อไม่ได้ -> ใช้ข้อมูลในไฟล์นี้จากรอบก่อน หรือ notification_history_uni.json
+    """
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.worksheets = {} # ชื่อ Tab -> Worksheet (จาก Sync ล่าสุด)
+        with self.lock, self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS history (tab TEXT, candidate_id TEXT, last_sent TEXT, source TEXT, PRIMARY KEY (tab, candidate_id))")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS history_tabs (tab TEXT PRIMARY KEY, row_count INTEGER, last_row TEXT, synced_at TEXT)")
+
+    def _upsert_rows(self, tab, rows):
+        """ แถวหลังทับแถวก่อน (เหมือน dict เดิมที่สร้างจาก get_all_values) """
+        data = [(tab, str(row[0]).strip(), str(row[1]).strip(), str(row[2]).strip() if len(row) > 2 else "") for row in rows if len(row) >= 2]
+        self.conn.executemany("INSERT INTO history (tab, candidate_id, last_sent, source) VALUES (?, ?, ?, ?) "
+                              "ON CONFLICT(tab, candidate_id) DO UPDATE SET last_sent = excluded.last_sent, source = excluded.source", data)
+
+    def sync(self, spreadsheet, tabs):
+        """ Sync ทุก Tab ใน tabs จาก Sheet: 1 ครั้งอ่านรายชื่อ Tab + 1 ครั้ง values_batch_get / คืนจำนวนแถวใหม่ที่ได้ """
+        self.worksheets = {ws.title: ws for ws in sheets_call_with_backoff(spreadsheet.worksheets, what="อ่านรายชื่อ Tab")}
+        tabs = [tab for tab in dict.fromkeys(tabs) if tab in self.worksheets]
+        if not tabs: return 0
+        with self.lock:
+            known = {tab: (count, last_row) for tab, count, last_row in self.conn.execute("SELECT tab, row_count, last_row FROM history_tabs")}
+        ranges = []
+        for tab in tabs:
+            count, _ = known.get(tab, (0, None))
+            # เริ่มอ่านที่แถวสุดท้ายที่เคย Sync (ทับกัน 1 แถว) เพื่อเช็คว่า Tab ไม่ได้ถูกแก้/ล้างไปก่อน
+            ranges.append(f"'{tab}'!A{max(count, 1)}:C")
+        response = sheets_call_with_backoff(spreadsheet.values_batch_get, ranges, what="ดึงประวัติทุก Tab")
+        value_ranges = response.get("valueRanges", [])
+        added = 0; full_resync = []
+        now = datetime.datetime.now().isoformat(timespec="seconds")
+        with self.lock, self.conn:
+            for tab, value_range in zip(tabs, value_ranges):
+                values = value_range.get("values", [])
+                count, last_row = known.get(tab, (0, None))
+                if count > 0:
+                    if not values or json.dumps(values[0], ensure_ascii=False) != last_row:
+                        full_resync.append(tab); continue
+                    new_rows = values[1:]
+                else:
+                    new_rows = values[1:] # ข้าม Header
+                if new_rows: self._upsert_rows(tab, new_rows)
+                total = (count if count > 0 else 1) + len(new_rows) if values else 0
+                tail = json.dumps((new_rows or values)[-1], ensure_ascii=False) if values else None
+                self.conn.execute("INSERT OR REPLACE INTO history_tabs (tab, row_count, last_row, synced_at) VALUES (?, ?, ?, ?)", (tab, total, tail, now))
+                added += len(new_rows)
+        for tab in full_resync: added += self.resync_tab(tab)
+        return added
+
+    def resync_tab(self, tab):
+        """ Tab ถูกแก้ไขย้อนหลัง -> ล้างของเดิมแล้วอ่านใหม่ทั้ง Tab """
+        console.print(f"🔄 '{tab}' ถูกแก้ไขย้อนหลัง -> Sync ใหม่ทั้ง Tab", style="yellow")
+        values = sheets_call_with_backoff(self.worksheets[tab].get_all_values, what=f"อ่าน {tab}")
+        now = datetime.datetime.now().isoformat(timespec="seconds")
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM history WHERE tab = ?", (tab,))
+            self._upsert_rows(tab, values[1:])
+            tail = json.dumps(values[-1], ensure_ascii=False) if values else None
+            self.conn.execute("INSERT OR REPLACE INTO history_tabs (tab, row_count, last_row, synced_at) VALUES (?, ?, ?, ?)", (tab, len(values), tail, now))
+        return max(len(values) - 1, 0)
+
+    def is_empty(self):
+        with self.lock: return self.conn.execute("SELECT 1 FROM history LIMIT 1").fetchone() is None
+
+    def seed_from_json(self, history_data, tabs):
+        """ notification_history_uni.json: {Tab: {ID: วันที่}} หรือแบบเก่า {ID: วันที่} (ใช้กับทุก Tab) """
+        with self.lock, self.conn:
+            for tab in tabs:
+                data = history_data.get(tab) if isinstance(history_data.get(tab), dict) else {k: v for k, v in history_data.items() if not isinstance(v, dict)}
+                self._upsert_rows(tab, [[k, v, "json"] for k, v in data.items()])
+
+    def export_json(self):
+        with self.lock:
+            out = {}
+            for tab, candidate_id, last_sent in self.conn.execute("SELECT tab, candidate_id, last_sent FROM history ORDER BY tab"):
+                out.setdefault(tab, {})[candidate_id] = last_sent
+        return out
+
+    def get(self, tab, candidate_id):
+        with self.lock:
+            row = self.conn.execute("SELECT last_sent FROM history WHERE tab = ? AND candidate_id = ?", (tab, str(candidate_id))).fetchone()
+        return row[0] if row else None
+
+    def record(self, tab, candidate_id, date_str, source="Auto-Log"):
+        """ บันทึกในเครื่องทันที (ไม่นับเป็นแถวที่ Sync แล้ว -> แถวจริงจะตามมากับ Delta Sync รอบหน้า) """
+        with self.lock, self.conn:
+            self._upsert_rows(tab, [[candidate_id, date_str, source]])
+
+    def view(self, tab):
+        return HistoryView(self, tab)
+
+    def close(self):
+        with self.lock: self.conn.close()
+
+class HistoryView:
+    """ หน้าตาเหมือน dict {ID: วันที่ส่งล่าสุด} ของ Tab เดียว แต่ค้นหา/บันทึกลง HistoryMirror """
+    def __init__(self, mirror, tab):
+        self.mirror = mirror
+        self.tab = tab
+
+    def __contains__(self, candidate_id): return self.mirror.get(self.tab, candidate_id) is not None
+
+    def __getitem__(self, candidate_id):
+        value = self.mirror.get(self.tab, candidate_id)
+        if value is None: raise KeyError(candidate_id)
+        return value
+
+    def __setitem__(self, candidate_id, date_str): self.mirror.record(self.tab, candidate_id, date_str)
+
+    def get(self, candidate_id, default=None):
+        value = self.mirror.get(self.tab, candidate_id)
+        return default if value is None else value
+
+def thumbnail_bytes(path, size=THUMBNAIL_SIZE, quality=THUMBNAIL_QUALITY, folder=THUMBNAIL_FOLDER):
+    """
+    คืน (bytes, subtype) ของรูปสำหรับแนบอีเมล: ย่อ/บีบอัดเป็น JPEG แล้วเก็บใน folder (ครั้งต่อไปอ่านไฟล์เล็กเลย)
+    ชื่อไฟล์ผูกกับเวลาแก้ไขของรูปต้นฉบับ -> รูปถูกแคปใหม่ก็ได้ Thumbnail ใหม่เอง / คืน None ถ้าอ่านรูปไม่ได้
+    """
+    try: stat = os.stat(path)
+    except OSError: return None
+    return _thumbnail_bytes(path, stat.st_mtime_ns, size, quality, folder)
+
+@functools.lru_cache(maxsize=1024)
+def _thumbnail_bytes(path, mtime_ns, size, quality, folder):
+    if Image is None:
+        with open(path, 'rb') as f: return f.read(), None
+    stem = os.path.splitext(os.path.basename(path))[0]
+    digest = hashlib.sha1(f"{os.path.abspath(path)}|{mtime_ns}|{size}|{quality}".encode()).hexdigest()[:10]
+    thumb_path = os.path.join(folder, f"{stem}_{digest}.jpg")
+    if os.path.exists(thumb_path):
+        with open(thumb_path, 'rb') as f: return f.read(), 'jpeg'
+    try:
+        with Image.open(path) as img:
+            img = ImageOps.exif_transpose(img)
+            if img.mode in ("RGBA", "LA", "P"):
+                # พื้นโปร่งใส -> พื้นขาว (JPEG ไม่มี Alpha)
+                img = img.convert("RGBA")
+                background = Image.new("RGB", img.size, (255, 255, 255))
+                background.paste(img, mask=img.getchannel("A"))
+                img = background
+            else:
+                img = img.convert("RGB")
+            img.thumbnail((size, size), Image.LANCZOS)
+            os.makedirs(folder, exist_ok=True)
+            tmp_path = f"{thumb_path}.tmp"
+            img.save(tmp_path, "JPEG", quality=quality, optimize=True)
+        os.replace(tmp_path, thumb_path)
+        with open(thumb_path, 'rb') as f: return f.read(), 'jpeg'
+    except Exception:
+        # ไฟล์เสีย/ไม่ใช่รูปที่ Pillow รู้จัก -> แนบต้นฉบับ
+        try:
+            with open(path, 'rb') as f: return f.read(), None
+        except OSError: return None
+
+def split_by_budget(items, sizes, budget, overhead=0):
+    """ แบ่ง items (ตามลำดับเดิม) เป็นก้อนที่ overhead + ผลรวม sizes ไม่เกิน budget (ชิ้นเดียวที่ใหญ่เกินก็อยู่ก้อนตัวเอง) """
+    chunk, used = [], overhead
+    for item, size in zip(items, sizes):
+        if chunk and used + size > budget:
+            yield chunk
+            chunk, used = [], overhead
+        chunk.append(item)
+        used += size
+    if chunk: yield chunk
+
+class MailDispatcher:
+    """
+    ส่งอีเมลจาก Thread เบื้องหลัง ผ่าน SMTP Connection เดียวที่ Login ค้างไว้ (หลุด/เงียบนาน -> ต่อใหม่เอง)
+    - submit() แค่โยนเข้าคิวแล้วคืนทันที Loop ดูดข้อมูลไม่ต้องรอ TLS/Login/ส่ง
+    - ส่งฉบับเดียวถึงผู้รับทุกคน (To หลายคน) แทนการส่งซ้ำทีละคน
+    - เก็บเวลาตั้งแต่เจอ HOT จนถึงตอนส่งเข้า SMTP (handoff)
+    """
+    def __init__(self, sender, password, host=SMTP_HOST, port=SMTP_PORT, max_attempts=SMTP_MAX_ATTEMPTS, idle_seconds=SMTP_IDLE_SECONDS):
+        self.sender = sender
+        self.password = password
+        self.host = host
+        self.port = port
+        self.max_attempts = max(1, max_attempts)
+        self.idle_seconds = idle_seconds
+        self.queue = queue.Queue()
+        self.server = None
+        self.last_used = 0.0
+        self.thread = None
+        self.sent = 0
+        self.failed = 0
+        self.connects = 0
+        self.handoff_latencies = [] # วินาที: เจอ HOT -> เริ่มส่งเข้า SMTP
+        self.lock = threading.Lock()
+
+    def submit(self, msg, recipients, label="", detected_at=None):
+        """ detected_at = time.perf_counter() ตอนเจอผู้สมัคร (ถ้าต้องการวัด Latency) """
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._worker, name="mail-dispatcher", daemon=True)
+                self.thread.start()
+        self.queue.put((msg, list(recipients), label, detected_at))
+
+    def _connect(self):
+        self._disconnect()
+        server = smtplib.SMTP(self.host, self.port, timeout=60)
+        server.starttls()
+        server.login(self.sender, self.password)
+        self.server = server
+        self.connects += 1
+
+    def _disconnect(self):
+        if self.server is not None:
+            try: self.server.quit()
+            except Exception: pass
+        self.server = None
+
+    def _ensure_connection(self):
+        if self.server is not None and time.monotonic() - self.last_used > self.idle_seconds:
+            # เงียบนาน -> Server อาจตัดไปแล้ว เช็คด้วย NOOP ก่อนใช้
+            try:
+                if self.server.noop()[0] != 250: self._disconnect()
+            except Exception: self._disconnect()
+        if self.server is None: self._connect()
+
+    def _send(self, msg, recipients, label, detected_at):
+        if 'To' in msg: del msg['To']
+        msg['To'] = ", ".join(recipients)
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self._ensure_connection()
+                handed_off = time.perf_counter()
+                self.server.send_message(msg, from_addr=self.sender, to_addrs=recipients)
+                self.last_used = time.monotonic()
+                if detected_at is not None: self.handoff_latencies.append(handed_off - detected_at)
+                self.sent += 1
+                console.print(f"   ✅ ส่งเมล '{label}' -> {', '.join(recipients)}", style="success")
+                return
+            except Exception as e:
+                # SMTPException เป็นลูกของ OSError -> แยกเองว่าเป็น Connection หลุด หรือผู้รับ/เนื้อหาถูกปฏิเสธ (ลองซ้ำก็ไม่ผ่าน)
+                dropped = isinstance(e, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)) or (isinstance(e, OSError) and not isinstance(e, smtplib.SMTPException))
+                if dropped: self._disconnect()
+                if not dropped or attempt == self.max_attempts:
+                    self.failed += 1
+                    console.print(f"❌ ส่งอีเมลล้มเหลว ({label}): {e}", style="error")
+                    return
+                # Connection หลุด -> ต่อใหม่แล้วลองอีกครั้ง
+                time.sleep(min(30.0, 2.0 * (2 ** (attempt - 1))) + random.uniform(0, 1))
+
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None: break
+                self._send(*item)
+            finally:
+                self.queue.task_done()
+        self._disconnect()
+
+    def close(self, timeout=120):
+        """ ส่งที่ค้างในคิวให้หมดแล้วปิด Connection """
+        with self.lock: thread = self.thread
+        if thread is None or not thread.is_alive(): return
+        self.queue.put(None)
+        thread.join(timeout)
+        if thread.is_alive(): console.print(f"⚠️ ยังมีอีเมลค้างส่ง {self.queue.qsize()} ฉบับ (หมดเวลารอ)", style="yellow")
+
+    def summary(self):
+        text = f"📧 Mail Dispatcher: ส่ง {self.sent} | ล้มเหลว {self.failed} | ต่อ SMTP {self.connects} ครั้ง"
+        if self.handoff_latencies:
+            lat = sorted(self.handoff_latencies)
+            text += f" | เจอ HOT -> ส่งเข้า SMTP: p50 {statistics.median(lat):.2f}s / max {lat[-1]:.2f}s ({len(lat)} ฉบับ)"
+        return text
+
+# --- EMAIL RENDERING (Template เตรียมไว้ครั้งเดียว + แถวผู้สมัครที่ Render แล้วใช้ซ้ำ) ---
+EMAIL_HEAD_HTML = """
+        <html>
+        <head>
+        <style>
+            table { border-collapse: collapse; width: 100%; font-size: 14px; font-family: 'Sarabun', sans-serif; }
+            th, td { border: 1px solid #ddd; padding: 8px; text-align: left; vertical-align: top; }
+            th { background-color: #f2f2f2; }
+            tr:nth-child(even) { background-color: #f9f9f9; }
+            .btn {
+                background-color: #28a745; color: #ffffff !important; padding: 5px 10px;
+                text-align: center; text-decoration: none; display: inline-block;
+                border-radius: 4px; font-size: 12px; font-weight: bold;
+            }
+            .highlight { color: #d9534f; font-weight: bold; } /* สีแดงสำหรับบริษัทเป้าหมาย */
+            .footer-text { 
+                margin-top: 15px; 
+                color: #555; 
+                font-size: 14px; 
+                font-weight: bold; 
+                border-top: 1px solid #eee; 
+                padding-top: 10px; 
+            }
+        </style>
+        </head>
+        <body>
+            """
+EMAIL_TABLE_HEADER_TEMPLATE = """<h3>{subject}</h3>
+            <table>
+                <tr>
+                    <th style="width: 8%;">รูปภาพ</th>
+                    <th style="width: 22%;">{col_header}</th> 
+                    <th style="width: 10%;">ระดับการศึกษา</th>
+                    <th style="width: 10%;">รหัสใบสมัคร</th>
+                    <th style="width: 15%;">ชื่อ-นามสกุล</th>
+                    <th style="width: 5%;">อายุ</th>
+                    <th style="width: 15%;">ตำแหน่งที่สมัคร</th>
+                    <th style="width: 8%;">เงินเดือนต่ำสุด</th>
+                    <th style="width: 8%;">เงินเดือนสูงสุด</th> 
+                    <th style="width: 10%;">อัพเดทล่าสุด</th>
+                    <th style="width: 7%;">ลิงก์</th>
+                </tr>
+        """.format
+EMAIL_ROW_TEMPLATE = """
+                <tr>
+                    <td style="text-align: center;">{img_html}</td>
+                    <td style="font-size: 13px; line-height: 1.6;">{company_html}</td>
+                    <td>{degree}</td> 
+                    <td>{id}</td>
+                    <td>{name}</td>
+                    <td>{age}</td>
+                    <td>{positions}</td>
+                    <td>{salary_min}</td> 
+                    <td>{salary_max}</td>
+                    <td>{last_update}</td>
+                    <td style="text-align: center;">
+                        <a href="{link}" target="_blank" class="btn">เปิดดู</a>
+                    </td>
+                </tr>
+            """.format
+EMAIL_FOOTER_TEMPLATE = "</table><div class='footer-text'>{footer_note}</div></body></html>".format
+EMAIL_NO_IMAGE_HTML = '<span style="color:gray; font-size:12px;">No Image</span>'
+
+class EmailRenderer:
+    """
+    Render อีเมลผู้สมัครจาก Template ที่เตรียมไว้ครั้งเดียว
+    - แถวของผู้สมัครแต่ละคน (HTML + รูป Thumbnail + ขนาดโดยประมาณ) Render ครั้งเดียวแล้วเก็บไว้
+      -> คนเดียวกันใน HOT ตอนเช้าและอีเมลสรุปรายสัปดาห์ใช้แถวเดิม (ข้อมูล/รูปเปลี่ยน = Key ใหม่)
+    - ประกอบทั้งฉบับด้วย join ครั้งเดียว
+    """
+    ROW_FIELDS = ("id", "name", "age", "positions", "last_update", "link", "company")
+
+    def __init__(self, max_rows=20000):
+        self.max_rows = max_rows
+        self.rows = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def company_html(raw_companies):
+        """ ชื่อบริษัทคั่นด้วย <br> / บริษัทเป้าหมาย (Tier 1 / Client / Tier 2) เป็นตัวแดง """
+        if not raw_companies or raw_companies == "-": return "-"
+        formatted_list = []
+        for comp in raw_companies.split(", "):
+            comp_clean = comp.strip()
+            if COMPANY_MATCHER.is_target(comp_clean, threshold=85):
+                formatted_list.append(f"<span class='highlight'>{comp_clean}</span>")
+            else:
+                formatted_list.append(comp_clean)
+        return "<br>".join(formatted_list)
+
+    def row(self, person):
+        """ คืน (HTML แถว, รูปที่แนบ หรือ None, ขนาดหลัง Encode โดยประมาณ) """
+        image_path = person['image_path']
+        try: image_mtime = os.stat(image_path).st_mtime_ns if image_path else None
+        except OSError: image_mtime = None
+        key = tuple(person[f] for f in self.ROW_FIELDS) + (person.get('degree', '-'), person.get('salary_min', '-'), person.get('salary_max', '-'), image_path, image_mtime)
+        with self.lock:
+            cached = self.rows.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+        # จัดการรูปภาพ (CID Embed / Thumbnail ที่ย่อไว้แล้ว)
+        cid_id = f"img_{person['id']}"
+        image = thumbnail_bytes(image_path) if image_mtime is not None else None
+        if image is not None:
+            img_html = f'<img src="cid:{cid_id}" width="70" style="border-radius: 5px;">'
+            image = {'cid': cid_id, 'data': image[0], 'subtype': image[1], 'filename': os.path.basename(image_path) if not image[1] else f"{person['id']}.jpg"}
+        else:
+            img_html = EMAIL_NO_IMAGE_HTML
+        row_html = EMAIL_ROW_TEMPLATE(
+            img_html=img_html, company_html=self.company_html(person['company']), degree=person.get('degree', '-'),
+            id=person['id'], name=person['name'], age=person['age'], positions=person['positions'],
+            salary_min=person.get('salary_min', '-'), salary_max=person.get('salary_max', '-'),
+            last_update=person['last_update'], link=person['link'])
+        # HTML (quoted-printable/base64 ~ x1.4) + รูป (base64 x4/3) + MIME Header ต่อรูป
+        size = int(len(row_html.encode()) * 1.4) + (len(image['data']) * 4 // 3 + 512 if image else 0)
+        cached = (row_html, image, size)
+        with self.lock:
+            if len(self.rows) >= self.max_rows: self.rows.clear()
+            self.rows[key] = cached
+            self.misses += 1
+        return cached
+
+    def overhead(self, subject, col_header, footer_note):
+        """ ขนาดส่วนที่ไม่ใช่แถวผู้สมัคร (Head/หัวตาราง/Footer/MIME) """
+        return int((len(EMAIL_HEAD_HTML.encode()) + len(EMAIL_TABLE_HEADER_TEMPLATE(subject=subject, col_header=col_header).encode()) + len(EMAIL_FOOTER_TEMPLATE(footer_note=footer_note).encode())) * 1.4) + 2048
+
+    def render(self, subject, col_header, rows, footer_note):
+        return "".join(itertools.chain(
+            (EMAIL_HEAD_HTML, EMAIL_TABLE_HEADER_TEMPLATE(subject=subject, col_header=col_header)),
+            (row_html for row_html, _, _ in rows),
+            (EMAIL_FOOTER_TEMPLATE(footer_note=footer_note),)))
+
+EMAIL_RENDERER = EmailRenderer()
+
+# --- EXPORT CLEANING (Records -> List of Lists สำหรับ Google Sheets) ---
+EXPORT_BASE_COLUMNS = [
+    "Link", "Keyword", "รหัสใบสมัคร", "เคยทำบริษัทคู่แข่ง", "รูปภาพ", 
+    "อัพเดทล่าสุด", 
+    "ชื่อ", "นามสกุล", "อายุ", "เพศ", 
+    "เบอร์โทร", "Email", "ที่อยู่", "แขวง", "เขต", "จังหวัดที่อยู่", "รหัสไปรษณีย์",
+    "ตำแหน่งที่ต้องการสมัคร_1","ตำแหน่งที่ต้องการสมัคร_2","ตำแหน่งที่ต้องการสมัคร_3", 
+    "เงินเดือนที่ต้องการ", "เงินเดือนที่ต้องการ_Min", "เงินเดือนที่ต้องการ_Max", 
+    "ระดับการศึกษา", "มหาลัย", "คณะ", "สาขา"
+]
+EXPORT_WORK_KEYS = ["ชื่อบริษัทที่เคยทำงาน", "ตำแหน่งที่เคยเป็น", "เงินเดือนที่เคยได้", "ระดับหน้าที่รับผิดชอบ", "ระยะเวลาที่ทำงาน", "หน้าที่รับผิดชอบ", "รวมอายุงาน"]
+EXPORT_TAIL_COLUMNS = ["ประสบการณ์ทำงานรวมทั้งหมด", "Analyzed_Department", "Analyzed_Score", "Analyzed_Breakdown", "Memory_Group"]
+
+def clean_records_rowwise(df):
+    """ ตัวอ้างอิงแบบเดิม (apply ทีละแถว) -> ใช้เทียบผล/ความเร็วกับ clean_records_vectorized ใน --bench-clean """
+    def clean_salary_split(val):
+        if pd.isna(val) or str(val).strip() == '' or 'ปิดข้อมูล' in str(val): return None, None
+        s = str(val).lower().replace(',', '')
+        def repl(m):
+            try: return str(float(m.group(1)) * 1000)
+            except: return m.group(0)
+        s = re.sub(r'(\d+(\.\d+)?)\s*k', repl, s)
+        nums = re.findall(r'\d+(?:\.\d+)?', s)
+        nums = [float(n) for n in nums]
+        if not nums: return None, None
+        mn, mx = nums[0], nums[0]
+        if len(nums) >= 2: mn, mx = nums[0], nums[1]
+        if mx > 1000 and mn < 1000 and mn > 0:
+            if mx / mn > 100: mn *= 1000
+        return int(mn), int(mx)
+
+    def clean_salary_single(val):
+        mn, mx = clean_salary_split(val)
+        if mn is None: return ""
+        if mn != mx: return int((mn + mx) / 2)
+        return int(mn)
+
+    def clean_location(val):
+        if pd.isna(val) or 'ปิดข้อมูล' in str(val): return '', ''
+        s = str(val).strip()
+        m = re.search(r'(\d{5})$', s)
+        if m:
+            zipc = m.group(1)
+            prov = s.replace(zipc, '').strip()
+            return prov, zipc
+        return s, ''
+
+    def clean_address_split(val):
+        if pd.isna(val) or 'ปิดข้อมูล' in str(val): return None, None
+        val = str(val).replace('จ.', 'จังหวัด').replace('อ.', 'อำเภอ').replace('ต.', 'ตำบล')
+        sub_district = None; district = None
+        m_sub = re.search(r'(แขวง|ตำบล)\s*([ก-๙]+)', val)
+        if m_sub: sub_district = m_sub.group(2)
+        m_dist = re.search(r'(เขต|อำเภอ)\s*([ก-๙]+)', val)
+        if m_dist: district = m_dist.group(2)
+        return district, sub_district
+
+    def clean_phone(val):
+        if pd.isna(val) or 'Click' in str(val): return ''
+        clean_number = re.sub(r'\D', '', str(val))
+        if clean_number: return f"'{clean_number}" 
+        return ''
+    
+    def clean_email(val):
+        if pd.isna(val) or 'Click' in str(val): return ''
+        return str(val).strip()
+
+    def clean_company_name(val):
+        if pd.isna(val): return ""
+        s = str(val).strip()
+        # ลบ space ระหว่างตัวอักษรไทย (เช่น "บ ริ ษั ท")
+        s = re.sub(r'(?<=[\u0E00-\u0E7F])\s+(?=[\u0E00-\u0E7F])', '', s)
+        return s
+
+    if 'เงินเดือนที่ต้องการ' in df.columns:
+        salary_split = df['เงินเดือนที่ต้องการ'].apply(lambda x: pd.Series(clean_salary_split(x)))
+        df['เงินเดือนที่ต้องการ_Min'] = salary_split[0]
+        df['เงินเดือนที่ต้องการ_Max'] = salary_split[1]
+
+    history_salary_cols = [c for c in df.columns if 'เงินเดือนที่เคยได้' in c]
+    for c in history_salary_cols:
+        df[c] = df[c].apply(clean_salary_single)
+
+    if 'จังหวัดที่อยู่' in df.columns:
+        loc_split = df['จังหวัดที่อยู่'].apply(lambda x: pd.Series(clean_location(x)))
+        df['จังหวัดที่อยู่'] = loc_split[0]
+        df['รหัสไปรษณีย์'] = loc_split[1]
+
+    if 'ที่อยู่' in df.columns:
+        addr_split = df['ที่อยู่'].apply(lambda x: pd.Series(clean_address_split(x)))
+        df['เขต'] = addr_split[0]
+        df['แขวง'] = addr_split[1]
+
+    if 'เบอร์โทร' in df.columns: df['เบอร์โทร'] = df['เบอร์โทร'].apply(clean_phone)
+    if 'Email' in df.columns: df['Email'] = df['Email'].apply(clean_email)
+
+    company_cols = [c for c in df.columns if 'ชื่อบริษัทที่เคยทำงาน' in c]
+    for c in company_cols:
+        df[c] = df[c].apply(clean_company_name)
+    return df
+
+SALARY_K_PATTERN = re.compile(r'(\d+(\.\d+)?)\s*k')
+SALARY_PAIR_PATTERN = r'(?s)^\D*(\d+(?:\.\d+)?)(?:.*?(\d+(?:\.\d+)?))?'
+THAI_CHAR_GAP_PATTERN = r'(?<=[\u0E00-\u0E7F])\s+(?=[\u0E00-\u0E7F])'
+
+def _to_float_series(numbers):
+    values = pd.to_numeric(numbers, errors="coerce")
+    # \d ใน Regex จับเลขไทย (๐-๙) ด้วย -> to_numeric อ่านไม่ได้ แต่ float() แบบเดิมอ่านได้
+    unread = values.isna() & numbers.notna()
+    if unread.any(): values[unread] = [float(v) for v in numbers[unread]]
+    return values
+
+def _salary_min_max_series(col):
+    """ clean_salary_split ทั้งคอลัมน์ -> (Min, Max) เป็น float (NaN = อ่านไม่ได้) """
+    text = col.astype(str)
+    skip = col.isna() | (text.str.strip() == '') | text.str.contains('ปิดข้อมูล', regex=False)
+    s = text.str.lower().str.replace(',', '', regex=False)
+    # "20k" -> "20000.0" (ต้องแปลงก่อนดึงตัวเลข เพราะผลแทนที่อาจไปต่อกับตัวเลขข้าง ๆ)
+    s = s.where(~s.str.contains('k', regex=False), s.str.replace(SALARY_K_PATTERN, lambda m: str(float(m.group(1)) * 1000), regex=True))
+    nums = s.str.extract(SALARY_PAIR_PATTERN)
+    mn = _to_float_series(nums[0]).where(~skip)
+    mx = _to_float_series(nums[1]).fillna(mn)
+    mn = mn.where(~((mx > 1000) & (mn < 1000) & (mn > 0) & (mx / mn > 100)), mn * 1000)
+    return np.trunc(mn), np.trunc(mx)
+
+def _salary_single_series(col):
+    mn, mx = _salary_min_max_series(col)
+    return np.trunc(((mn + mx) / 2).where(mn != mx, mn))
+
+def _location_split_series(col):
+    """ clean_location ทั้งคอลัมน์ -> (จังหวัด, รหัสไปรษณีย์) """
+    text = col.astype(str)
+    skip = col.isna() | text.str.contains('ปิดข้อมูล', regex=False)
+    s = text.str.strip()
+    zipc = s.str.extract(r'(\d{5})$', expand=False)
+    prov = s.str.slice(stop=-5).str.strip().where(zipc.notna(), s)
+    # รหัสไปรษณีย์โผล่ซ้ำกลางข้อความ -> แบบเดิมลบทุกจุด (str.replace) ต้องทำให้เหมือนกัน
+    repeated = zipc.notna() & (s.str.count(r'\d{5}') > 1)
+    if repeated.any():
+        prov[repeated] = [v.replace(z, '').strip() for v, z in zip(s[repeated], zipc[repeated])]
+    return prov.where(~skip, ''), zipc.fillna('').where(~skip, '')
+
+def _address_split_series(col):
+    """ clean_address_split ทั้งคอลัมน์ -> (เขต/อำเภอ, แขวง/ตำบล) """
+    text = col.astype(str)
+    skip = col.isna() | text.str.contains('ปิดข้อมูล', regex=False)
+    s = text.str.replace('จ.', 'จังหวัด', regex=False).str.replace('อ.', 'อำเภอ', regex=False).str.replace('ต.', 'ตำบล', regex=False)
+    district = s.str.extract(r'(?:เขต|อำเภอ)\s*([ก-๙]+)', expand=False).where(~skip)
+    sub_district = s.str.extract(r'(?:แขวง|ตำบล)\s*([ก-๙]+)', expand=False).where(~skip)
+    return district, sub_district
+
+def _phone_series(col):
+    text = col.astype(str)
+    digits = text.str.replace(r'\D', '', regex=True)
+    return ("'" + digits).where((digits != '') & ~(col.isna() | text.str.contains('Click', regex=False)), '')
+
+def _email_series(col):
+    text = col.astype(str)
+    return text.str.strip().where(~(col.isna() | text.str.contains('Click', regex=False)), '')
+
+def _company_name_series(col):
+    return col.astype(str).str.strip().str.replace(THAI_CHAR_GAP_PATTERN, '', regex=True).where(col.notna(), "")
+
+def _on_uniques(col, convert):
+    """
+    คอลัมน์ที่สะสมทั้งประวัติมีค่าซ้ำกันเยอะ (เงินเดือน/จังหวัด/บริษัท) -> convert เฉพาะค่าที่ไม่ซ้ำ แล้วกระจายกลับด้วย codes
+    convert รับ Series แล้วคืน Series หรือ tuple ของ Series
+    """
+    codes, uniques = pd.factorize(col, use_na_sentinel=False)
+    converted = convert(pd.Series(uniques, dtype=object))
+    single = not isinstance(converted, tuple)
+    outputs = [pd.Series(part.to_numpy()[codes], index=col.index) for part in ((converted,) if single else converted)]
+    return outputs[0] if single else tuple(outputs)
+
+def _as_apply_result(values, missing):
+    """ เลียนแบบ dtype ที่ apply แบบเดิมให้: ครบทุกแถว -> int64 / มีแถวว่าง -> ค่าแทนที่ missing """
+    values = values.astype("float64")
+    valid = values.notna()
+    if valid.all(): return values.astype("int64")
+    if missing is None: return values # float64 + NaN (แบบ apply ที่คืน pd.Series((None, None)))
+    out = pd.Series(missing, index=values.index, dtype=object)
+    out[valid] = [int(v) for v in values[valid]]
+    return out
+
+def clean_records_vectorized(df):
+    """ ผลเหมือน clean_records_rowwise ทุกช่อง แต่ทำทีละคอลัมน์ (str.extract / str.replace / to_numeric) บนค่าที่ไม่ซ้ำ """
+    if 'เงินเดือนที่ต้องการ' in df.columns:
+        mn, mx = _on_uniques(df['เงินเดือนที่ต้องการ'], _salary_min_max_series)
+        df['เงินเดือนที่ต้องการ_Min'] = _as_apply_result(mn, None)
+        df['เงินเดือนที่ต้องการ_Max'] = _as_apply_result(mx, None)
+
+    for c in [c for c in df.columns if 'เงินเดือนที่เคยได้' in c]:
+        df[c] = _as_apply_result(_on_uniques(df[c], _salary_single_series), "")
+
+    if 'จังหวัดที่อยู่' in df.columns:
+        df['จังหวัดที่อยู่'], df['รหัสไปรษณีย์'] = _on_uniques(df['จังหวัดที่อยู่'], _location_split_series)
+
+    if 'ที่อยู่' in df.columns:
+        df['เขต'], df['แขวง'] = _on_uniques(df['ที่อยู่'], _address_split_series)
+
+    if 'เบอร์โทร' in df.columns: df['เบอร์โทร'] = _on_uniques(df['เบอร์โทร'], _phone_series)
+    if 'Email' in df.columns: df['Email'] = _on_uniques(df['Email'], _email_series)
+
+    for c in [c for c in df.columns if 'ชื่อบริษัทที่เคยทำงาน' in c]:
+        df[c] = _on_uniques(df[c], _company_name_series)
+    return df
+
+def finalize_export_frame(df, today=None):
+    """ คำนวณรวมอายุงานใหม่ + เรียงคอลัมน์ + แทน NaN ด้วย "" -> [[Header], [Row1], ...] """
+    # รวมอายุงาน_N คำนวณใหม่ทั้งคอลัมน์ ณ วันที่ Export (งานที่ยัง "ปัจจุบัน" จะนับถึงวันนี้)
+    today = today or datetime.date.today()
+    for c in [c for c in df.columns if c.startswith('ระยะเวลาที่ทำงาน')]:
+        df['รวมอายุงาน' + c[len('ระยะเวลาที่ทำงาน'):]] = duration_text_series(df[c], today)
+
+    # เงินเดือน Min/Max เป็น Int64 เสมอ -> ทุกก้อนของ iter_clean_record_chunks ได้ 20000 เหมือนกัน (ไม่ใช่ก้อนที่มีช่องว่างกลายเป็น 20000.0)
+    # (Int64 ใส่ "" ไม่ได้ -> แปลงเป็น object ที่ถือ int ของ Python ก่อน fillna)
+    for c in ('เงินเดือนที่ต้องการ_Min', 'เงินเดือนที่ต้องการ_Max'):
+        if c in df.columns: df[c] = pd.to_numeric(df[c], errors="coerce").astype("Int64").astype(object)
+
+    cols_to_keep = [c for c in EXPORT_BASE_COLUMNS if c in df.columns]
+    work_cols = [c for c in df.columns if c not in EXPORT_BASE_COLUMNS and any(k in c for k in EXPORT_WORK_KEYS)]
+    # เรียง work_cols ตามเลขท้าย (เช่น _1, _2, _3)
+    work_cols.sort(key=lambda x: int(re.search(r'_(\d+)$', x).group(1)) if re.search(r'_(\d+)$', x) else 0)
+    final_cols = [c for c in cols_to_keep + work_cols + EXPORT_TAIL_COLUMNS if c in df.columns]
+
+    # 1. แทนค่า NaN ด้วย "" (เพื่อให้ Sheets ไม่ Error) / 2. แปลงเป็น List of Lists
+    df = df[final_cols].fillna("")
+    return [df.columns.values.tolist()] + df.values.tolist()
+
+def clean_scraped_records(records, vectorized=True, today=None):
+    if not records: return None
+    df = pd.DataFrame(records)
+    df = clean_records_vectorized(df) if vectorized else clean_records_rowwise(df)
+    return finalize_export_frame(df, today)
+
+def iter_clean_record_chunks(path, chunk_size=EXPORT_CHUNK_SIZE, today=None):
+    """
+    Export แบบไม่โหลดทั้งไฟล์เข้า RAM:
+    รอบแรกอ่านไฟล์เพื่อรวมชื่อคอลัมน์ (ลำดับเดียวกับ pd.DataFrame(records)) -> รอบสองอ่านทีละ chunk_size แล้ว Clean
+    yield (header, rows) ทีละก้อน (header เหมือนกันทุกก้อน)
+    """
+    columns = {}
+    for record in iter_sink_records(path):
+        for key in record: columns.setdefault(key, None)
+    if not columns: return
+    columns = list(columns)
+    today = today or datetime.date.today()
+    chunk = []
+    def clean(chunk):
+        table = finalize_export_frame(clean_records_vectorized(pd.DataFrame(chunk, columns=columns)), today)
+        return table[0], table[1:]
+    for record in iter_sink_records(path):
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield clean(chunk)
+            chunk = []
+    if chunk: yield clean(chunk)
+
+def _synthetic_export_records(n, seed=7):
+    """ ข้อมูลจำลองรูปแบบเดียวกับ Record ที่ Scrape ได้ (ค่าเว้นว่าง/ปิดข้อมูล/Click ปนตามจริง) สำหรับ --bench-clean """
+    rnd = random.Random(seed)
+    salaries = ["20,000 - 25,000", "20k-25k", "ปิดข้อมูล", "", "18000", "15 - 18,000", "30K", "ตามตกลง", "25,000 บาท", "1.5k - 2k"]
+    provinces = ["กรุงเทพมหานคร 10110", "ปทุมธานี 12120", "นนทบุรี", "ปิดข้อมูล", "", "สมุทรปราการ  10270 "]
+    addresses = ["99/1 แขวงคลองเตย เขตคลองเตย", "12 ต.คลองหนึ่ง อ.คลองหลวง จ.ปทุมธานี", "ปิดข้อมูล", "", "45 หมู่ 3 ตำบลบางพูด อำเภอปากเกร็ด"]
+    companies = ["บ ริ ษั ท ทดสอบ จำกัด", "Cosmo Lab Co., Ltd.", " บริษัท  เอ บี ซี ", "", "L'Oreal (Thailand)"]
+    ranges = ["มกราคม 2560 - ปัจจุบัน", "มีนาคม 2558 - ธันวาคม 2562", "", "กรกฎาคม 2565 - สิงหาคม 2565"]
+    records = []
+    for i in range(n):
+        rec = {
+            "Link": f"https://www3.jobthai.com/resume/{i}", "Keyword": "Cosmetic", "รหัสใบสมัคร": str(100000 + i),
+            "อัพเดทล่าสุด": "3วัน", "ชื่อ": "ทดสอบ", "นามสกุล": str(i),
+            "เบอร์โทร": rnd.choice(["08-1234-5678", "Click to view", "", "081 234 5678"]),
+            "Email": rnd.choice([" a@b.com ", "Click to view", ""]),
+            "ที่อยู่": rnd.choice(addresses), "จังหวัดที่อยู่": rnd.choice(provinces),
+            "เงินเดือนที่ต้องการ": rnd.choice(salaries),
+        }
+        for j in range(1, rnd.randint(1, 3) + 1):
+            rec[f"ชื่อบริษัทที่เคยทำงาน_{j}"] = rnd.choice(companies)
+            rec[f"เงินเดือนที่เคยได้_{j}"] = rnd.choice(salaries)
+            rec[f"ระยะเวลาที่ทำงาน_{j}"] = rnd.choice(ranges)
+            rec[f"รวมอายุงาน_{j}"] = ""
+        records.append(rec)
+    return records
+
+def benchmark_clean(sizes=(1000, 10000, 100000)):
+    """ เทียบเวลา clean แบบเดิม (apply ทีละแถว) กับแบบคอลัมน์ และยืนยันว่าผลเหมือนกันทุกช่อง """
+    table = Table(title="clean_final_data_with_pandas benchmark")
+    for col in ("rows", "row-wise", "vectorized", "speedup", "identical"):
+        table.add_column(col, justify="right")
+    today = datetime.date.today()
+    for n in sizes:
+        records = _synthetic_export_records(n)
+        t0 = time.perf_counter(); reference = clean_scraped_records(records, vectorized=False, today=today)
+        t1 = time.perf_counter(); result = clean_scraped_records(records, vectorized=True, today=today)
+        t2 = time.perf_counter()
+        identical = reference == result and all(type(a) is type(b) for ra, rb in zip(reference, result) for a, b in zip(ra, rb))
+        table.add_row(f"{n:,}", f"{(t1 - t0) * 1000:,.0f} ms", f"{(t2 - t1) * 1000:,.0f} ms", f"{(t1 - t0) / max(t2 - t1, 1e-9):,.1f}x", "✅" if identical else "❌")
+    console.print(table)
+
 class JobThaiRowScraper:
-    def __init__(self):
+    def __init__(self, worker_id=None):
+        # worker_id != None -> เป็น Chrome ลูกใน Worker Pool (มีแค่ Driver ไม่ต่อ Sheet/ประวัติ)
+        self.worker_id = worker_id
+        self.worker_pool = []
+        self.driver = None
+        self.total_profiles_viewed = 0 
+        self.record_sink = None # RecordSink: ไฟล์ JSONL ที่เก็บโปรไฟล์ของรอบนี้ (แทน List ใน RAM)
+        self.checkpoint = None # RunCheckpoint: ความคืบหน้าสำหรับ --resume
+        self.history_writer = None # HistoryWriter: บัฟเฟอร์แถวประวัติก่อนส่งลง Sheet
+        self.sheet_id_index = {} # ชื่อ Tab รายวัน -> set(รหัสใบสมัคร) ที่อยู่ใน Sheet แล้ว
+        self.run_owners = {} # รหัสเรซูเม่ -> [index ของ Keyword ที่เจอ] ของรอบนี้
+        self.shared_results = {} # รหัสเรซูเม่ -> ผลที่ดูดแล้ว (รอ Keyword ถัดไปที่เจอคนเดียวกันใช้ซ้ำ)
+        self.recorded_keys = set() # รหัสเรซูเม่ที่เขียนลง Record Sink แล้ว (1 คน = 1 แถว)
+        self.unsynced_links = [] # ลิงก์ที่ผ่าน persist แล้วแต่ Record ยังไม่ถึงดิสก์ (ยังไม่ลง Checkpoint)
+        self.unsynced_batch = []
+        self.ua = None 
+        self.sheet_client = None
+        self.sh = None  # ตัวแปรเก็บไฟล์ Spreadsheet หลัก
+        self.current_history_data = {} # เก็บประวัติของกลุ่ม Keyword ที่กำลังรัน
+        self.current_history_worksheet = None # เก็บหน้า Tab ประวัติปัจจุบัน
+        self.current_history_tab = None # ชื่อ Tab ประวัติที่ current_history_data ชี้อยู่
+        self.history_mirror = None # HistoryMirror: สำเนาประวัติทุก Tab ใน SQLite
+        self.mailer = None # MailDispatcher: ส่งอีเมลจาก Thread เบื้องหลัง
+        self.waiter = None # PageWaiter: รอจากเหตุการณ์จริงในหน้า + จับเวลาที่รอ
+        self.http_session = None # Session HTTP (โหมด DETAIL_FETCH_MODE = "http")
+        self.session_store = None # SessionStore: Cookie หลัง Login แบบเข้ารหัส
+        self.http_fallbacks = 0
+        self.http_lock = threading.Lock() # ทุก Thread ในโหมด HTTP ใช้ Scraper ตัวนี้ร่วมกัน -> ล็อกตัวนับ + การปิด Session
+        self.driver_lock = threading.Lock()
+        self.resume_cache = None
+        self.listing_dates = {} # รหัสเรซูเม่ -> วันที่ที่เห็นในหน้าผลค้นหา (ใช้เช็ค Cache)
+        self.last_full_scan = False # step3 ล่าสุดไล่ครบทุกหน้าหรือไม่ (บันทึกรอบ Full Scan ตอนขยับ Watermark)
+        self.pacer = PacingController(name=f"worker-{worker_id}" if worker_id is not None else "main")
+
+        if worker_id is not None:
+            self.create_driver()
+            return
+
         console.rule("[bold cyan]🛡️ JobThai Scraper (GitHub Actions Optimized)[/]")
         self.history_file = "notification_history_uni.json" 
         self.history_data = {}
@@ -150,6 +2561,53 @@ class JobThaiRowScraper:
                 with open(self.history_file, 'r', encoding='utf-8') as f: self.history_data = json.load(f)
             except: self.history_data = {}
 
+        if RESUME_CACHE_PATH:
+            try:
+                self.resume_cache = ResumeCache(RESUME_CACHE_PATH)
+                console.print(f"♻️ เปิด Resume Cache: {RESUME_CACHE_PATH}", style="info")
+            except Exception as e: console.print(f"⚠️ เปิด Resume Cache ไม่ได้: {e}", style="yellow")
+
+        self.create_driver()
+
+        try:
+            if G_SHEET_KEY_JSON and G_SHEET_NAME:
+                creds_dict = json.loads(G_SHEET_KEY_JSON)
+                scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+                creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
+                self.sheet_client = gspread.authorize(creds)
+                self.sh = self.sheet_client.open(G_SHEET_NAME)
+                self.history_writer = HistoryWriter(self.sh)
+                console.print(f"✅ เชื่อมต่อ Google Sheet หลักสำเร็จ", style="success")
+        except Exception as e:
+            console.print(f"❌ เชื่อมต่อ Google Sheet ไม่ได้: {e}", style="error")
+        self.open_history_mirror()
+
+    def open_history_mirror(self):
+        """ เปิด HistoryMirror แล้ว Delta Sync ทุก Tab ประวัติของคำค้นรอบนี้ในครั้งเดียว (ต่อ Sheet ไม่ได้ -> ใช้สำเนาเดิม/JSON) """
+        try:
+            self.history_mirror = HistoryMirror(HISTORY_MIRROR_PATH)
+        except Exception as e:
+            console.print(f"⚠️ เปิด History Mirror ไม่ได้ -> อ่านประวัติจาก Sheet ทีละ Tab แบบเดิม: {e}", style="yellow")
+            return
+        tabs = list(dict.fromkeys(self.get_history_tab_name(k) for k in SEARCH_KEYWORDS))
+        synced = False
+        if self.sh is not None:
+            try:
+                start = time.perf_counter()
+                added = self.history_mirror.sync(self.sh, tabs)
+                synced = True
+                console.print(f"🧠 Sync ประวัติ {len(tabs)} Tab: แถวใหม่ {added} ({time.perf_counter() - start:.2f}s)", style="info")
+            except Exception as e:
+                console.print(f"⚠️ Sync ประวัติจาก Sheet ไม่ได้ -> ใช้สำเนาในเครื่อง: {e}", style="yellow")
+        if not synced and self.history_mirror.is_empty() and self.history_data:
+            self.history_mirror.seed_from_json(self.history_data, tabs)
+            console.print(f"📂 ใช้ประวัติจาก {self.history_file} แทน", style="yellow")
+        # แถวที่ค้างใน HistoryWriter (ยังไม่ถึง Sheet) ต้องนับด้วย ไม่งั้นส่งเมลซ้ำ
+        if self.history_writer is not None:
+            for tab, rows in self.history_writer.pending.items():
+                for row in rows: self.history_mirror.record(tab, row[0], row[1], row[2] if len(row) > 2 else "Auto-Log")
+
+    def create_driver(self):
         # --- Driver Configuration ---
         opts = uc.ChromeOptions()
         
@@ -172,31 +2630,13 @@ class JobThaiRowScraper:
         
         self.driver.set_page_load_timeout(60) 
         self.wait = WebDriverWait(self.driver, 20)
-        self.total_profiles_viewed = 0 
-        self.all_scraped_data = []
-        self.ua = None 
-        # 🟢 เพิ่มส่วนนี้ท้าย __init__
-        self.sheet_client = None
-        self.sh = None  # ตัวแปรเก็บไฟล์ Spreadsheet หลัก
-        self.current_history_data = {} # เก็บประวัติของกลุ่ม Keyword ที่กำลังรัน
-        self.current_history_worksheet = None # เก็บหน้า Tab ประวัติปัจจุบัน
-
-        try:
-            if G_SHEET_KEY_JSON and G_SHEET_NAME:
-                creds_dict = json.loads(G_SHEET_KEY_JSON)
-                scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-                creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-                self.sheet_client = gspread.authorize(creds)
-                self.sh = self.sheet_client.open(G_SHEET_NAME)
-                console.print(f"✅ เชื่อมต่อ Google Sheet หลักสำเร็จ", style="success")
-        except Exception as e:
-            console.print(f"❌ เชื่อมต่อ Google Sheet ไม่ได้: {e}", style="error")
+        self.waiter = PageWaiter(self.driver)
+        return self.driver
 
     def get_history_tab_name(self, keyword):
         """ ค้นหากลุ่มของ Keyword เพื่อระบุชื่อ Tab ประวัติ """
-        for group_name, keywords in MEMORY_GROUPS.items():
-            if keyword in keywords:
-                return f"History_{group_name}"
+        group_name = memory_group_of(keyword)
+        if group_name: return f"History_{group_name}"
         # ถ้าไม่มีในกลุ่ม ให้ใช้ชื่อ keyword เอง (ลบอักขระพิเศษ)
         clean_name = re.sub(r'[^\w\sก-๙]', '', keyword).strip()
         return f"History_{clean_name[:20]}"
@@ -204,6 +2644,25 @@ class JobThaiRowScraper:
     def prepare_history_for_keyword(self, keyword):
         """ สลับหน้าประวัติและโหลดข้อมูลตามกลุ่ม Keyword """
         tab_name = self.get_history_tab_name(keyword)
+        if self.history_mirror is not None:
+            if tab_name == self.current_history_tab:
+                console.print(f"📖 ใช้ระบบความจำกลุ่มเดิมต่อ: [bold yellow]{tab_name}[/]", style="info")
+                return True
+            worksheet = self.history_mirror.worksheets.get(tab_name)
+            if worksheet is None and self.sh is not None:
+                try:
+                    worksheet = self.sh.add_worksheet(title=tab_name, rows="1000", cols="3")
+                    worksheet.append_row(["Candidate_ID", "Last_Sent_Date", "Source_Keyword"])
+                    self.history_mirror.worksheets[tab_name] = worksheet
+                    console.print(f"🆕 สร้างกลุ่มความจำใหม่: [bold green]{tab_name}[/]", style="success")
+                except Exception as e:
+                    console.print(f"⚠️ สร้าง Tab ประวัติไม่ได้ -> บันทึกในเครื่องอย่างเดียว: {e}", style="yellow")
+            elif worksheet is not None:
+                console.print(f"📖 ใช้ระบบความจำกลุ่ม: [bold yellow]{tab_name}[/]", style="info")
+            self.current_history_worksheet = worksheet
+            self.current_history_data = self.history_mirror.view(tab_name)
+            self.current_history_tab = tab_name
+            return True
         try:
             try:
                 self.current_history_worksheet = self.sh.worksheet(tab_name)
@@ -215,7 +2674,9 @@ class JobThaiRowScraper:
 
             self.current_history_data = {}
             rows = self.current_history_worksheet.get_all_values()
-            for row in rows[1:]:
+            # แถวที่ยังค้างใน HistoryWriter (ยังไม่ถึง Sheet) ต้องนับด้วย ไม่งั้นส่งเมลซ้ำ
+            pending_rows = self.history_writer.pending_rows(tab_name) if self.history_writer is not None else []
+            for row in rows[1:] + pending_rows:
                 if len(row) >= 2:
                     self.current_history_data[str(row[0]).strip()] = str(row[1]).strip()
             return True
@@ -224,16 +2685,19 @@ class JobThaiRowScraper:
             return False
 
     def update_history_sheet(self, person_id, date_str):
-        """ บันทึกประวัติคนที่มีการส่งเมลแล้วลง Google Sheet """
-        if self.current_history_worksheet:
+        """ บันทึกประวัติคนที่มีการส่งเมลแล้ว: อัปเดตในเครื่องทันที แล้วให้ HistoryWriter ทยอยส่งลง Google Sheet เป็นก้อน """
+        if self.current_history_tab or self.current_history_worksheet:
+            self.current_history_data[str(person_id)] = str(date_str) # Sheet ล่มก็ยังกันส่งซ้ำได้ (HistoryMirror)
+        if self.current_history_worksheet and self.history_writer is not None:
             try:
-                self.current_history_worksheet.append_row([str(person_id), str(date_str), "Auto-Log"])
-                self.current_history_data[str(person_id)] = str(date_str)
+                self.history_writer.append(self.current_history_worksheet, [str(person_id), str(date_str), "Auto-Log"])
             except Exception as e:
                 console.print(f"⚠️ บันทึกประวัติลง Sheet ไม่สำเร็จ: {e}", style="red")
 
     def save_history(self):
+        """ เขียนสำเนาประวัติทุก Tab ลง notification_history_uni.json ({Tab: {ID: วันที่}}) ไว้ใช้ตอน Sheet ล่ม """
         if not EMAIL_USE_HISTORY: return
+        if self.history_mirror is not None: self.history_data = self.history_mirror.export_json()
         try:
             with open(self.history_file, 'w', encoding='utf-8') as f: json.dump(self.history_data, f, ensure_ascii=False, indent=4)
         except: pass
@@ -244,19 +2708,19 @@ class JobThaiRowScraper:
     def random_sleep(self, min_t=4.0, max_t=7.0): time.sleep(random.uniform(min_t, max_t))
 
     def wait_for_page_load(self, timeout=10):
-        try:
-            WebDriverWait(self.driver, timeout).until(
-                lambda d: d.execute_script("return document.readyState") == "complete"
-            )
+        try: self.waiter.page_load(timeout)
         except: pass
 
     def safe_click(self, selector, by=By.XPATH, timeout=10):
-        end_time = time.time() + timeout
-        while time.time() < end_time:
+        end_time = time.perf_counter() + timeout
+        while True:
+            remaining = end_time - time.perf_counter()
+            if remaining <= 0: return False
             try:
-                element = WebDriverWait(self.driver, 2).until(EC.presence_of_element_located((by, selector)))
-                self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
-                time.sleep(0.5)
+                element = self.waiter.presence((by, selector), timeout=remaining)
+                if element is None: return False
+                # เลื่อนแบบ instant -> ไม่ต้องรอ Animation ก่อนกด
+                self.driver.execute_script("arguments[0].scrollIntoView({block: 'center', behavior: 'instant'});", element)
                 element.click()
                 return True
             except ElementClickInterceptedException:
@@ -266,8 +2730,8 @@ class JobThaiRowScraper:
                     return True
                 except: pass
             except: pass
-            time.sleep(1)
-        return False
+            # กดไม่ติด (โดนบัง / Element เก่า) -> รอจน DOM เปลี่ยนแล้วค่อยลองใหม่ ไม่ต้องนอนรอตายตัว
+            self.waiter.mutation(timeout=min(1.0, max(end_time - time.perf_counter(), 0)))
 
     def safe_type(self, selector, text, by=By.CSS_SELECTOR, timeout=10):
         try:
@@ -296,46 +2760,9 @@ class JobThaiRowScraper:
             self.driver.execute_script("window.scrollTo(0, 0);")
         except: pass
 
-    def parse_thai_date_exact(self, date_str):
-        if not date_str: return None
-        thai_months = {'มกราคม': 1, 'กุมภาพันธ์': 2, 'มีนาคม': 3, 'เมษายน': 4, 'พฤษภาคม': 5, 'มิถุนายน': 6, 'กรกฎาคม': 7, 'สิงหาคม': 8, 'กันยายน': 9, 'ตุลาคม': 10, 'พฤศจิกายน': 11, 'ธันวาคม': 12}
-        try:
-            date_str = date_str.strip()
-            parts = date_str.split() 
-            if len(parts) < 3: return None
-            day = int(parts[0])
-            month = thai_months.get(parts[1])
-            year_be = int(parts[2])
-            year_ad = year_be - 543
-            return datetime.date(year_ad, month, day)
-        except: return None
-
-    def calculate_duration_text(self, date_range_str):
-        if not date_range_str: return ""
-        thai_months = {'มกราคม': 1, 'กุมภาพันธ์': 2, 'มีนาคม': 3, 'เมษายน': 4, 'พฤษภาคม': 5, 'มิถุนายน': 6, 'กรกฎาคม': 7, 'สิงหาคม': 8, 'กันยายน': 9, 'ตุลาคม': 10, 'พฤศจิกายน': 11, 'ธันวาคม': 12}
-        try:
-            clean_str = " ".join(date_range_str.split())
-            if '-' not in clean_str: return ""
-            start_str, end_str = clean_str.split('-')
-            def parse_thai_date(d_str):
-                d_str = d_str.strip()
-                if "ปัจจุบัน" in d_str: return datetime.datetime.now()
-                parts = d_str.split()
-                if len(parts) < 2: return None
-                m = thai_months.get(parts[0])
-                if not m: return None
-                y = int(parts[1]) - 543
-                return datetime.datetime(y, m, 1)
-            s_date = parse_thai_date(start_str)
-            e_date = parse_thai_date(end_str)
-            if s_date and e_date:
-                diff = relativedelta(e_date, s_date)
-                txt = []
-                if diff.years > 0: txt.append(f"{diff.years} ปี")
-                if diff.months > 0: txt.append(f"{diff.months} เดือน")
-                return " ".join(txt) if txt else "น้อยกว่า 1 เดือน"
-            return ""
-        except: return ""
+    def parse_thai_date_exact(self, date_str): return parse_thai_date_exact(date_str)
+
+    def calculate_duration_text(self, date_range_str): return calculate_duration_text(date_range_str)
 
     def step1_login(self):
         # 1. เริ่มจากลิงก์สั้น
@@ -357,7 +2784,8 @@ class JobThaiRowScraper:
             self.driver.get(entry_point)
             
             console.print("      ⏳ รอเข้าสู่หน้า Auth...", style="dim")
-            WebDriverWait(self.driver, 20).until(EC.url_contains("auth.jobthai.com"))
+            if not self.waiter.url_matches(lambda u: "auth.jobthai.com" in u, timeout=20):
+                raise TimeoutException("ไม่ถูกพาไปหน้า auth.jobthai.com ภายใน 20 วินาที")
 
             console.print("      🔧 กำลังแยกชิ้นส่วน URL และประกอบใหม่...", style="dim")
             
@@ -409,7 +2837,9 @@ class JobThaiRowScraper:
                 except Exception as e:
                     console.print(f"      ⚠️ กำลังพยายามดึงค่า... ({e})", style="dim")
                 
-                time.sleep(1)
+                # พารามิเตอร์ยังไม่ครบ -> รอ URL เปลี่ยน (Redirect ถัดไป) แทนการนอน 1 วินาทีเต็ม
+                try: self.waiter.url_change(self.driver.current_url, timeout=1)
+                except: time.sleep(1)
             
             if not reconstructed_url:
                 raise Exception("ไม่สามารถดึงค่าพารามิเตอร์เพื่อสร้าง URL ได้")
@@ -418,7 +2848,8 @@ class JobThaiRowScraper:
             console.print(f"      🔄 Reload ด้วย URL ที่ประกอบใหม่...", style="bold cyan")
             self.driver.get(reconstructed_url)
             self.wait_for_page_load()
-            time.sleep(3)
+            # รอ Script ของหน้า Login โหลดเสร็จ (ปุ่มยังไม่ผูก Event = กดแล้วไม่มีผล) แทน sleep 3 วินาที
+            self.waiter.network_idle(timeout=3)
             console.print(f"      ✅ URL พร้อมใช้งาน", style="green")
             # ==============================================================================
             # 3️⃣ STEP 3: กดเลือก "หาคน" (Employer Tab)
@@ -427,11 +2858,7 @@ class JobThaiRowScraper:
             kill_blockers()
             
             # 1. รอให้ปุ่มปรากฏ (เหมือนเดิม)
-            try:
-                WebDriverWait(self.driver, 10).until(
-                    EC.visibility_of_element_located((By.XPATH, "//*[@id='login_tab_employer']"))
-                )
-            except: 
+            if self.waiter.presence((By.XPATH, "//*[@id='login_tab_employer']"), timeout=10, visible=True) is None:
                 console.print("      ⚠️ ไม่เห็นปุ่ม ID login_tab_employer (อาจโดนบัง หรือ Modal ไม่มา)", style="red")
 
             clicked_tab = False
@@ -451,7 +2878,7 @@ class JobThaiRowScraper:
                     ActionChains(self.driver).move_to_element(mouse_btn).click().perform()
                     console.print("      ✅ กดปุ่ม 'หาคน' สำเร็จ (ด้วยเมาส์ ActionChains)", style="bold green")
                     
-                    time.sleep(3) # รอผลลัพธ์
+                    self.waiter.presence((By.ID, "login-form-username"), timeout=3) # รอฟอร์มของแท็บ 'หาคน'
 
                     # 🕵️ DEBUG AFTER CLICK
                     console.print(f"      🕵️ [After Click 1] URL: {self.driver.current_url} | Tabs: {len(self.driver.window_handles)}", style="magenta")
@@ -480,7 +2907,7 @@ class JobThaiRowScraper:
                             self.driver.execute_script("arguments[0].click();", elem)
                             console.print(f"      ✅ กดปุ่ม 'หาคน' สำเร็จ (ด้วย Selector: {val})", style="bold green")
                             
-                            time.sleep(3) # รอผลลัพธ์
+                            self.waiter.presence((By.ID, "login-form-username"), timeout=3) # รอฟอร์มของแท็บ 'หาคน'
 
                             # 🕵️ DEBUG AFTER CLICK
                             console.print(f"      🕵️ [After Click 2] URL: {self.driver.current_url} | Tabs: {len(self.driver.window_handles)}", style="magenta")
@@ -511,11 +2938,7 @@ class JobThaiRowScraper:
 
             # 🛑 FIX: เพิ่มการรอ (Wait) กลับเข้ามา เพื่อไม่ให้ข้ามไป Iframe เร็วเกินไป
             console.print("      ⏳ รอให้ฟอร์ม Login ปรากฏ...", style="dim")
-            try:
-                WebDriverWait(self.driver, 15).until(
-                    EC.presence_of_element_located((By.ID, "login-form-username"))
-                )
-            except:
+            if self.waiter.presence((By.ID, "login-form-username"), timeout=15) is None:
                 # Log เพิ่มตอนหาไม่เจอ
                 console.print("      ⚠️ ยังไม่เจอช่องกรอกในหน้าหลักทันที (อาจอยู่ใน Iframe หรือเน็ตช้า)", style="yellow")
                 console.print(f"      🔗 URL ขณะที่หาไม่เจอ: {self.driver.current_url}", style="dim")
@@ -552,7 +2975,7 @@ class JobThaiRowScraper:
                                 filled_success = True
                                 break
                         except: 
-                            time.sleep(0.5)
+                            self.waiter.presence((By.ID, field_id), timeout=0.5, clickable=True)
                     
                     if filled_success: continue # ไป Field ถัดไป
 
@@ -640,8 +3063,8 @@ class JobThaiRowScraper:
                     elif method == "Enter Key":
                         self.driver.find_element(By.ID, "login-form-password").send_keys(Keys.ENTER)
                     
-                    time.sleep(2)
-                    if "auth" not in self.driver.current_url and "login" not in self.driver.current_url:
+                    # คืนทันทีที่ URL ออกจากหน้า Login (เดิมรอ 2 วินาทีทุกครั้ง)
+                    if self.waiter.url_matches(lambda u: "auth" not in u and "login" not in u, timeout=2):
                         console.print(f"      🚀 Login Triggered! (Method: {method})", style="bold green")
                         clicked_success = True
                         break
@@ -655,10 +3078,7 @@ class JobThaiRowScraper:
             # ==============================================================================
             console.print("   5️⃣  ตรวจสอบผลลัพธ์...", style="dim")
             
-            try:
-                WebDriverWait(self.driver, 15).until(
-                    lambda d: "auth.jobthai.com" not in d.current_url and "login" not in d.current_url
-                )
+            try: self.waiter.url_matches(lambda u: "auth.jobthai.com" not in u and "login" not in u, timeout=15)
             except: pass
 
             curr_url = self.driver.current_url.lower()
@@ -705,7 +3125,7 @@ class JobThaiRowScraper:
             
             # 1. เข้าหน้าเว็บเปล่าๆ ของ Domain นั้นก่อน (สำคัญมาก เพื่อให้ Domain scope ตรงกัน)
             self.driver.get("https://www.jobthai.com/th/employer")
-            self.random_sleep(2, 3)
+            self.waiter.network_idle(timeout=3)
             
             # 2. ลบ Cookie เดิมที่ติดมากับ Session ใหม่ทิ้งให้หมด
             self.driver.delete_all_cookies()
@@ -737,7 +3157,7 @@ class JobThaiRowScraper:
             # 4. Refresh เพื่อให้ Cookie ทำงาน
             self.driver.refresh()
             self.wait_for_page_load()
-            self.random_sleep(3, 5)
+            self.waiter.network_idle(timeout=5)
 
             # 5. เช็คว่าเข้าได้จริงไหม
             if "login" not in self.driver.current_url and "dashboard" in self.driver.current_url:
@@ -746,7 +3166,7 @@ class JobThaiRowScraper:
             else:
                 # ลองไปหน้า Resume โดยตรงอีกทีเพื่อความชัวร์
                 self.driver.get("https://www3.jobthai.com/findresume/findresume.php?l=th")
-                self.random_sleep(2, 3)
+                self.waiter.network_idle(timeout=3)
                 if "login" not in self.driver.current_url:
                      console.print("🎉 Bypass Login สำเร็จ! (Check Step 2)", style="success")
                      return True
@@ -756,6 +3176,164 @@ class JobThaiRowScraper:
         
         return False
 
+    def get_session_cookies(self):
+        """ ดึง Cookie ของ jobthai ทุกโดเมน (www / www3 / auth) จาก Chrome ที่ Login แล้ว """
+        try:
+            cookies = self.driver.execute_cdp_cmd("Network.getAllCookies", {}).get("cookies", [])
+        except Exception:
+            cookies = self.driver.get_cookies()
+        return [c for c in cookies if 'jobthai' in str(c.get('domain', ''))]
+
+    @staticmethod
+    def cdp_cookie_params(cookies):
+        """ Cookie จาก Selenium/CDP -> รูปแบบของ Network.setCookies (expiry -> expires) """
+        params = []
+        for c in cookies:
+            param = {k: c[k] for k in CDP_COOKIE_FIELDS if k in c}
+            if 'expires' not in param and 'expiry' in c: param['expires'] = c['expiry']
+            params.append(param)
+        return params
+
+    def adopt_session_cookies(self, cookies):
+        """ ยัด Cookie ที่ Login แล้วเข้า Chrome ตัวนี้ แล้วเช็คว่าเข้าหน้าค้นหาได้จริง """
+        if not cookies: return False
+        try:
+            self.driver.execute_cdp_cmd("Network.setCookies", {"cookies": self.cdp_cookie_params(cookies)})
+            self.driver.get(FIND_RESUME_URL)
+            self.wait_for_page_load()
+            return "login" not in self.driver.current_url
+        except Exception as e:
+            console.print(f"   ⚠️ ยัด Session ให้ Worker ไม่สำเร็จ: {e}", style="yellow")
+            return False
+
+    def refresh_session(self, cookies):
+        """ Cookie ของหน้าค้นหาหมดอายุ แต่ Cookie ของ auth.jobthai.com อาจยังใช้ได้ -> เข้าหน้า Login แล้วดูว่าเด้งกลับมาแบบ Login แล้วไหม """
+        try:
+            self.driver.execute_cdp_cmd("Network.setCookies", {"cookies": self.cdp_cookie_params(cookies)})
+            self.driver.get("https://www.jobthai.com/login?page=resumes&l=th")
+            if not self.waiter.url_matches(lambda u: "auth.jobthai.com" not in u and "login" not in u, timeout=15): return False
+            self.driver.get(FIND_RESUME_URL)
+            self.wait_for_page_load()
+            return "login" not in self.driver.current_url and "auth.jobthai.com" not in self.driver.current_url
+        except Exception as e:
+            console.print(f"   ⚠️ ต่ออายุ Session ไม่สำเร็จ: {e}", style="yellow")
+            return False
+
+    def ensure_login(self):
+        """
+        เริ่มรอบด้วย Session ที่เก็บไว้ (ไฟล์เข้ารหัส) ก่อนจะยอมทำ step1_login เต็มรูปแบบ
+        Probe ด้วย Request เดียว: valid -> ใช้ต่อ / expired -> ให้ Auth Server ต่ออายุ / ไม่ได้ทั้งคู่ -> Login ใหม่
+        """
+        started = time.perf_counter()
+        self.session_store = SessionStore()
+        data = self.session_store.load()
+        mode = "login"
+        if data is not None:
+            verdict = probe_session(data["cookies"], data.get("user_agent", ""))
+            console.print(f"🔑 พบ Session เดิม ({data.get('saved_at', '-')}) -> Probe: {verdict}", style="info")
+            # unknown = เช็คผ่าน Request ไม่ได้ -> ให้ Chrome ลองเปิดหน้าค้นหาดูเอง
+            if verdict in ("valid", "unknown") and self.adopt_session_cookies(data["cookies"]):
+                mode = "reuse"
+            elif self.refresh_session(data["cookies"]):
+                mode = "refresh"
+        elif not self.session_store.enabled:
+            console.print("ℹ️ ไม่ได้เปิดที่เก็บ Session (ไม่มี cryptography หรือ SESSION_STORE_KEY) -> Login เต็มรูปแบบ", style="dim")
+        if mode == "login":
+            if data is not None: self.session_store.clear()
+            if not self.step1_login(): return False
+        self.save_session()
+        label = {"reuse": "ใช้ Session เดิม", "refresh": "ต่ออายุ Session", "login": "Login ใหม่"}[mode]
+        console.print(f"🔑 Session พร้อม: {label} ({time.perf_counter() - started:.1f}s)", style="success")
+        return True
+
+    def save_session(self):
+        """ เก็บ Cookie ปัจจุบันของ Chrome ลงไฟล์เข้ารหัส (Cookie ถูกหมุนระหว่างรอบก็เก็บของใหม่) """
+        if self.session_store is None or not self.session_store.enabled: return
+        try:
+            user_agent = self.driver.execute_script("return navigator.userAgent")
+            self.session_store.save(self.cdp_cookie_params(self.get_session_cookies()), user_agent)
+        except Exception as e:
+            console.print(f"⚠️ บันทึก Session ไม่สำเร็จ: {e}", style="yellow")
+
+    def ensure_worker_pool(self, size=None):
+        """ เปิด Chrome ลูกให้ครบ N ตัว (นับตัวหลักด้วย) โดยใช้ Session เดียวกับตัวหลัก """
+        size = size or SCRAPE_WORKERS
+        if size <= 1: return [self]
+        # โหมด HTTP ไม่ต้องเปิด Chrome เพิ่ม -> ทุก Thread ใช้ Session (Connection Pool) เดียวกัน
+        if self.http_session is not None: return [self] * size
+        if len(self.worker_pool) + 1 >= size: return [self] + self.worker_pool
+
+        console.rule(f"[bold cyan]👷 เปิด Worker Pool ({size} Chrome)[/]")
+        cookies = self.get_session_cookies()
+        # เปิดทีละตัวใน Thread หลัก (uc.Chrome แพตช์ไฟล์ Driver ตอนเปิด ถ้าเปิดพร้อมกันจะชนกัน)
+        for worker_id in range(len(self.worker_pool) + 1, size):
+            try:
+                worker = JobThaiRowScraper(worker_id=worker_id)
+            except Exception as e:
+                console.print(f"   ❌ เปิด Worker #{worker_id} ไม่ได้: {e}", style="error")
+                break
+            if worker.adopt_session_cookies(cookies) or worker.step1_login():
+                worker.resume_cache = self.resume_cache
+                worker.listing_dates = self.listing_dates
+                self.worker_pool.append(worker)
+                console.print(f"   ✅ Worker #{worker_id} พร้อมใช้งาน", style="success")
+            else:
+                console.print(f"   ❌ Worker #{worker_id} Login ไม่ผ่าน -> ปิดทิ้ง", style="error")
+                try: worker.driver.quit()
+                except: pass
+        console.print(f"👷 Worker Pool พร้อม: {len(self.worker_pool) + 1} Chrome", style="info")
+        return [self] + self.worker_pool
+
+    def close_worker_pool(self):
+        for worker in self.worker_pool:
+            try: worker.driver.quit()
+            except: pass
+        self.worker_pool = []
+
+    def iter_detail_results(self, links, keyword, progress, defer=False):
+        """
+        ดูดรายละเอียดทุกลิงก์แล้วคืนผลทีละรายการ (index, link, result) ตามลำดับลิงก์เสมอ
+        result = (data, days_diff, person_data) หรือ Exception ถ้าลิงก์นั้นพัง
+        defer=True -> result อาจเป็นฟังก์ชันที่เรียกแล้วได้ (data, days_diff, person_data) (ให้ขั้น enrich ของ Pipeline ทำต่อ)
+        """
+        workers = self.ensure_worker_pool()
+        if len(workers) <= 1:
+            for i, link in enumerate(links):
+                try: result = self.scrape_detail_from_json(link, keyword, progress_console=progress.console, defer=defer)
+                except Exception as e: result = e
+                self.total_profiles_viewed += 1
+                yield i, link, result
+            return
+
+        link_queue = queue.Queue()
+        for item in enumerate(links): link_queue.put(item)
+        result_queue = queue.Queue()
+
+        def worker_loop(worker):
+            # แต่ละ Worker มี PacingController ของตัวเอง (ปรับจังหวะแยกกันตามที่เว็บตอบ)
+            while True:
+                try: i, link = link_queue.get_nowait()
+                except queue.Empty: return
+                try: result = worker.scrape_detail_from_json(link, keyword, progress_console=progress.console, defer=defer)
+                except Exception as e: result = e
+                result_queue.put((i, link, result))
+
+        threads = [threading.Thread(target=worker_loop, args=(w,), daemon=True) for w in workers]
+        for t in threads: t.start()
+
+        # เรียงผลกลับตามลำดับลิงก์ (Worker เสร็จไม่พร้อมกัน)
+        pending = {}
+        next_index = 0
+        while next_index < len(links):
+            i, link, result = result_queue.get()
+            pending[i] = (link, result)
+            while next_index in pending:
+                link, result = pending.pop(next_index)
+                self.total_profiles_viewed += 1
+                yield next_index, link, result
+                next_index += 1
+        for t in threads: t.join()
+
     def step2_search(self, keyword):
         # URL หน้าค้นหา Resume (ระบบเดิม www3)
         search_url = "https://www3.jobthai.com/findresume/findresume.php?l=th"
@@ -768,7 +3346,7 @@ class JobThaiRowScraper:
                 console.print(f"   🔗 ไม่อยู่หน้าค้นหา (อยู่ที่: {current_url}) -> กำลัง Force Redirect...", style="yellow")
                 self.driver.get(search_url)
                 self.wait_for_page_load()
-                self.random_sleep(3, 5)
+                self.waiter.network_idle(timeout=5)
 
             # 2. เช็คว่าโดนดีดกลับหน้า Login หรือไม่?
             if "login" in self.driver.current_url:
@@ -784,38 +3362,38 @@ class JobThaiRowScraper:
                 reset_btn = self.driver.find_element(By.XPATH, '//*[@id="company-search-resume"]')
                 if reset_btn.is_displayed():
                     reset_btn.click()
-                    time.sleep(2)
+                    self.waiter.network_idle(timeout=2)
             except: pass
 
             # 5. หาช่องพิมพ์ (รอสูงสุด 20 วินาที)
             console.print("   ✍️ กำลังหาช่องพิมพ์...", style="dim")
-            kw_element = WebDriverWait(self.driver, 20).until(
-                EC.visibility_of_element_located((By.ID, "KeyWord"))
-            )
+            kw_element = self.waiter.presence((By.ID, "KeyWord"), timeout=20, visible=True)
+            if kw_element is None: raise TimeoutException("ไม่เจอช่องพิมพ์ KeyWord ภายใน 20 วินาที")
             
             # 6. พิมพ์คำค้นหา
             kw_element.click()
             kw_element.clear()
             # ใช้ JS พิมพ์เพื่อความชัวร์
             self.driver.execute_script("arguments[0].value = arguments[1];", kw_element, keyword)
-            time.sleep(0.5)
             self.driver.execute_script("arguments[0].dispatchEvent(new Event('input'));", kw_element)
             
             console.print(f"   ✅ พิมพ์ '{keyword}' เรียบร้อย", style="info")
-            time.sleep(1)
             
-            # 7. กดปุ่มค้นหา
+            # 7. กดปุ่มค้นหา (จำหน้าเดิมไว้ก่อน -> ผลของ Keyword ก่อนหน้าไม่ถูกนับเป็นผลใหม่)
+            before = self.waiter.snapshot()
             search_btn = self.driver.find_element(By.ID, "buttonsearch")
             self.driver.execute_script("arguments[0].click();", search_btn)
             console.print("   🔍 กดปุ่มค้นหาแล้ว รอผลลัพธ์...", style="dim")
             
-            # 8. รอผลลัพธ์
-            WebDriverWait(self.driver, 20).until(
-                lambda d: "ResumeDetail" in d.page_source or "ไม่พบข้อมูล" in d.page_source or "No data found" in d.page_source
-            )
+            # 8. รอผลลัพธ์: MutationObserver ในหน้าแจ้งทันทีที่มีลิงก์ผลค้นหา / ข้อความไม่พบข้อมูล (ไม่ต้องดึง page_source ทั้งหน้าวนเช็ค)
+            # Keyword ที่ได้ผลชุดเดิม / ไม่พบข้อมูลซ้ำกับคำก่อนหน้า -> หน้าไม่เปลี่ยน แต่พอ Network นิ่งก็รับผลที่เห็นอยู่
+            found = self.waiter.mutation(RESULT_LINK_SELECTOR, texts=("ไม่พบข้อมูล", "No data found"), since=before,
+                                         timeout=20, settle_ms=WAIT_NETWORK_IDLE_MS)
+            if found is None: raise TimeoutException("ไม่เห็นผลการค้นหาภายใน 20 วินาที")
+            self.wait_for_page_load()
 
             # 9. เช็คผลลัพธ์
-            if "ไม่พบข้อมูล" in self.driver.page_source or "No data found" in self.driver.page_source:
+            if found.startswith("text:"):
                 console.print(f"   ⚠️ ไม่พบข้อมูล (0 Results) สำหรับ: {keyword}", style="warning")
                 return True
 
@@ -843,456 +3421,316 @@ class JobThaiRowScraper:
             
             return False
 
-    def step3_collect_all_links(self):
-        collected_links = []
+    def listing_marker(self, url):
+        return self.listing_dates.get(resume_key_from_url(url))
+
+    def link_markers(self, links):
+        """ ลิงก์ -> {รหัสเรซูเม่: วันที่ในหน้าผลค้นหา} (เฉพาะที่รู้วันที่) """
+        return {key: self.listing_dates[key] for key in map(resume_key_from_url, links) if key in self.listing_dates}
+
+    def goto_results_page(self, target, current=1):
+        """ ไปหน้าผลค้นหาที่ target (กระโดดตามเลขหน้าที่เห็นในแถบ ไม่ต้องกด "ถัดไป" ทีละหน้า) """
+        while current < target:
+            before = self.waiter.snapshot()
+            try: landed = self.driver.execute_script(RESULTS_GOTO_PAGE_JS, target, current, RESULTS_PAGER_XPATH, RESULTS_NEXT_XPATH)
+            except: landed = 0
+            if not landed: break
+            current = landed
+            # รอจนหน้าเปลี่ยนจริง (หน้าใหม่ / ชุดลิงก์เปลี่ยน) แทน sleep 3 วินาทีทุกหน้า
+            self.waiter.mutation(RESULT_LINK_SELECTOR, since=before, timeout=15, settle_ms=WAIT_NETWORK_IDLE_MS)
+            self.wait_for_page_load()
+        return current
+
+    def step3_collect_all_links(self, keyword=None, start_page=1, known_links=(), on_page=None):
+        """
+        start_page / known_links = ต่อจากรอบที่ถูกตัด (กระโดดไปหน้านั้นเลย + ลิงก์ที่เก็บไว้แล้ว)
+        on_page(เลขหน้า, ลิงก์ทั้งหมดที่เก็บได้) ถูกเรียกทุกหน้าที่ได้ลิงก์ใหม่ -> บันทึกลง Checkpoint
+        """
+        collected = {} # รหัสเรซูเม่ -> ลิงก์แรกที่เจอ (dict เรียงตามลำดับที่เจอ)
+        for link in known_links: collected.setdefault(resume_key_from_url(link), link)
         page_num = 1
         console.rule("[bold yellow]3️⃣  โหมดเก็บลิงก์[/]")
+
+        if start_page > 1:
+            page_num = self.goto_results_page(start_page)
+            console.print(f"   ⏩ กระโดดไปหน้า {page_num} (ต้องการ {start_page})", style="info")
+
+        use_watermark = INCREMENTAL_PAGING and keyword and self.resume_cache is not None
+        full_scan = not use_watermark or self.resume_cache.needs_full_scan(keyword)
+        stopped_early = False
+        if use_watermark:
+            console.print(f"   🔖 Watermark: {'ไล่ครบทุกหน้า (ถึงรอบ Full Scan)' if full_scan else 'หยุดเมื่อเจอหน้าที่ไม่มีอะไรใหม่'}", style="dim")
         
         while True:
             console.print(f"   📄 หน้าที่ {page_num}...", style="info")
+            new_count = 0
             try:
-                try: WebDriverWait(self.driver, 5).until(EC.presence_of_element_located((By.XPATH, "//a[contains(@href, 'ResumeDetail')]")))
-                except: pass 
+                self.waiter.presence((By.CSS_SELECTOR, RESULT_LINK_SELECTOR), timeout=5)
                 
-                all_anchors = self.driver.find_elements(By.XPATH, "//a[contains(@href, 'ResumeDetail') or contains(@href, '/resume/')]")
+                page_rows = self.driver.execute_script(RESULT_LINKS_JS, LISTING_DATE_PATTERN) or []
                 
-                count_before = len(collected_links)
-                for a in all_anchors:
-                    try:
-                        href = a.get_attribute("href")
-                        if href and href not in collected_links:
-                            collected_links.append(href)
-                    except: continue
+                count_before = len(collected)
+                page_markers = {}
+                for href, marker in page_rows:
+                    if not href: continue
+                    key = resume_key_from_url(href)
+                    if key not in collected: collected[key] = href
+                    # วันที่ของแถว (ใช้ตัดสินว่า Cache / Watermark ยังใช้ได้ไหม)
+                    if marker: self.listing_dates[key] = marker
+                    page_markers[collected[key]] = marker or self.listing_dates.get(key)
                 
-                new_count = len(collected_links) - count_before
-                console.print(f"      -> เก็บเพิ่ม: {new_count} (รวม {len(collected_links)})", style="success")
+                new_count = len(collected) - count_before
+                console.print(f"      -> เก็บเพิ่ม: {new_count} (รวม {len(collected)})", style="success")
+                if new_count and on_page is not None: on_page(page_num, list(collected.values()))
+
+                if use_watermark and not full_scan and page_markers:
+                    if self.resume_cache.page_is_unchanged(keyword, page_markers):
+                        console.print(f"      🔖 ทุกคนในหน้านี้เคยเห็นแล้วและไม่มีอัพเดท -> หยุดเปิดหน้าถัดไป", style="info")
+                        stopped_early = True
 
             except Exception as e:
                 console.print(f"      ❌ Error เก็บลิงก์: {e}", style="error")
 
-            if len(collected_links) == 0: break
-            if new_count == 0: break
+            if len(collected) == 0: break
+            if new_count == 0 and page_num >= start_page: break # กระโดดไม่ถึงหน้าที่ต้องการ -> เดินต่อจากหน้าที่ลงได้
+            if stopped_early: break
 
-            try:
-                next_btn_xpath = '//*[@id="content-l"]/div[2]/div[1]/table/tbody/tr/td[8]/a'
-                next_btns = self.driver.find_elements(By.XPATH, next_btn_xpath)
-                if next_btns and next_btns[0].is_displayed():
-                    self.driver.execute_script("arguments[0].click();", next_btns[0])
-                    page_num += 1
-                    time.sleep(3)
-                    self.wait_for_page_load()
-                else: break
-            except: break
+            next_page = self.goto_results_page(page_num + 1, current=page_num)
+            if next_page <= page_num: break
+            page_num = next_page
             
+        collected_links = list(collected.values())
+        # Watermark ยังไม่ขยับตรงนี้ -> commit_watermark() หลังทุกลิงก์ของ Keyword ถูกบันทึกแล้ว (รันพังกลางทางจะได้ไม่หยุดก่อนหน้าที่ยังไม่ได้ดูด)
+        self.last_full_scan = bool(use_watermark and full_scan and not stopped_early and start_page <= 1)
         console.print(f"[bold green]📦 สรุปยอดรวม: {len(collected_links)} ลิงก์[/]")
         return collected_links
 
-    def scrape_detail_from_json(self, url, keyword, progress_console=None):
+    def commit_watermark(self, keyword, entry):
+        """ ขยับ Watermark ของ Keyword ตามลิงก์ที่เก็บไว้ (เรียกหลัง pipeline_persist ครบทุกลิงก์ของ Keyword แล้ว) """
+        if not (INCREMENTAL_PAGING and self.resume_cache is not None and entry and entry["links"]): return
+        markers = entry.get("markers") or {}
+        self.resume_cache.update_watermark(keyword, {link: markers.get(resume_key_from_url(link)) for link in entry["links"]},
+                                           full_scan=entry.get("full_scan", False))
+
+    def start_http_session(self):
+        """ คัดลอก Cookie จาก Chrome ที่ Login แล้ว ไปใส่ HTTP Client แบบ Keep-Alive สำหรับโหลดหน้า ResumeDetail """
+        try:
+            session = requests.Session()
+            pool_size = max(4, SCRAPE_WORKERS * 2)
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({
+                "User-Agent": self.driver.execute_script("return navigator.userAgent"),
+                "Accept-Language": "th-TH,th;q=0.9,en;q=0.8",
+                "Referer": FIND_RESUME_URL,
+            })
+            for c in self.get_session_cookies():
+                session.cookies.set(c['name'], c['value'], domain=c.get('domain'), path=c.get('path', '/'))
+            self.http_session = session
+            console.print(f"🌐 เปิดโหมด HTTP Fetch (Cookie {len(session.cookies)} ตัว, Pool {pool_size})", style="success")
+            return True
+        except Exception as e:
+            console.print(f"⚠️ เปิดโหมด HTTP Fetch ไม่ได้ -> ใช้ Chrome ตามเดิม: {e}", style="yellow")
+            self.http_session = None
+            return False
+
+    def fetch_resume_html(self, url, session=None):
+        """ โหลด HTML หน้า ResumeDetail ผ่าน HTTP (คืน None ถ้าโดนดีดไปหน้า Login) / session = ตัวที่ Thread นี้หยิบไว้ (Thread อื่นปิดโหมด HTTP ได้ระหว่างทาง) """
+        session = session or self.http_session
+        self.pacer.before_request()
+        resp = session.get(url, timeout=30)
+        if "auth.jobthai.com" in resp.url or "login" in urlparse(resp.url).path.lower():
+            self.pacer.observe(login_redirect=True)
+            return None
+        if resp.status_code in (403, 429):
+            self.pacer.observe(blocked=True)
+        elif resp.status_code >= 500:
+            self.pacer.observe(ok=False)
+        else:
+            self.pacer.observe(resp.elapsed.total_seconds())
+        resp.raise_for_status()
+        if "charset" not in resp.headers.get("Content-Type", "").lower():
+            resp.encoding = resp.apparent_encoding
+        return resp.text
+
+    def download_resume_photo(self, app_id, raw, session=None):
+        """ โหลดรูปโปรไฟล์ตรงจาก src ของรูป (ใช้แทนการแคปจอในโหมด HTTP) """
+        src = (raw or {}).get('photo_src', '')
+        session = session or self.http_session
+        if not src or session is None: return ""
+        try:
+            photo_url = urljoin(raw.get('__url', FIND_RESUME_URL), src)
+            resp = session.get(photo_url, timeout=30)
+            if resp.status_code != 200 or not resp.headers.get("Content-Type", "").startswith("image/"): return ""
+            ext = os.path.splitext(urlparse(photo_url).path)[1].lower() or ".jpg"
+            app_id_clean = app_id.strip() if app_id else f"unknown_{int(time.time())}"
+            save_path = os.path.join(RESUME_IMAGE_FOLDER, f"{app_id_clean}{ext}")
+            with open(save_path, 'wb') as f: f.write(resp.content)
+            return save_path
+        except: return ""
+
+    def scrape_detail_via_http(self, url, keyword, printer, defer=False, session=None):
+        """ โหลดและ Parse หน้า ResumeDetail โดยไม่ใช้ Chrome (คืน None เพื่อให้ถอยไปใช้ Chrome) """
+        session = session or self.http_session
+        if session is None: return None
+        for attempt in range(3):
+            try:
+                html = self.fetch_resume_html(url, session)
+                break
+            except Exception:
+                if attempt == 2: return None
+                self.pacer.backoff(attempt)
+        if html is None:
+            printer.print("   ⚠️ HTTP โดนดีดไปหน้า Login -> ถอยไปใช้ Chrome", style="yellow")
+            return None
+        save_resume_fixture(url, html)
+
+        root = parse_resume_html(html)
+        head = extract_resume_raw_from_html(root, RESUME_QUALIFY_SCHEMA)
+        if rejected_early(head):
+            head['__partial'] = True
+            with self.http_lock: self.http_fallbacks = 0
+            return self.build_records_from_raw(head, url, keyword, printer, defer=defer)
+
+        raw = extract_resume_raw_from_html(root)
+        if not raw.get('full_text'):
+            # หน้าไม่ใช่ HTML แบบ Server-render ตามที่คาด -> ใช้ Chrome แทน (ถ้าพังติดกันหลายครั้งให้ปิดโหมด HTTP)
+            # Thread อื่นที่กำลังโหลดอยู่ถือ session ของตัวเองไว้ -> ปิดตรงนี้แล้วไม่เจอ None.get กลางทาง
+            with self.http_lock:
+                self.http_fallbacks += 1
+                if self.http_fallbacks >= 5 and self.http_session is not None:
+                    printer.print("   ⚠️ HTTP อ่านหน้าไม่ได้ติดกันหลายครั้ง -> ปิดโหมด HTTP", style="yellow")
+                    self.http_session = None
+            return None
+        with self.http_lock: self.http_fallbacks = 0
+        raw['__url'] = url
+        self.pacer.dwell()
+        return self.build_records_from_raw(raw, url, keyword, printer, defer=defer,
+                                           photo_saver=functools.partial(self.download_resume_photo, session=session))
+
+    def extract_resume_raw(self):
+        """ รัน JS Extractor บนหน้า ResumeDetail ที่เปิดอยู่ คืนค่า dict ตาม RESUME_SCHEMA """
+        raw = self.driver.execute_script(RESUME_EXTRACTOR_JS)
+        if not isinstance(raw, dict): raise ValueError("Extractor ไม่คืนค่าข้อมูล")
+        return raw
+
+    def scrape_detail_from_json(self, url, keyword, progress_console=None, defer=False):
         printer = progress_console if progress_console else console
         self.set_random_user_agent()
-        
+
+        if self.resume_cache is not None:
+            cached_raw = self.resume_cache.lookup(url, self.listing_marker(url))
+            # เก็บไว้แค่ส่วนการศึกษา (ตอนนั้นไม่ผ่าน) แต่เกณฑ์เปลี่ยนจนผ่านแล้ว -> ต้องเปิดหน้าอ่านใหม่ทั้งหน้า
+            if cached_raw is not None and cached_raw.get('__partial') and qualify_education(cached_raw.get('education', []))["qualified"]:
+                cached_raw = None
+            if cached_raw is not None:
+                printer.print("   ♻️ วันที่อัพเดทไม่เปลี่ยน -> ใช้ข้อมูลจาก Cache (ไม่เปิดหน้าเว็บ)", style="dim")
+                return self.build_records_from_raw(cached_raw, url, keyword, printer, photo_saver=self.cached_resume_photo, from_cache=True, defer=defer)
+
+        session = self.http_session # หยิบไว้ครั้งเดียว: Thread อื่นอาจปิดโหมด HTTP ระหว่างโหลด
+        if session is not None:
+            result = self.scrape_detail_via_http(url, keyword, printer, defer=defer, session=session)
+            if result is not None: return result
+            # ถอยมาใช้ Chrome ตัวหลัก (ล็อกไว้เพราะ Thread อื่นในโหมด HTTP ใช้ Driver ตัวเดียวกัน)
+            with self.driver_lock:
+                return self.scrape_detail_via_browser(url, keyword, printer, defer=defer)
+        return self.scrape_detail_via_browser(url, keyword, printer, defer=defer)
+
+    def scrape_detail_via_browser(self, url, keyword, printer, defer=False):
         max_retries = 3
         load_success = False
         for attempt in range(max_retries):
+            self.pacer.before_request()
+            started = time.time()
             try:
                 self.driver.get(url)
                 self.wait_for_page_load()
-                load_success = True
-                break 
-            except: self.random_sleep(5, 10)
+            except:
+                self.pacer.observe(ok=False)
+                self.pacer.backoff(attempt)
+                continue
+            try: current_url, blocked = self.driver.execute_script(PAGE_HEALTH_JS)
+            except: current_url, blocked = self.driver.current_url, False
+            login_redirect = "auth.jobthai.com" in current_url or "login" in urlparse(current_url).path.lower()
+            self.pacer.observe(time.time() - started, login_redirect=login_redirect, blocked=blocked)
+            if blocked or login_redirect:
+                printer.print(f"   🚧 เว็บตอบกลับผิดปกติ ({'Captcha/Block' if blocked else 'เด้งไป Login'}) -> ชะลอความเร็ว", style="bold yellow")
+                continue
+            load_success = True
+            break
 
         if not load_success: return None, 999, None
+
+        if RESUME_FIXTURE_DIR:
+            try: save_resume_fixture(url, self.driver.page_source)
+            except: pass
+
+        # 🟢 คัดด้วยการศึกษาก่อน: คนไม่ผ่าน (ส่วนใหญ่) จบตรงนี้เลย ไม่ Scroll / ไม่หน่วง / ไม่แคปรูป
+        try: head = self.driver.execute_script(RESUME_QUALIFY_JS)
+        except: head = None
+        if rejected_early(head):
+            head['__partial'] = True
+            return self.build_records_from_raw(head, url, keyword, printer, defer=defer)
         
         try: self.human_scroll() 
         except: pass
-        self.random_sleep(2.0, 5.0)
-        
-        data = {'Link': url}
-        try: full_text = self.driver.find_element(By.CSS_SELECTOR, "#mainTableTwoColumn").text
-        except: full_text = ""
-        
-        def get_val(sel, xpath=False):
-            try:
-                elem = self.driver.find_element(By.XPATH, sel) if xpath else self.driver.find_element(By.CSS_SELECTOR, sel)
-                return elem.text.strip()
-            except: return ""
+        self.pacer.dwell()
 
-        edu_tables_xpath = '//*[@id="mainTableTwoColumn"]/tbody/tr/td[1]/table/tbody/tr[7]/td[2]/table'
-        try:
-            edu_tables = self.driver.find_elements(By.XPATH, edu_tables_xpath)
-            total_degrees = len(edu_tables)
-        except: total_degrees = 0
-        matched_uni = ""; matched_faculty = ""; matched_major = ""; is_qualified = False
-        highest_degree_text = "-"; max_degree_score = -1
-        degree_score_map = {"ปริญญาเอก": 3, "ดุษฎีบัณฑิต": 3, "Doctor": 3, "Ph.D": 3, "ปริญญาโท": 2, "มหาบัณฑิต": 2, "Master": 2, "ปริญญาตรี": 1, "บัณฑิต": 1, "Bachelor": 1}
-        
-        def check_fuzzy(scraped_text, target_list, threshold=85): 
-            if not target_list: return True
-            if not scraped_text: return False
-            best_score = 0
-            for target in target_list:
-                score = fuzz.partial_ratio(target.lower(), scraped_text.lower())
-                if score > best_score: best_score = score
-            if best_score >= threshold: return True
-            return False 
-
-        debug_edu_list = []
-
-        for i in range(1, total_degrees + 1):
-            base_xpath = f'//*[@id="mainTableTwoColumn"]/tbody/tr/td[1]/table/tbody/tr[7]/td[2]/table[{i}]'
-            curr_uni = get_val(f'{base_xpath}/tbody/tr[2]/td/div', True)
-            if not curr_uni: curr_uni = get_val(f'{base_xpath}/tbody/tr[1]/td/div', True)
-            
-            curr_degree = get_val(f'{base_xpath}//td[contains(., "ระดับการศึกษา")]/following-sibling::td[1]', True)
-            if not curr_degree: curr_degree = get_val(f'{base_xpath}/tbody/tr[1]/td', True)
-            
-            curr_faculty = get_val(f'{base_xpath}//td[contains(., "คณะ")]/following-sibling::td[1]', True)
-            curr_major = get_val(f'{base_xpath}//td[contains(., "สาขา")]/following-sibling::td[1]', True)
-            
-            debug_edu_list.append(f"[{curr_degree}] {curr_uni} / {curr_faculty} / {curr_major}")
-
-            score = 0
-            for key, val in degree_score_map.items():
-                if key in str(curr_degree): score = val; break
-            if score > max_degree_score: max_degree_score = score; highest_degree_text = curr_degree
-            elif score == max_degree_score and highest_degree_text == "-": highest_degree_text = curr_degree
-
-            if not is_qualified:
-                uni_pass = check_fuzzy(curr_uni, TARGET_UNIVERSITIES)
-                fac_pass = check_fuzzy(curr_faculty, TARGET_FACULTIES)
-                major_pass = check_fuzzy(curr_major, TARGET_MAJORS)
-                if uni_pass and (fac_pass or major_pass):
-                    is_qualified = True; matched_uni = curr_uni; matched_faculty = curr_faculty; matched_major = curr_major
-
-        if not is_qualified:
+        # 🟢 ดึงทั้งโปรไฟล์ใน execute_script ครั้งเดียว (แทน find_element ทีละช่อง)
+        try: raw = self.extract_resume_raw()
+        except Exception as e:
+            printer.print(f"   ⚠️ ดึงข้อมูลโปรไฟล์ไม่สำเร็จ: {e}", style="yellow")
             return None, 999, None
-        
-        data['ระดับการศึกษา'] = highest_degree_text; 
-        data['มหาลัย'] = matched_uni; 
-        data['คณะ'] = matched_faculty; 
-        data['สาขา'] = matched_major
-        data['รหัสใบสมัคร'] = get_val("#ResumeViewDiv [align='left'] span.white")
 
+        photo_saver = self.screenshot_resume_photo
+        if defer:
+            # ขั้น enrich ทำทีหลังตอน Browser ไปหน้าอื่นแล้ว -> แคปรูปตอนนี้เลย (ผ่านเกณฑ์การศึกษาจาก head แล้ว)
+            photo_path = self.screenshot_resume_photo(raw.get('app_id', ''), raw)
+            photo_saver = lambda app_id, raw: photo_path
+        return self.build_records_from_raw(raw, url, keyword, printer, photo_saver=photo_saver, defer=defer)
+
+    def screenshot_resume_photo(self, app_id, raw=None):
+        """ แคปรูปโปรไฟล์จากหน้าที่เปิดอยู่ใน Chrome เก็บลง RESUME_IMAGE_FOLDER """
         try:
             img_element = self.driver.find_element(By.ID, "DefaultPictureResume2Column")
-            app_id_clean = data['รหัสใบสมัคร'].strip() if data['รหัสใบสมัคร'] else f"unknown_{int(time.time())}"
-            img_filename = f"{app_id_clean}.png"
-            save_path = os.path.join(RESUME_IMAGE_FOLDER, img_filename)
+            app_id_clean = app_id.strip() if app_id else f"unknown_{int(time.time())}"
+            save_path = os.path.join(RESUME_IMAGE_FOLDER, f"{app_id_clean}.png")
             img_element.screenshot(save_path)
-            data['รูปภาพ'] = save_path
-        except: data['รูปภาพ'] = ""
-
-        raw_update_date = get_val('//*[@id="ResumeViewDiv"]/table/tbody/tr[2]/td[3]/span[2]', xpath=True)
-        
-        def calculate_last_update(date_str):
-            if not date_str: return "-"
-            try:
-                parts = date_str.split()
-                if len(parts) < 3: return "-"
-                day = int(parts[0])
-                month_str = parts[1]
-                year_be = int(parts[2])
-                year_ad = year_be - 543
-                thai_months = {'มกราคม': 1, 'กุมภาพันธ์': 2, 'มีนาคม': 3, 'เมษายน': 4, 'พฤษภาคม': 5, 'มิถุนายน': 6, 'กรกฎาคม': 7, 'สิงหาคม': 8, 'กันยายน': 9, 'ตุลาคม': 10, 'พฤศจิกายน': 11, 'ธันวาคม': 12}
-                month = thai_months.get(month_str, 1)
-                update_dt = datetime.datetime(year_ad, month, day)
-                diff = relativedelta(datetime.datetime.now(), update_dt)
-                txt = []
-                if diff.years > 0: txt.append(f"{diff.years}ปี")
-                if diff.months > 0: txt.append(f"{diff.months}เดือน")
-                if diff.days > 0: txt.append(f"{diff.days}วัน")
-                if not txt: return "วันนี้"
-                return " ".join(txt)
-            except: return "-"
-            
-        data['อัพเดทล่าสุด'] = calculate_last_update(raw_update_date)
-
-        data['ชื่อ'] = get_val("#mainTableTwoColumn td > span.head1")
-        data['นามสกุล'] = get_val("span.black:nth-of-type(3)")
-        age_match = re.search(r"อายุ\s*[:]?\s*(\d+)", full_text)
-        data['อายุ'] = age_match.group(1) if age_match else ""
-        data['เพศ'] = re.search(r"เพศ\s*[:]?\s*(ชาย|หญิง|Male|Female)", full_text).group(1) if re.search(r"เพศ\s*[:]?\s*(ชาย|หญิง|Male|Female)", full_text) else ""
-        data['เบอร์โทร'] = get_val("#mainTableTwoColumn div:nth-of-type(6) span.black")
-        data['Email'] = get_val("#mainTableTwoColumn a")
-        data['ที่อยู่'] = get_val("#mainTableTwoColumn div:nth-of-type(1) span.head1")
-        data['จังหวัดที่อยู่'] = get_val("#mainTableTwoColumn table [width][align='left'] div span.headNormal")
-        
-        pos1 = get_val('//*[@id="mainTableTwoColumn"]/tbody/tr/td[1]/table/tbody/tr[5]/td[2]/table/tbody/tr[3]/td/span[2]', xpath=True)
-        pos2 = get_val('//*[@id="mainTableTwoColumn"]/tbody/tr/td[1]/table/tbody/tr[5]/td[2]/table/tbody/tr[3]/td/span[4]', xpath=True)
-        pos3 = get_val('//*[@id="mainTableTwoColumn"]/tbody/tr/td[1]/table/tbody/tr[5]/td[2]/table/tbody/tr[3]/td/span[6]', xpath=True)
-        data['ตำแหน่งที่ต้องการสมัคร_1'] = pos1; 
-        data['ตำแหน่งที่ต้องการสมัคร_2'] = pos2; 
-        data['ตำแหน่งที่ต้องการสมัคร_3'] = pos3
-        combined_positions = ", ".join([p for p in [pos1, pos2, pos3] if p])
-        
-        data['เงินเดือนที่ต้องการ'] = get_val("//td[contains(., 'เงินเดือนที่ต้องการ')]/following-sibling::td[1]", True)
-        salary_min_txt = "-"
-        salary_max_txt = "-"
-        raw_salary = data.get('เงินเดือนที่ต้องการ', '')
-        try:
-            if raw_salary and 'ปิดข้อมูล' not in str(raw_salary):
-                s = str(raw_salary).lower().replace(',', '')
-                s = re.sub(r'(\d+(\.\d+)?)\s*k', lambda m: str(float(m.group(1)) * 1000), s)
-                nums = re.findall(r'\d+(?:\.\d+)?', s)
-                nums = [float(n) for n in nums]
-                if nums:
-                    mn, mx = nums[0], nums[0]
-                    if len(nums) >= 2: mn, mx = nums[0], nums[1]
-                    if mx > 1000 and mn < 1000 and mn > 0: mn *= 1000
-                    salary_min_txt = f"{int(mn):,}"
-                    salary_max_txt = f"{int(mx):,}"
-        except: pass
-        printer.print(f"🔥 เจอ: {highest_degree_text} | มหาลัย: {matched_uni} | อัพเดท: {data.get('อัพเดทล่าสุด')}", style="bold green")
-        data['Salary_Min'] = salary_min_txt
-        data['Salary_Max'] = salary_max_txt
-
-        found_tier1_companies = set() 
-        found_tier2_companies = set()
-        found_client_companies = set() 
-        all_work_history = [] 
-        try:
-            if "ประวัติการทำงาน/ฝึกงาน" in full_text:
-                history_text = full_text.split("ประวัติการทำงาน/ฝึกงาน")[1].split("ความสามารถ")[0]
-            else: history_text = ""
-            thai_months_str = "มกราคม|กุมภาพันธ์|มีนาคม|เมษายน|พฤษภาคม|มิถุนายน|กรกฎาคม|สิงหาคม|กันยายน|ตุลาคม|พฤศจิกายน|ธันวาคม"
-            raw_chunks = re.split(f"({thai_months_str})\\s+\\d{{4}}\\s+-\\s+", history_text)
-            jobs = []
-            if len(raw_chunks) > 1:
-                for k in range(1, len(raw_chunks), 2):
-                    if k+1 < len(raw_chunks): jobs.append(raw_chunks[k] + raw_chunks[k+1]) 
-            
-            i = 0
-             
-            while True:
-                check_xpath = f'//*[@id="mainTableTwoColumn"]/tbody/tr/td[2]/table/tbody/tr[2]/td[2]/table[{i+1}]'
-                try:
-                    if len(self.driver.find_elements(By.XPATH, check_xpath)) == 0: break
-                except: break
-
-                suffix = f"_{i+1}"
-                xpath_level = f'//*[@id="mainTableTwoColumn"]/tbody/tr/td[2]/table/tbody/tr[2]/td[2]/table[{i+1}]/tbody/tr[7]/td[2]/span'
-                data[f'ระดับหน้าที่รับผิดชอบ{suffix}'] = get_val(xpath_level, xpath=True)
-                xpath_duration = f'//*[@id="mainTableTwoColumn"]/tbody/tr/td[2]/table/tbody/tr[2]/td[2]/table[{i+1}]/tbody/tr[2]/td/div'
-                duration_str = get_val(xpath_duration, xpath=True)
-                data[f'ระยะเวลาที่ทำงาน{suffix}'] = duration_str
-                data[f'รวมอายุงาน{suffix}'] = self.calculate_duration_text(duration_str)
-
-                xpath_duties_1 = f'//*[@id="mainTableTwoColumn"]/tbody/tr/td[2]/table/tbody/tr[2]/td[2]/table[{i+1}]/tbody/tr[8]/td/div/span'
-                duties_val = get_val(xpath_duties_1, xpath=True)
-                data[f'หน้าที่รับผิดชอบ{suffix}'] = duties_val
-
-                comp_xpath_specific = f'//*[@id="mainTableTwoColumn"]/tbody/tr/td[2]/table/tbody/tr[2]/td[2]/table[{i+1}]/tbody/tr[3]/td/div/span'
-                company = get_val(comp_xpath_specific, xpath=True)
-                if not company:
-                    company_xpath_2 = f'//*[@id="mainTableTwoColumn"]/tbody/tr/td[2]/table/tbody/tr[2]/td[2]/table[{i+1}]/tbody/tr[3]/td'
-                    company = get_val(company_xpath_2, xpath=True)
-                
-                position = ""; salary = ""
-                if i < len(jobs):
-                    block = jobs[i]
-                    if not company:
-                        comp_match = re.search(r"^.*(บริษัท|Ltd|Inc|Group|Organization|หจก|Limited).*$", block, re.MULTILINE | re.IGNORECASE)
-                        company = comp_match.group(0).strip() if comp_match else ""
-                        if not company:
-                             lines = [l.strip() for l in block.split('\n') if l.strip()]
-                             if len(lines) > 1: company = lines[1]
-                    pos_match = re.search(r"ตำแหน่ง\s+(.*)", block)
-                    sal_match = re.search(r"เงินเดือน\s+(.*)", block)
-                    position = pos_match.group(1).strip() if pos_match else ""
-                    salary = sal_match.group(1).strip() if sal_match else ""
-
-                data[f'ชื่อบริษัทที่เคยทำงาน{suffix}'] = company
-                data[f'ตำแหน่งที่เคยเป็น{suffix}'] = position
-                data[f'เงินเดือนที่เคยได้{suffix}'] = salary
-
-                if company:
-                    clean_name = company.strip()
-                    if clean_name and clean_name not in all_work_history:
-                        all_work_history.append(clean_name)
-
-                if company:
-                    for key, keywords in CLIENTS_TARGETS.items():
-                        for kw in keywords:
-                            if fuzz.token_set_ratio(kw.lower(), company.lower()) >= 95:
-                                found_client_companies.add(key)
-                                break
-                    for key, keywords in TIER1_TARGETS.items():
-                        for kw in keywords:
-                            if fuzz.token_set_ratio(kw.lower(), company.lower()) >= 95:
-                                found_tier1_companies.add(key)
-                                break
-                    if TARGET_COMPETITORS_TIER2:
-                        for competitor in TARGET_COMPETITORS_TIER2:
-                            if fuzz.token_set_ratio(competitor.lower(), company.lower()) >= 95: 
-                                found_tier2_companies.add(competitor)
-                                break
-                i += 1
-        except: pass
-        
-        competitor_str = ", ".join(all_work_history)
-        data['เคยทำบริษัทคู่แข่ง'] = competitor_str
-
-        today_date = datetime.date.today()
-        update_date = self.parse_thai_date_exact(raw_update_date)
-        days_diff = 999
-        if update_date: days_diff = (today_date - update_date).days
-
-        app_id = data.get('รหัสใบสมัคร', '').strip()
-        full_name = f"{data.get('ชื่อ', '')} {data.get('นามสกุล', '')}"
-        
-        person_data = {
-            "keyword": keyword, 
-            "company": competitor_str,
-            "degree": highest_degree_text,
-            "salary_min": salary_min_txt,
-            "salary_max": salary_max_txt,
-            "id": app_id,
-            "name": full_name,
-            "age": data.get('อายุ', '-'),
-            "positions": combined_positions, 
-            "last_update": data['อัพเดทล่าสุด'],
-            "link": url,
-            "image_path": data.get('รูปภาพ', '')
-        }
+            return save_path
+        except: return ""
 
-        printer.print(f"   🔥 เจอ: {highest_degree_text} | มหาลัย: {matched_uni} | วันที่: {days_diff} วันก่อน", style="bold green")
+    def cached_resume_photo(self, app_id, raw):
+        path = raw.get('__image_path', '')
+        return path if path and os.path.exists(path) else ""
+
+    def build_records_from_raw(self, raw, url, keyword, printer=None, photo_saver=None, from_cache=False, defer=False):
+        """ แปลงข้อมูลดิบจาก Extractor (Chrome หรือ HTML) เป็น (data, days_diff, person_data) / defer=True -> คืนฟังก์ชันไว้เรียกทีหลัง """
+        if defer: return functools.partial(self.build_records_from_raw, raw, url, keyword, printer, photo_saver=photo_saver, from_cache=from_cache)
+        printer = printer if printer else console
+        data, days_diff, person_data = build_resume_record(raw, url, keyword, photo_saver=photo_saver)
+        if self.resume_cache is not None and not from_cache:
+            if data is not None: raw['__image_path'] = data.get('รูปภาพ', '')
+            self.resume_cache.store(url, self.listing_marker(url), raw, data is not None)
+        if data is None: return data, days_diff, person_data
+        printer.print(f"🔥 เจอ: {data['ระดับการศึกษา']} | มหาลัย: {data['มหาลัย']} | อัพเดท: {data.get('อัพเดทล่าสุด')}", style="bold green")
+        printer.print(f"   🔥 เจอ: {data['ระดับการศึกษา']} | มหาลัย: {data['มหาลัย']} | วันที่: {days_diff} วันก่อน", style="bold green")
         return data, days_diff, person_data
 
     # --- NEW FUNCTION: Clean & Process Data with Pandas ---
     def clean_final_data_with_pandas(self):
         """
-        ฟังก์ชันนี้จะดึง self.all_scraped_data มาทำความสะอาดครั้งใหญ่ด้วย Pandas
-        และคืนค่ากลับไปเป็น List of List (พร้อม Header) เพื่อเตรียมลง Google Sheets
+        อ่านโปรไฟล์ของรอบนี้จากไฟล์ Record Sink มาทำความสะอาดด้วย Pandas ทีละก้อน
+        และ yield (Header, Rows แบบ List of List) เพื่อทยอยลง Google Sheets โดยไม่ต้องถือทั้งหมดไว้ใน RAM
         """
-        if not self.all_scraped_data:
-            return None
+        if self.record_sink is None: return iter(())
+        return iter_clean_record_chunks(self.record_sink.path)
 
-        # แปลง List of Dicts เป็น DataFrame
-        df = pd.DataFrame(self.all_scraped_data)
-        
-        # --- CLEANING FUNCTIONS (Inner Functions) ---
-        def clean_salary_split(val):
-            if pd.isna(val) or str(val).strip() == '' or 'ปิดข้อมูล' in str(val): return None, None
-            s = str(val).lower().replace(',', '')
-            def repl(m):
-                try: return str(float(m.group(1)) * 1000)
-                except: return m.group(0)
-            s = re.sub(r'(\d+(\.\d+)?)\s*k', repl, s)
-            nums = re.findall(r'\d+(?:\.\d+)?', s)
-            nums = [float(n) for n in nums]
-            if not nums: return None, None
-            mn, mx = nums[0], nums[0]
-            if len(nums) >= 2: mn, mx = nums[0], nums[1]
-            if mx > 1000 and mn < 1000 and mn > 0:
-                if mx / mn > 100: mn *= 1000
-            return int(mn), int(mx)
-
-        def clean_salary_single(val):
-            mn, mx = clean_salary_split(val)
-            if mn is None: return ""
-            if mn != mx: return int((mn + mx) / 2)
-            return int(mn)
-
-        def clean_location(val):
-            if pd.isna(val) or 'ปิดข้อมูล' in str(val): return '', ''
-            s = str(val).strip()
-            m = re.search(r'(\d{5})$', s)
-            if m:
-                zipc = m.group(1)
-                prov = s.replace(zipc, '').strip()
-                return prov, zipc
-            return s, ''
-
-        def clean_address_split(val):
-            if pd.isna(val) or 'ปิดข้อมูล' in str(val): return None, None
-            val = str(val).replace('จ.', 'จังหวัด').replace('อ.', 'อำเภอ').replace('ต.', 'ตำบล')
-            sub_district = None; district = None
-            m_sub = re.search(r'(แขวง|ตำบล)\s*([ก-๙]+)', val)
-            if m_sub: sub_district = m_sub.group(2)
-            m_dist = re.search(r'(เขต|อำเภอ)\s*([ก-๙]+)', val)
-            if m_dist: district = m_dist.group(2)
-            return district, sub_district
-
-        def clean_phone(val):
-            if pd.isna(val) or 'Click' in str(val): return ''
-            clean_number = re.sub(r'\D', '', str(val))
-            if clean_number: return f"'{clean_number}" 
-            return ''
-        
-        def clean_email(val):
-            if pd.isna(val) or 'Click' in str(val): return ''
-            return str(val).strip()
-
-        def clean_company_name(val):
-            if pd.isna(val): return ""
-            s = str(val).strip()
-            # ลบ space ระหว่างตัวอักษรไทย (เช่น "บ ริ ษั ท")
-            s = re.sub(r'(?<=[\u0E00-\u0E7F])\s+(?=[\u0E00-\u0E7F])', '', s)
-            return s
-
-        # --- APPLY CLEANING ---
-        if 'เงินเดือนที่ต้องการ' in df.columns:
-            salary_split = df['เงินเดือนที่ต้องการ'].apply(lambda x: pd.Series(clean_salary_split(x)))
-            df['เงินเดือนที่ต้องการ_Min'] = salary_split[0]
-            df['เงินเดือนที่ต้องการ_Max'] = salary_split[1]
-
-        history_salary_cols = [c for c in df.columns if 'เงินเดือนที่เคยได้' in c]
-        for c in history_salary_cols:
-            df[c] = df[c].apply(clean_salary_single)
-
-        if 'จังหวัดที่อยู่' in df.columns:
-            loc_split = df['จังหวัดที่อยู่'].apply(lambda x: pd.Series(clean_location(x)))
-            df['จังหวัดที่อยู่'] = loc_split[0]
-            df['รหัสไปรษณีย์'] = loc_split[1]
-
-        if 'ที่อยู่' in df.columns:
-            addr_split = df['ที่อยู่'].apply(lambda x: pd.Series(clean_address_split(x)))
-            df['เขต'] = addr_split[0]
-            df['แขวง'] = addr_split[1]
-
-        if 'เบอร์โทร' in df.columns: df['เบอร์โทร'] = df['เบอร์โทร'].apply(clean_phone)
-        if 'Email' in df.columns: df['Email'] = df['Email'].apply(clean_email)
-
-        company_cols = [c for c in df.columns if 'ชื่อบริษัทที่เคยทำงาน' in c]
-        for c in company_cols:
-            df[c] = df[c].apply(clean_company_name)
-
-        # --- REORDER COLUMNS ---
-        base_columns = [
-            "Link", "Keyword", "รหัสใบสมัคร", "เคยทำบริษัทคู่แข่ง", "รูปภาพ", 
-            "อัพเดทล่าสุด", 
-            "ชื่อ", "นามสกุล", "อายุ", "เพศ", 
-            "เบอร์โทร", "Email", "ที่อยู่", "แขวง", "เขต", "จังหวัดที่อยู่", "รหัสไปรษณีย์",
-            "ตำแหน่งที่ต้องการสมัคร_1","ตำแหน่งที่ต้องการสมัคร_2","ตำแหน่งที่ต้องการสมัคร_3", 
-            "เงินเดือนที่ต้องการ", "เงินเดือนที่ต้องการ_Min", "เงินเดือนที่ต้องการ_Max", 
-            "ระดับการศึกษา", "มหาลัย", "คณะ", "สาขา"
-        ]
-        
-        cols_to_keep = [c for c in base_columns if c in df.columns]
-        other_cols = [c for c in df.columns if c not in base_columns]
-        work_cols = []
-        for col in other_cols:
-            if any(k in col for k in ["ชื่อบริษัทที่เคยทำงาน", "ตำแหน่งที่เคยเป็น", "เงินเดือนที่เคยได้", "ระดับหน้าที่รับผิดชอบ", "ระยะเวลาที่ทำงาน", "หน้าที่รับผิดชอบ", "รวมอายุงาน"]):
-                work_cols.append(col)
-        
-        # เรียง work_cols ตามเลขท้าย (เช่น _1, _2, _3)
-        work_cols.sort(key=lambda x: int(re.search(r'_(\d+)$', x).group(1)) if re.search(r'_(\d+)$', x) else 0)
-        
-        final_cols = cols_to_keep + work_cols + ["ประสบการณ์ทำงานรวมทั้งหมด", "Analyzed_Department", "Analyzed_Score", "Analyzed_Breakdown"]
-        final_cols = [c for c in final_cols if c in df.columns]
-        
-        df = df[final_cols]
-        
-        # --- PREPARE FOR GOOGLE SHEETS ---
-        # 1. แทนค่า NaN ด้วย "" (เพื่อให้ Sheets ไม่ Error)
-        df = df.fillna("")
-        
-        # 2. แปลงเป็น List of Lists [ [Header], [Row1], [Row2], ... ]
-        data_for_sheets = [df.columns.values.tolist()] + df.values.tolist()
-        
-        return data_for_sheets
+    def get_mailer(self, sender, password):
+        if self.mailer is None: self.mailer = MailDispatcher(sender, password)
+        return self.mailer
 
-    def send_single_email(self, subject_prefix, people_list, col_header="ประวัติบริษัท"):
+    def send_single_email(self, subject_prefix, people_list, col_header="ประวัติบริษัท", detected_at=None):
         sender = os.getenv("EMAIL_SENDER")
         password = os.getenv("EMAIL_PASSWORD")
         receiver_list = []
@@ -1305,6 +3743,7 @@ class JobThaiRowScraper:
              if rec_env: receiver_list = [rec_env]
         
         if not sender or not password or not receiver_list: return
+        if not people_list: return # ไม่มีผู้สมัคร -> ไม่ส่งเมลเปล่า
 
         # ตั้งชื่อหัวข้ออีเมล
         if "สรุป" in subject_prefix or "HOT" in subject_prefix: 
@@ -1334,186 +3773,71 @@ class JobThaiRowScraper:
         elif len(people_list) > 1:
             footer_note = "📦 อีเมลสรุปรายสัปดาห์ (แสดงสถานะประวัติเฉพาะอีเมลแจ้งเตือนรายบุคคล)"
 
-        # --- HTML & CSS Construction ---
-        body_html = f"""
-        <html>
-        <head>
-        <style>
-            table {{ border-collapse: collapse; width: 100%; font-size: 14px; font-family: 'Sarabun', sans-serif; }}
-            th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; vertical-align: top; }}
-            th {{ background-color: #f2f2f2; }}
-            tr:nth-child(even) {{ background-color: #f9f9f9; }}
-            .btn {{
-                background-color: #28a745; color: #ffffff !important; padding: 5px 10px;
-                text-align: center; text-decoration: none; display: inline-block;
-                border-radius: 4px; font-size: 12px; font-weight: bold;
-            }}
-            .highlight {{ color: #d9534f; font-weight: bold; }} /* สีแดงสำหรับบริษัทเป้าหมาย */
-            .footer-text {{ 
-                margin-top: 15px; 
-                color: #555; 
-                font-size: 14px; 
-                font-weight: bold; 
-                border-top: 1px solid #eee; 
-                padding-top: 10px; 
-            }}
-        </style>
-        </head>
-        <body>
-            <h3>{subject}</h3>
-            <table>
-                <tr>
-                    <th style="width: 8%;">รูปภาพ</th>
-                    <th style="width: 22%;">{col_header}</th> 
-                    <th style="width: 10%;">ระดับการศึกษา</th>
-                    <th style="width: 10%;">รหัสใบสมัคร</th>
-                    <th style="width: 15%;">ชื่อ-นามสกุล</th>
-                    <th style="width: 5%;">อายุ</th>
-                    <th style="width: 15%;">ตำแหน่งที่สมัคร</th>
-                    <th style="width: 8%;">เงินเดือนต่ำสุด</th>
-                    <th style="width: 8%;">เงินเดือนสูงสุด</th> 
-                    <th style="width: 10%;">อัพเดทล่าสุด</th>
-                    <th style="width: 7%;">ลิงก์</th>
-                </tr>
-        """
-        
-        images_to_attach = []
-        
-        for person in people_list:
-            # จัดการรูปภาพ (CID Embed)
-            cid_id = f"img_{person['id']}"
-            if person['image_path'] and os.path.exists(person['image_path']):
-                img_html = f'<img src="cid:{cid_id}" width="70" style="border-radius: 5px;">'
-                images_to_attach.append({'cid': cid_id, 'path': person['image_path']})
-            else:
-                img_html = '<span style="color:gray; font-size:12px;">No Image</span>'
+        # --- HTML Rendering (EmailRenderer: แถวของแต่ละคน Render ครั้งเดียวแล้วใช้ซ้ำ) ---
+        rows = [EMAIL_RENDERER.row(person) for person in people_list]
+        overhead = EMAIL_RENDERER.overhead(subject, col_header, footer_note)
+        parts = list(split_by_budget(rows, [size for _, _, size in rows], EMAIL_MAX_BYTES, overhead))
 
-            # จัดการ Highlight ชื่อบริษัท (Tier 1 / Client / Tier 2)
-            raw_companies = person['company']
-            final_company_html = "-"
-            
-            if raw_companies and raw_companies != "-":
-                comp_list = raw_companies.split(", ")
-                formatted_list = []
+        # ประกอบอีเมลแล้วส่งต่อให้ MailDispatcher (ไม่รอ SMTP) / ใหญ่เกินงบ -> แบ่งเป็นหลายฉบับ
+        for part_no, part_rows in enumerate(parts, start=1):
+            part_subject = subject if len(parts) == 1 else f"{subject} [ส่วนที่ {part_no}/{len(parts)}]"
+            try:
+                msg_root = MIMEMultipart('related')
+                msg_root['From'] = sender
+                msg_root['Subject'] = part_subject
                 
-                for comp in comp_list:
-                    is_target = False
-                    comp_clean = comp.strip()
-                    
-                    # 1. เช็ค Tier 1
-                    for key, keywords in TIER1_TARGETS.items():
-                        for kw in keywords:
-                            if fuzz.token_set_ratio(kw.lower(), comp_clean.lower()) >= 85:
-                                is_target = True; break
-                        if is_target: break
-                    
-                    # 2. เช็ค Clients
-                    if not is_target:
-                        for key, keywords in CLIENTS_TARGETS.items():
-                            for kw in keywords:
-                                if fuzz.token_set_ratio(kw.lower(), comp_clean.lower()) >= 85:
-                                    is_target = True; break
-                            if is_target: break
-                            
-                    # 3. เช็ค Tier 2
-                    if not is_target and TARGET_COMPETITORS_TIER2:
-                        for kw in TARGET_COMPETITORS_TIER2:
-                            if fuzz.token_set_ratio(kw.lower(), comp_clean.lower()) >= 85:
-                                is_target = True; break
-
-                    if is_target:
-                        formatted_list.append(f"<span class='highlight'>{comp_clean}</span>")
-                    else:
-                        formatted_list.append(comp_clean)
+                msg_alternative = MIMEMultipart('alternative')
+                msg_root.attach(msg_alternative)
+                body_html = EMAIL_RENDERER.render(part_subject, col_header, part_rows, footer_note)
+                msg_alternative.attach(MIMEText(body_html, 'html'))
                 
-                final_company_html = "<br>".join(formatted_list)
-
-            # 🟢 ส่วนที่แก้ไขใหม่: ดึงค่าเงินเดือนแยกตัวแปร
-            s_min = person.get('salary_min', '-')
-            s_max = person.get('salary_max', '-')
-
-            # สร้างแถวในตาราง
-            body_html += f"""
-                <tr>
-                    <td style="text-align: center;">{img_html}</td>
-                    <td style="font-size: 13px; line-height: 1.6;">{final_company_html}</td>
-                    <td>{person.get('degree', '-')}</td> 
-                    <td>{person['id']}</td>
-                    <td>{person['name']}</td>
-                    <td>{person['age']}</td>
-                    <td>{person['positions']}</td>
-                    <td>{s_min}</td> 
-                    <td>{s_max}</td>
-                    <td>{person['last_update']}</td>
-                    <td style="text-align: center;">
-                        <a href="{person['link']}" target="_blank" class="btn">เปิดดู</a>
-                    </td>
-                </tr>
-            """
-            
-        # 🟢 อย่าลืมแปะ footer_note ลงใน body_html
-        body_html += f"</table><div class='footer-text'>{footer_note}</div></body></html>"
-
-        # ส่งอีเมล
-        try:
-            server = smtplib.SMTP('smtp.gmail.com', 587)
-            server.starttls()
-            server.login(sender, password)
-            
-            msg_root = MIMEMultipart('related')
-            msg_root['From'] = sender
-            msg_root['Subject'] = subject
-            
-            msg_alternative = MIMEMultipart('alternative')
-            msg_root.attach(msg_alternative)
-            msg_alternative.attach(MIMEText(body_html, 'html'))
-            
-            # แนบรูปภาพ
-            for img_data in images_to_attach:
-                try:
-                    with open(img_data['path'], 'rb') as f:
-                        msg_img = MIMEImage(f.read())
-                        msg_img.add_header('Content-ID', f"<{img_data['cid']}>")
-                        msg_img.add_header('Content-Disposition', 'inline', filename=os.path.basename(img_data['path']))
+                # แนบรูปภาพ
+                for _, image, _ in part_rows:
+                    if image is None: continue
+                    try:
+                        msg_img = MIMEImage(image['data'], _subtype=image['subtype']) if image['subtype'] else MIMEImage(image['data'])
+                        msg_img.add_header('Content-ID', f"<{image['cid']}>")
+                        msg_img.add_header('Content-Disposition', 'inline', filename=image['filename'])
                         msg_root.attach(msg_img)
-                except: pass
+                    except: pass
 
-            # วนลูปส่งให้ผู้รับทุกคน
-            for rec in receiver_list:
-                if 'To' in msg_root: del msg_root['To']
-                msg_root['To'] = rec
-                server.send_message(msg_root)
-                console.print(f"   ✅ ส่งเมล '{subject}' -> {rec}", style="success")
-            server.quit()
-        except Exception as e:
-            console.print(f"❌ ส่งอีเมลล้มเหลว: {e}", style="error")
+                # ฉบับเดียวถึงผู้รับทุกคน
+                self.get_mailer(sender, password).submit(msg_root, receiver_list, label=part_subject, detected_at=detected_at)
+            except Exception as e:
+                console.print(f"❌ ส่งอีเมลล้มเหลว: {e}", style="error")
 
     def send_batch_email(self, batch_candidates, keyword):
         self.send_single_email(f"สรุปผู้สมัครรายสัปดาห์: {keyword} ({len(batch_candidates)} คน)", batch_candidates)
 
+    def connect_spreadsheet(self):
+        """ ใช้ Spreadsheet ที่เปิดไว้ตั้งแต่ __init__ / ถ้าตอนนั้นต่อไม่ติด ค่อยลองต่อใหม่ครั้งเดียว """
+        if self.sh is not None: return self.sh
+        if not G_SHEET_KEY_JSON or not G_SHEET_NAME:
+            console.print("❌ ไม่พบ Key หรือชื่อไฟล์ Google Sheet ใน Secrets", style="error")
+            return None
+        creds_dict = json.loads(G_SHEET_KEY_JSON)
+        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
+        self.sheet_client = gspread.authorize(creds)
+        self.sh = self.sheet_client.open(G_SHEET_NAME)
+        console.print(f"✅ เชื่อมต่อไฟล์ '{G_SHEET_NAME}' สำเร็จ", style="success")
+        return self.sh
+
     def save_to_google_sheets(self):
         console.rule("[bold green]📊 Google Sheets Update (Smart Header Check)[/]")
         
         # 1. เตรียมข้อมูลใหม่ที่ Clean แล้ว
         console.print("🧹 กำลังทำความสะอาดข้อมูลและจัดเรียงคอลัมน์...", style="cyan")
-        final_data_list = self.clean_final_data_with_pandas()
+        chunks = self.clean_final_data_with_pandas()
+        first_chunk = next(chunks, None)
         
-        if not final_data_list:
+        if not first_chunk:
             console.print("⚠️ ไม่มีข้อมูลใหม่จากการสแกนรอบนี้", style="yellow")
             return
 
         try:
-            if not G_SHEET_KEY_JSON or not G_SHEET_NAME:
-                console.print("❌ ไม่พบ Key หรือชื่อไฟล์ Google Sheet ใน Secrets", style="error")
-                return
-
-            creds_dict = json.loads(G_SHEET_KEY_JSON)
-            scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-            creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-            client = gspread.authorize(creds)
-            
-            sheet = client.open(G_SHEET_NAME)
-            console.print(f"✅ เชื่อมต่อไฟล์ '{G_SHEET_NAME}' สำเร็จ", style="success")
+            sheet = self.connect_spreadsheet()
+            if sheet is None: return
             
             today_str = datetime.datetime.now().strftime("%d-%m-%Y")
             worksheet = None
@@ -1526,66 +3850,234 @@ class JobThaiRowScraper:
                 worksheet = sheet.add_worksheet(title=today_str, rows="100", cols="30")
                 console.print(f"🆕 สร้าง Tab ใหม่: '{today_str}'", style="success")
             
-            # 3. ดึงข้อมูลเก่า และ ตรวจสอบ Header (ส่วนที่แก้เพิ่ม)
-            existing_data = worksheet.get_all_values()
-            new_header = final_data_list[0] # Header ที่ถูกต้องจาก Code
+            # 3. ตรวจสอบ Header (อ่านแค่แถวที่ 1 ไม่ต้องดึงทั้ง Tab)
+            new_header = first_chunk[0] # Header ที่ถูกต้องจาก Code
+            current_header = sheets_call_with_backoff(worksheet.row_values, 1, what=f"อ่าน Header '{today_str}'")
             
-            # เช็คว่า Sheet ว่าง หรือ บรรทัดแรกไม่ตรงกับ Header ใหม่หรือไม่?
-            header_mismatch = False
-            if not existing_data:
-                header_mismatch = True
-            elif len(existing_data) > 0:
-                # เทียบ Header ปัจจุบัน กับ Header ใหม่ (เอาแค่ความยาวเท่าที่มี)
-                current_header = existing_data[0]
-                # ถ้า Header ใน Sheet สั้นกว่า หรือ ไม่ตรงกัน -> ถือว่าผิด
-                if len(current_header) < len(new_header) or current_header[:len(new_header)] != new_header:
-                    header_mismatch = True
-
-            # ถ้า Header ไม่ตรง ให้เขียน Header ใหม่ทับบรรทัดที่ 1
-            if header_mismatch:
+            # ถ้า Header ใน Sheet ว่าง สั้นกว่า หรือ ไม่ตรงกัน -> ถือว่าผิด -> เขียน Header ใหม่ทับบรรทัดที่ 1
+            if len(current_header) < len(new_header) or current_header[:len(new_header)] != new_header:
                 console.print("🔧 ตรวจพบว่า Header หายหรือไม่ตรงรุ่น -> กำลังเขียน Header ใหม่...", style="yellow")
-                # update เฉพาะแถวที่ 1
-                worksheet.update('A1', [new_header])
-                # โหลดข้อมูล existing ใหม่ หลังแก้ Header แล้ว
-                existing_data = worksheet.get_all_values()
-
-            # --- เข้าสู่ Logic เดิม: การ Append ข้อมูล ---
-            if not existing_data or len(existing_data) <= 1:
-                # กรณีเพิ่งสร้าง Header เสร็จ หรือ Sheet โล่ง -> ใส่ข้อมูลใหม่เลย (ตัด Header ออกเพราะใส่ไปแล้วข้างบน)
-                rows_to_add = final_data_list[1:]
-                if rows_to_add:
-                    worksheet.append_rows(rows_to_add)
-                    console.print(f"✅ บันทึกข้อมูลตั้งต้น {len(rows_to_add)} รายการ", style="bold green")
-            else:
-                # กรณีมีข้อมูล Data อยู่แล้ว -> เช็คซ้ำก่อน Append
-                id_index = 0
-                try:
-                    id_index = new_header.index("รหัสใบสมัคร")
-                except ValueError: pass
-                
-                existing_ids = set()
-                # existing_data[1:] คือข้าม Header
-                for row in existing_data[1:]: 
-                    if len(row) > id_index:
-                        existing_ids.add(row[id_index])
-                
+                sheets_call_with_backoff(worksheet.update, 'A1', [new_header], what="เขียน Header")
+
+            id_index = 0
+            try:
+                id_index = new_header.index("รหัสใบสมัคร")
+            except ValueError: pass
+
+            # 4. ดัชนี ID ของ Tab นี้: ดึงแค่คอลัมน์รหัสใบสมัครครั้งเดียว แล้วจำไว้ในเครื่อง (เรียกซ้ำในรอบเดียวกันไม่ต้องอ่านใหม่)
+            existing_ids = self.sheet_id_index.get(worksheet.title)
+            if existing_ids is None:
+                id_column = sheets_call_with_backoff(worksheet.col_values, id_index + 1, what=f"อ่านคอลัมน์รหัสใบสมัคร '{today_str}'")
+                existing_ids = set(id_column[1:]) # ข้าม Header
+                self.sheet_id_index[worksheet.title] = existing_ids
+            initial_upload = not existing_ids # Sheet โล่ง/เพิ่งสร้าง Header (ใช้แค่ตอนแสดงผล)
+            
+            # 5. ทยอยอัปโหลดทีละก้อน (จำกัดจำนวนแถว/ขนาดต่อครั้ง)
+            # เช็คซ้ำกับดัชนีในเครื่องเสมอ (Tab โล่งก็ด้วย) -> ID ที่ซ้ำกันในรอบเดียว/ข้ามก้อนไม่ถูกอัปโหลดสองครั้ง
+            total_added = 0; upload_calls = 0
+            for _, rows in itertools.chain([first_chunk], chunks):
                 new_rows_to_add = []
-                for row in final_data_list[1:]:
+                chunk_ids = set()
+                for row in rows:
                     candidate_id = row[id_index]
-                    if candidate_id not in existing_ids:
-                        new_rows_to_add.append(row)
-                        existing_ids.add(candidate_id)
-                
-                if new_rows_to_add:
-                    worksheet.append_rows(new_rows_to_add)
-                    console.print(f"✅ เพิ่มข้อมูลใหม่ {len(new_rows_to_add)} รายการ", style="bold green")
-                else:
-                    console.print("✨ ข้อมูลทั้งหมดมีอยู่ใน Sheet แล้ว (ไม่มีรายการใหม่)", style="yellow")
+                    if candidate_id in existing_ids or candidate_id in chunk_ids: continue
+                    chunk_ids.add(candidate_id)
+                    new_rows_to_add.append(row)
+                for batch in iter_upload_batches(new_rows_to_add):
+                    sheets_call_with_backoff(worksheet.append_rows, batch, what=f"อัปโหลด {len(batch)} แถว")
+                    existing_ids.update(row[id_index] for row in batch) # ขึ้น Sheet แล้วเท่านั้นถึงนับว่ามีอยู่
+                    total_added += len(batch); upload_calls += 1
+            
+            if total_added:
+                label = "บันทึกข้อมูลตั้งต้น" if initial_upload else "เพิ่มข้อมูลใหม่"
+                console.print(f"✅ {label} {total_added} รายการ ({upload_calls} ครั้ง)", style="bold green")
+            elif not initial_upload:
+                console.print("✨ ข้อมูลทั้งหมดมีอยู่ใน Sheet แล้ว (ไม่มีรายการใหม่)", style="yellow")
                 
         except Exception as e:
             console.print(f"❌ Google Sheets Error: {e}", style="error")
 
-    def run(self):
+    def checkpoint_counters(self):
+        return {"total_profiles_viewed": self.total_profiles_viewed, "records_written": self.record_sink.count if self.record_sink else 0}
+
+    def open_run_state(self, resume=False):
+        """ --resume -> เปิด Checkpoint + ไฟล์ Record เดิมต่อ / ไม่ใช่ -> เริ่ม Checkpoint ใหม่ """
+        checkpoint = RunCheckpoint.load(CHECKPOINT_PATH) if resume else None
+        if resume and checkpoint is None:
+            console.print("ℹ️ ไม่พบ Checkpoint ของรอบก่อน -> เริ่มรอบใหม่ทั้งหมด", style="yellow")
+        if checkpoint is not None:
+            state = checkpoint.state
+            counters = state.get("counters") or {}
+            sink_path = state.get("sink_path") or RECORD_SINK_PATH or "scraped_records.jsonl"
+            self.total_profiles_viewed = counters.get("total_profiles_viewed", 0)
+            # คนที่เขียนลงไฟล์ไปแล้วก่อนรอบถูกตัด ไม่เขียนซ้ำ (นับจากไฟล์จริง: Record หลัง Checkpoint ล่าสุดก็อยู่ในไฟล์แล้ว)
+            existing = [resume_key_from_url(record.get("Link", "")) for record in iter_sink_records(sink_path)]
+            self.recorded_keys = set(existing)
+            self.record_sink = RecordSink(sink_path, append=True)
+            self.record_sink.count = len(existing)
+            done_links = len(checkpoint.processed)
+            console.print(f"♻️ Resume จาก Checkpoint ({state.get('saved_at', '-')}): คำค้นที่ {state.get('keyword_index', 0) + 1}/{len(SEARCH_KEYWORDS)} | ทำเสร็จแล้ว {done_links} ลิงก์ | Record เดิม {self.record_sink.count}", style="bold cyan")
+            if state.get("run_date") != str(datetime.date.today()):
+                console.print(f"⚠️ Checkpoint เป็นของวันที่ {state.get('run_date')} (ไม่ใช่วันนี้)", style="yellow")
+        else:
+            sink_path = RECORD_SINK_PATH or f"scraped_records_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+            self.record_sink = RecordSink(sink_path, append=False)
+            checkpoint = RunCheckpoint.start(CHECKPOINT_PATH, sink_path)
+        console.print(f"💾 บันทึกโปรไฟล์ต่อท้ายไฟล์: {sink_path} | Checkpoint: {CHECKPOINT_PATH}", style="info")
+        self.checkpoint = checkpoint
+        return checkpoint
+
+    def collect_all_links(self, checkpoint, stats=None):
+        """
+        รอบแรกของ run(): ค้นหา + เก็บลิงก์ของทุก Keyword ที่ยังไม่เสร็จ (มีใน Checkpoint แล้วใช้ของเดิม)
+        Keyword ที่เก็บค้างไว้ครึ่งทาง (มี last_page) -> ค้นหาใหม่แล้วกระโดดไปหน้าถัดจากที่บันทึกไว้
+        คืน {index: {"links": [...], "markers": {...}}} / Keyword ที่ค้นหาไม่สำเร็จจะไม่อยู่ใน dict
+        """
+        start_index = checkpoint.state.get("keyword_index", 0)
+        saved = checkpoint.state.get("collected") or {}
+        collected = {}
+        searched = False
+        for index, keyword in enumerate(SEARCH_KEYWORDS):
+            saved_entry = saved.get(str(index))
+            if saved_entry is not None and not saved_entry.get("last_page"):
+                collected[index] = saved_entry
+                continue
+            if index < start_index: continue
+            if index == start_index and checkpoint.state.get("links") is not None:
+                # Checkpoint รุ่นที่เก็บลิงก์ทีละ Keyword
+                collected[index] = {"links": checkpoint.state["links"], "markers": checkpoint.state.get("markers") or {}}
+                continue
+            if searched:
+                console.print("⏳ พัก 3 วินาที ก่อนคำต่อไป...", style="dim")
+                time.sleep(3)
+            console.rule(f"[bold magenta]🔗 เก็บลิงก์คำค้นที่ {index+1}/{len(SEARCH_KEYWORDS)}: {keyword}[/]")
+            searched = True
+            started = time.perf_counter()
+            links = None
+            if self.step2_search(keyword):
+                # เก็บไปถึงหน้าไหนแล้วบันทึกทุกหน้า -> รอบ --resume กระโดดไปหน้าถัดไปได้เลย
+                saved_entry = saved_entry or {}
+                self.listing_dates.update(saved_entry.get("markers") or {})
+                on_page = lambda page, page_links, index=index: checkpoint.set_collected(index, page_links, self.link_markers(page_links), last_page=page)
+                links = self.step3_collect_all_links(keyword, start_page=saved_entry.get("last_page", 0) + 1,
+                                                     known_links=saved_entry.get("links") or (), on_page=on_page)
+                markers = self.link_markers(links)
+                checkpoint.set_collected(index, links, markers, self.last_full_scan)
+                collected[index] = {"links": links, "markers": markers, "full_scan": self.last_full_scan}
+            if stats is not None: stats.record(time.perf_counter() - started, items=len(links or []))
+        return collected
+
+    @staticmethod
+    def copy_resume_result(result, keyword=None):
+        """ สำเนา (data, days_diff, person_data) / keyword = ใช้ผลนี้ในนามของ Keyword ไหน """
+        if not isinstance(result, tuple): return result
+        d, days_diff, person_data = result
+        if person_data is not None:
+            person_data = dict(person_data, keyword=keyword) if keyword else dict(person_data)
+        return (dict(d) if d is not None else None), days_diff, person_data
+
+    def pipeline_enrich(self, item):
+        """ ขั้น parse/enrich: แปลงข้อมูลดิบเป็น Record (การศึกษา/บริษัท/เงินเดือน/วันที่) นอก Thread ของ Browser """
+        result = item["result"]
+        if isinstance(result, Exception): raise result
+        if callable(result): result = result()
+        item["result"] = result
+        # Keyword ถัดไปเจอคนนี้ด้วย -> เก็บผลไว้ใช้ซ้ำ (สำเนา ไม่ให้ขั้นถัดไปแก้ของที่เก็บไว้)
+        if item.get("keep"): self.shared_results[item["key"]] = self.copy_resume_result(result)
+        return item
+
+    def pipeline_notify(self, item):
+        """ ขั้น notify: ตัดสิน Batch/HOT แล้วส่งเมล + บันทึกประวัติ (ทีละโปรไฟล์ตามลำดับลิงก์) """
+        ctx = item["ctx"]
+        keyword, today, checkpoint, printer = ctx["keyword"], ctx["today"], ctx["checkpoint"], ctx["progress"].console
+        d, days_diff, person_data = item["result"]
+        
+        if d is not None:
+            # 🟢 [แก้ไข] 2. เปลี่ยนมาใช้ self.current_history_data (จาก Google Sheet)
+            should_add = False
+            if days_diff <= 30:
+                should_add = True
+                if EMAIL_USE_HISTORY and person_data['id'] in self.current_history_data:
+                    try:
+                        last_notify = datetime.datetime.strptime(self.current_history_data[person_data['id']], "%Y-%m-%d").date()
+                        if (today - last_notify).days < 7: should_add = True
+                    except: pass
+            if should_add: ctx["batch"].append(person_data)
+
+            if days_diff <= 1:
+                should_hot = True
+                # 🟢 [แก้ไข] 3. เช็คประวัติ HOT จาก Google Sheet
+                if EMAIL_USE_HISTORY and person_data['id'] in self.current_history_data:
+                     try:
+                          last_notify = datetime.datetime.strptime(self.current_history_data[person_data['id']], "%Y-%m-%d").date()
+                          if (today - last_notify).days < 1: should_hot = True              
+                          #False
+                     except: pass
+                
+                if should_hot and person_data['id'] in checkpoint.hot_sent:
+                    printer.print(f"   ♻️ ส่ง HOT คนนี้ไปแล้วก่อนรอบถูกตัด -> ไม่ส่งซ้ำ", style="dim")
+                elif should_hot:
+                    hot_subject = f"🔥 [HOT] พบผู้สมัครด่วน ({keyword}): {person_data['name']}"
+                    printer.print(f"   🚨 พบผู้สมัคร HOT -> ส่งเมลทันที!", style="bold red")
+                    # นับเวลา HOT ตั้งแต่โหลดโปรไฟล์เสร็จ (รวมเวลารอในคิว Pipeline)
+                    self.send_single_email(hot_subject, [person_data], col_header="ประวัติบริษัท", detected_at=item["fetched_at"])
+                    
+                    # 🟢 [เพิ่ม] 4. บันทึกประวัติลง Google Sheet ทันที (เคส HOT)
+                    self.update_history_sheet(person_data['id'], str(today))
+                    checkpoint.mark_hot_sent(person_data['id'], self.checkpoint_counters())
+
+            if days_diff > 30 and ctx["send_batch"]:
+                 if ctx["batch"]:
+                      printer.print(f"\n[bold green]📨 เจอคนเก่า ({days_diff} วัน) -> ถึงรอบส่งเมลสรุป ({len(ctx['batch'])} คน)![/]")
+                      self.send_batch_email(ctx["batch"], keyword)
+                      
+                      # 🟢 [เพิ่ม] 5. บันทึกทุกคนใน Batch ลง Google Sheet
+                      if EMAIL_USE_HISTORY:
+                           for p in ctx["batch"]: 
+                               self.update_history_sheet(p['id'], str(today))
+                      ctx["batch"] = []
+                      item["force_sync"] = True # Batch ว่างแล้ว -> ต้องลง Checkpoint ทันที (--resume จะได้ไม่ส่งคนเดิมซ้ำ)
+
+        # Batch ณ จุดนี้ไปลง Checkpoint พร้อมกับลิงก์ในขั้น persist
+        item["batch"] = list(ctx["batch"])
+        return item
+
+    def pipeline_persist(self, item):
+        """
+        ขั้น persist: เขียน Record ต่อท้ายไฟล์ + บันทึก Checkpoint (ลิงก์ที่ Error ไม่มาถึงขั้นนี้ -> --resume จะลองใหม่)
+        โปรไฟล์ที่เจอหลาย Keyword เขียนครั้งเดียว: Keyword / Memory_Group รวมทุกคำค้นและกลุ่มที่เจอ
+        ลิงก์ลง Checkpoint ตอน Sink Flush (ครบจำนวน/เวลา) เท่านั้น -> Crash แล้ว --resume ดูดใหม่เฉพาะลิงก์ที่ Record ยังไม่ถึงดิสก์
+        """
+        ctx = item["ctx"]
+        d = item["result"][0]
+        key = item.get("key")
+        if d is not None and key not in self.recorded_keys:
+            owners = self.run_owners.get(key) or [SEARCH_KEYWORDS.index(ctx["keyword"])]
+            keywords = [SEARCH_KEYWORDS[owner] for owner in owners]
+            groups = [group for group in dict.fromkeys(memory_group_of(keyword) for keyword in keywords) if group]
+            synced = self.record_sink.write(dict(d, Keyword=", ".join(keywords), Memory_Group=", ".join(groups)))
+            self.recorded_keys.add(key)
+        else: synced = self.record_sink.flush_if_due()
+        self.unsynced_links.append(item["link"])
+        self.unsynced_batch = item["batch"]
+        if item.get("force_sync") and not synced:
+            self.record_sink.flush()
+            synced = True
+        if synced: self.checkpoint_synced_links(ctx["checkpoint"])
+        ctx["progress"].advance(ctx["task_id"])
+
+    def checkpoint_synced_links(self, checkpoint):
+        """ ลิงก์ที่ Record ถึงดิสก์แล้ว -> Checkpoint ครั้งเดียวต่อการ Flush หนึ่งครั้ง """
+        if not self.unsynced_links: return
+        checkpoint.mark_processed(self.unsynced_links, self.unsynced_batch, self.checkpoint_counters())
+        self.unsynced_links = []
+
+    def pipeline_error(self, stage, item, error):
+        ctx = item["ctx"]
+        ctx["progress"].console.print(f"[bold red]❌ Error Link {item['i']+1} ({stage}): {error}[/]")
+        ctx["progress"].advance(ctx["task_id"])
+
+    def run(self, resume=False):
         self.email_report_list = []
 
         # ===============================================================
@@ -1623,92 +4115,93 @@ class JobThaiRowScraper:
 
 
         
-        if not self.step1_login(): return
+        if not self.ensure_login(): return
+        if DETAIL_FETCH_MODE == "http": self.start_http_session()
+
+        checkpoint = self.open_run_state(resume)
         
         today = datetime.date.today()
         is_friday = (today.weekday() == 4)
         is_manual_run = (os.getenv("GITHUB_EVENT_NAME") == "workflow_dispatch")
         
         console.print(f"📅 Status Check: Today is Friday? [{'Yes' if is_friday else 'No'}] | Manual Run? [{'Yes' if is_manual_run else 'No'}]", style="bold yellow")
+
+        # collect/fetch ใช้ Browser ใน Thread หลัก -> enrich -> notify -> persist เป็น Thread ละขั้น ต่อกันด้วยคิวจำกัดขนาด
+        pipeline = StagedPipeline([("enrich", self.pipeline_enrich), ("notify", self.pipeline_notify), ("persist", self.pipeline_persist)], on_error=self.pipeline_error)
+        collect_stats = pipeline.track("collect")
+        fetch_stats = pipeline.track("fetch")
+        pipeline.start()
+        
+        # 🟢 รอบแรก: เก็บลิงก์ของทุก Keyword ก่อน แล้วจับคู่รหัสเรซูเม่ที่ซ้ำข้าม Keyword -> คนเดียวกันเปิดหน้าเว็บครั้งเดียว
+        collected = self.collect_all_links(checkpoint, collect_stats)
+        owners = {} # รหัสเรซูเม่ -> [index ของ Keyword ที่เจอคนนี้] (ตามลำดับ)
+        for index in sorted(collected):
+            for link in collected[index]["links"]:
+                owner_list = owners.setdefault(resume_key_from_url(link), [])
+                if index not in owner_list: owner_list.append(index)
+        total_links = sum(len(entry["links"]) for entry in collected.values())
+        console.print(f"🧮 ลิงก์ทั้งหมด {total_links} | โปรไฟล์ไม่ซ้ำ {len(owners)} | เจอมากกว่า 1 Keyword {sum(1 for v in owners.values() if len(v) > 1)}", style="info")
+        self.run_owners = owners
+        self.shared_results = {}
         
         for index, keyword in enumerate(SEARCH_KEYWORDS):
+            if index < checkpoint.state.get("keyword_index", 0): continue # ทำเสร็จแล้วในรอบก่อน (--resume)
+
             # 🟢 [เพิ่ม] 1. เตรียมหน้าประวัติ (Tab) ตามกลุ่มของ Keyword ก่อนเริ่มค้นหา
             self.prepare_history_for_keyword(keyword)
 
             console.rule(f"[bold magenta]🔍 เริ่มดำเนินการคำค้นที่ {index+1}/{len(SEARCH_KEYWORDS)}: {keyword}[/]")
             
-            current_keyword_batch = []
-            if self.step2_search(keyword):
-                links = self.step3_collect_all_links()
+            checkpoint.begin_keyword(index, keyword)
+            current_keyword_batch = list(checkpoint.state.get("batch") or [])
+            links = None
+            entry = collected.get(index)
+            if entry is not None:
+                if checkpoint.state.get("links") is None: checkpoint.set_links(entry["links"], entry["markers"])
+                self.listing_dates.update(checkpoint.state.get("markers") or {})
+                links = checkpoint.pending_links()
+                if len(links) < len(checkpoint.state["links"]):
+                    console.print(f"♻️ ใช้ลิงก์จาก Checkpoint: เหลือ {len(links)}/{len(checkpoint.state['links'])} รายการ (Batch ค้าง {len(current_keyword_batch)} คน)", style="cyan")
+            if links is not None:
                 if links:
                     console.print(f"\n🚀 เริ่มดูดข้อมูลสำหรับ '{keyword}' จำนวน {len(links)} รายการ ...")
+                    reused = 0
                     with Progress(
                         SpinnerColumn(), TextColumn("[progress.description]{task.description}"),
                         BarColumn(), TaskProgressColumn(), TimeElapsedColumn(), TimeRemainingColumn(),
                         console=console
                     ) as progress:
                         task_id = progress.add_task(f"[cyan]Processing {keyword}...", total=len(links))
+                        ctx = {"keyword": keyword, "today": today, "send_batch": is_friday or is_manual_run, "batch": current_keyword_batch,
+                               "checkpoint": checkpoint, "progress": progress, "task_id": task_id}
                         
+                        # 🟢 Thread หลักทำแค่เปิดหน้าเว็บ (fetch) / แปลงข้อมูล-ส่งเมล-บันทึก ทำต่อใน Pipeline ขณะ Browser ไปหน้าถัดไป
+                        # คนที่ Keyword ก่อนหน้าดูดไปแล้ว -> ใช้ผลเดิม (ส่งเมล/ประวัติของ Keyword นี้ยังทำตามปกติ)
+                        fetch_links = [link for link in links if resume_key_from_url(link) not in self.shared_results]
+                        fetched = self.iter_detail_results(fetch_links, keyword, progress, defer=True)
+                        fetch_started = time.perf_counter()
                         for i, link in enumerate(links):
-                            if self.total_profiles_viewed > 0 and self.total_profiles_viewed % 33 == 0:
-                                progress.console.print(f"[yellow]☕ ครบ {self.total_profiles_viewed} คนแล้ว... พักเบรก 4 นาที[/]")
-                                time.sleep(240)
-
-                            try:
-                                d, days_diff, person_data = self.scrape_detail_from_json(link, keyword, progress_console=progress.console)
-                                self.total_profiles_viewed += 1 
-                                
-                                if d is not None:
-                                    d['Keyword'] = keyword
-                                    self.all_scraped_data.append(d)
-                                    
-                                    # 🟢 [แก้ไข] 2. เปลี่ยนมาใช้ self.current_history_data (จาก Google Sheet)
-                                    should_add = False
-                                    if days_diff <= 30:
-                                        should_add = True
-                                        if EMAIL_USE_HISTORY and person_data['id'] in self.current_history_data:
-                                            try:
-                                                last_notify = datetime.datetime.strptime(self.current_history_data[person_data['id']], "%Y-%m-%d").date()
-                                                if (today - last_notify).days < 7: should_add = True
-                                            except: pass
-                                    if should_add: current_keyword_batch.append(person_data)
-
-                                    if days_diff <= 1:
-                                        should_hot = True
-                                        # 🟢 [แก้ไข] 3. เช็คประวัติ HOT จาก Google Sheet
-                                        if EMAIL_USE_HISTORY and person_data['id'] in self.current_history_data:
-                                             try:
-                                                  last_notify = datetime.datetime.strptime(self.current_history_data[person_data['id']], "%Y-%m-%d").date()
-                                                  if (today - last_notify).days < 1: should_hot = True              
-                                                  #False
-                                             except: pass
-                                        
-                                        if should_hot:
-                                            hot_subject = f"🔥 [HOT] พบผู้สมัครด่วน ({keyword}): {person_data['name']}"
-                                            progress.console.print(f"   🚨 พบผู้สมัคร HOT -> ส่งเมลทันที!", style="bold red")
-                                            self.send_single_email(hot_subject, [person_data], col_header="ประวัติบริษัท")
-                                            
-                                            # 🟢 [เพิ่ม] 4. บันทึกประวัติลง Google Sheet ทันที (เคส HOT)
-                                            self.update_history_sheet(person_data['id'], str(today))
-
-                                    if days_diff > 30 and (is_friday or is_manual_run):
-                                         if current_keyword_batch:
-                                              progress.console.print(f"\n[bold green]📨 เจอคนเก่า ({days_diff} วัน) -> ถึงรอบส่งเมลสรุป ({len(current_keyword_batch)} คน)![/]")
-                                              self.send_batch_email(current_keyword_batch, keyword)
-                                              
-                                              # 🟢 [เพิ่ม] 5. บันทึกทุกคนใน Batch ลง Google Sheet
-                                              if EMAIL_USE_HISTORY:
-                                                   for p in current_keyword_batch: 
-                                                       self.update_history_sheet(p['id'], str(today))
-                                              current_keyword_batch = []
-
-                            except Exception as e: progress.console.print(f"[bold red]❌ Error Link {i+1}: {e}[/]")
-                            progress.advance(task_id)
+                            key = resume_key_from_url(link)
+                            if key in self.shared_results:
+                                result = self.copy_resume_result(self.shared_results[key], keyword)
+                                reused += 1
+                            else:
+                                _, _, result = next(fetched)
+                                fetch_stats.record(time.perf_counter() - fetch_started)
+                            keep = any(owner > index for owner in owners.get(key, ()))
+                            pipeline.put({"ctx": ctx, "i": i, "link": link, "key": key, "keep": keep, "result": result, "fetched_at": time.perf_counter()}, stats=fetch_stats)
+                            fetch_started = time.perf_counter()
+                        next(fetched, None) # ปิด Worker Thread ของ iter_detail_results
+                        pipeline.drain() # ทุกโปรไฟล์ของ Keyword นี้ผ่านครบทุกขั้นก่อนส่งสรุป/เปลี่ยน Tab ประวัติ
+                    current_keyword_batch = ctx["batch"]
+                    if reused: console.print(f"♻️ ใช้ผลจาก Keyword ก่อนหน้า {reused} โปรไฟล์ (ไม่เปิดหน้าเว็บซ้ำ)", style="info")
+                    # ไม่มี Keyword ถัดไปที่ต้องใช้แล้ว -> คืน RAM
+                    for key in [key for key in self.shared_results if max(owners.get(key, (index,))) <= index]: del self.shared_results[key]
                 
                 # จบ Loop ใหญ่ของ Keyword นี้
                 # 🟢 [แก้ไข] เพิ่มตัวแปร ENABLE_BATCH_EMAIL เข้าไปในเงื่อนไข
                 if current_keyword_batch and (is_friday or is_manual_run) and ENABLE_BATCH_EMAIL:
-                    progress.console.print(f"\n[bold green]📨 วันศุกร์/Manual (Switch ON) -> ส่งสรุป Batch ({len(current_keyword_batch)} คน)[/]")
+                    console.print(f"\n[bold green]📨 วันศุกร์/Manual (Switch ON) -> ส่งสรุป Batch ({len(current_keyword_batch)} คน)[/]")
                     self.send_batch_email(current_keyword_batch, keyword)
                     if EMAIL_USE_HISTORY:
                         for p in current_keyword_batch: 
@@ -1716,21 +4209,62 @@ class JobThaiRowScraper:
                 
                 # (Optional) แจ้งเตือนว่าข้ามการส่ง
                 elif current_keyword_batch and (is_friday or is_manual_run) and not ENABLE_BATCH_EMAIL:
-                     progress.console.print(f"\n[dim yellow]🚫 ข้ามการส่งเมลสรุป (Switch OFF) - เก็บข้อมูลลง Sheet อย่างเดียว[/]")
-
-            console.print("⏳ พัก 3 วินาที ก่อนคำต่อไป...", style="dim")
-            time.sleep(3)
+                     console.print(f"\n[dim yellow]🚫 ข้ามการส่งเมลสรุป (Switch OFF) - เก็บข้อมูลลง Sheet อย่างเดียว[/]")
+
+            if self.history_writer is not None: self.history_writer.flush("จบ Keyword")
+            # Record ที่ยังค้างใน Buffer ลงดิสก์ก่อนปิด Keyword ใน Checkpoint
+            self.record_sink.flush()
+            self.checkpoint_synced_links(checkpoint)
+            checkpoint.finish_keyword(index, self.checkpoint_counters())
+            # ทุกลิงก์ของ Keyword นี้ผ่าน persist แล้ว -> ขยับ Watermark ได้ (รอบหน้าหยุดที่หน้าที่ไม่มีอะไรใหม่)
+            self.commit_watermark(keyword, collected.get(index))
+        pipeline.close()
         
+        console.rule("[bold cyan]⏱️ สรุปจังหวะการดึงข้อมูล[/]")
+        for worker in [self] + self.worker_pool:
+            console.print(f"   {worker.pacer.summary()}", style="info")
+        console.print(pipeline.summary_table())
+        console.print(self.waiter.summary_table())
+        self.close_worker_pool()
+        if self.resume_cache is not None:
+            console.print(f"♻️ Resume Cache: ใช้ซ้ำ {self.resume_cache.hits} | เปิดหน้าเว็บใหม่ {self.resume_cache.misses}", style="info")
+            self.resume_cache.close()
+        self.record_sink.close()
+        console.print(f"🎓 Education Matcher: ใช้ผลเดิม {EDUCATION_MATCHER.hits} | คำนวณใหม่ {EDUCATION_MATCHER.misses}", style="info")
+        if self.history_writer is not None:
+            self.history_writer.flush("จบรอบ")
+            console.print(f"📝 History Writer: {self.history_writer.rows_written} แถว / {self.history_writer.api_calls} ครั้งที่เรียก API | ค้างส่ง {self.history_writer.pending_count()}", style="info")
         self.save_to_google_sheets()
-        # 🟢 [ลบออก] 7. ไม่ต้องใช้ self.save_history() (แบบไฟล์) แล้ว เพราะเราอัปเดตลง Sheet ไปแล้วแบบ Real-time
+        checkpoint.clear() # รันจบครบ -> รอบหน้าไม่ต้อง Resume
+        # 🟢 7. Sheet ยังเป็นที่เก็บหลัก / ไฟล์ JSON เป็นสำเนาสำรองจาก HistoryMirror
+        self.save_history()
+        if self.history_mirror is not None: self.history_mirror.close()
+        if self.mailer is not None:
+            self.mailer.close()
+            console.print(self.mailer.summary(), style="info")
+            console.print(f"🧩 Email Renderer: ใช้แถวเดิม {EMAIL_RENDERER.hits} | Render ใหม่ {EMAIL_RENDERER.misses}", style="info")
+        self.save_session()
         console.rule("[bold green]🏁 จบการทำงาน JobThai (G-Sheet Memory Mode)[/]")
         try: self.driver.quit()
         except: pass
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JobThai Resume Scraper")
+    parser.add_argument("--bench-parse", metavar="DIR", help="วัดความเร็ว parse_resume กับไฟล์ HTML ในโฟลเดอร์ (ไม่เปิด Browser)")
+    parser.add_argument("--rounds", type=int, default=5, help="จำนวนรอบของ Benchmark")
+    parser.add_argument("--bench-clean", nargs="?", const="1000,10000,100000", metavar="N,N,...", help="เทียบเวลา clean แบบทีละแถวกับแบบคอลัมน์ (ข้อมูลจำลอง)")
+    parser.add_argument("--resume", action="store_true", help="ทำต่อจาก Checkpoint ของรอบที่ถูกตัดกลางทาง (ไม่ดูดซ้ำ/ไม่ส่ง HOT ซ้ำ)")
+    args = parser.parse_args()
+    if args.bench_parse:
+        benchmark_parse_resume(args.bench_parse, rounds=args.rounds)
+        exit()
+    if args.bench_clean:
+        benchmark_clean([int(n) for n in args.bench_clean.split(",") if n.strip()])
+        exit()
+
     console.print("[bold green]🚀 Starting JobThai Scraper (Google Sheets Edition)...[/]")
     if not MY_USERNAME or not MY_PASSWORD:
         console.print(f"\n[bold red]❌ [CRITICAL ERROR] ไม่พบ User/Pass ในไฟล์ .env[/]")
         exit()
     scraper = JobThaiRowScraper()
-    scraper.run()
+    scraper.run(resume=args.resume)
@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path: sys.path.insert(0, ROOT)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+@pytest.fixture
+def resume_html():
+    """ หน้า ResumeDetail ที่บันทึกไว้: วุฒิตรงเป้าหมาย (วไลยอลงกรณ์ / สาขาเครื่องสำอาง) + ประวัติงาน 2 ที่ """
+    with open(os.path.join(FIXTURES, "resume_detail_qualified.html"), encoding="utf-8") as f:
+        return f.read()
@@ -0,0 +1,32 @@
+import datetime
+import json
+
+import Git1
+
+TODAY = datetime.date(2026, 10, 18)
+
+def column(table, name):
+    index = table[0].index(name)
+    return [row[index] for row in table[1:]]
+
+def test_vectorized_matches_rowwise():
+    records = Git1._synthetic_export_records(300)
+    assert Git1.clean_scraped_records(records, vectorized=True, today=TODAY) == Git1.clean_scraped_records(records, vectorized=False, today=TODAY)
+
+def test_salary_range_is_int_in_every_chunk(tmp_path):
+    """ ก้อนที่มีเงินเดือนว่างกับก้อนที่ครบทุกแถว ต้องได้ตัวเลขแบบเดียวกัน (int ไม่ใช่ float) """
+    path = tmp_path / "records.jsonl"
+    salaries = ["20,000 - 25,000", "30k", "ปิดข้อมูล", "18000"]
+    with open(path, "w", encoding="utf-8") as f:
+        for i, salary in enumerate(salaries):
+            f.write(json.dumps({"Link": f"u/{i}", "รหัสใบสมัคร": str(i), "เงินเดือนที่ต้องการ": salary}, ensure_ascii=False) + "\n")
+    chunks = list(Git1.iter_clean_record_chunks(str(path), chunk_size=2, today=TODAY))
+    mins = [value for header, rows in chunks for value in column([header] + rows, "เงินเดือนที่ต้องการ_Min")]
+    maxs = [value for header, rows in chunks for value in column([header] + rows, "เงินเดือนที่ต้องการ_Max")]
+    assert mins == [20000, 30000, "", 18000]
+    assert maxs == [25000, 30000, "", 18000]
+    assert all(type(v) is int for v in mins + maxs if v != "")
+
+def test_export_recomputes_duration():
+    table = Git1.clean_scraped_records([{"Link": "u", "ระยะเวลาที่ทำงาน_1": "มกราคม 2560 - ปัจจุบัน", "รวมอายุงาน_1": "old"}], today=TODAY)
+    assert column(table, "รวมอายุงาน_1") == ["9 ปี 9 เดือน"]
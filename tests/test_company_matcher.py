@@ -0,0 +1,14 @@
+import Git1
+
+def test_is_target_matches_any_tier():
+    matcher = Git1.CompanyMatcher({"Client A": ["Beauty Lab"]}, {"Tier1": ["Siam Cosmetics"]}, ["Thai Cream Co"])
+    assert matcher.is_target("บริษัท Siam Cosmetics จำกัด")
+    assert matcher.is_target("BEAUTY LAB (Thailand)")
+    assert matcher.is_target("thai cream co ltd")
+    assert not matcher.is_target("Random Logistics")
+    assert not matcher.is_target("")
+
+def test_duplicate_keywords_share_one_slot():
+    matcher = Git1.CompanyMatcher({"A": ["Beauty Lab", "beauty lab"]}, {}, ["BEAUTY LAB"])
+    assert matcher.keywords == ["beauty lab"]
+    assert matcher.scores("Beauty Lab") == [100]
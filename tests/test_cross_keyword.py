@@ -0,0 +1,58 @@
+import pytest
+
+import Git1
+
+KW_A, KW_B = "วไลยอลงกรณ์ เครื่องสำอาง", "Cosmetic Valaya Alongkorn"
+
+def result(person_id="A1", keyword=KW_A):
+    return ({"ID": person_id, "ชื่อ": "สมหญิง"}, 3, {"id": person_id, "keyword": keyword})
+
+def test_copy_resume_result_relabels_and_isolates():
+    original = result()
+    copied = Git1.JobThaiRowScraper.copy_resume_result(original, KW_B)
+    assert copied == ({"ID": "A1", "ชื่อ": "สมหญิง"}, 3, {"id": "A1", "keyword": KW_B})
+    copied[0]["ชื่อ"] = "แก้ไข"; copied[2]["batch"] = True
+    assert original == result() # ขั้นถัดไปแก้สำเนาได้ ไม่กระทบผลที่เก็บไว้ให้ Keyword อื่น
+    assert Git1.JobThaiRowScraper.copy_resume_result((None, None, None)) == (None, None, None)
+    error = RuntimeError("timeout")
+    assert Git1.JobThaiRowScraper.copy_resume_result(error, KW_B) is error
+
+class StubProgress:
+    def __init__(self): self.advanced = 0
+    def advance(self, task_id): self.advanced += 1
+
+@pytest.fixture
+def scraper(tmp_path):
+    scraper = object.__new__(Git1.JobThaiRowScraper)
+    scraper.record_sink = Git1.RecordSink(str(tmp_path / "records.jsonl"), flush_every=100, flush_interval=3600, append=False)
+    scraper.recorded_keys = set()
+    scraper.shared_results = {}
+    scraper.unsynced_links = []; scraper.unsynced_batch = []
+    scraper.total_profiles_viewed = 0
+    scraper.run_owners = {"A1": [0, 1], "B2": [1]}
+    yield scraper
+    scraper.record_sink.close()
+
+def test_enrich_keeps_copy_only_for_later_keywords(scraper):
+    kept = scraper.pipeline_enrich({"key": "A1", "keep": True, "result": result()})
+    kept["result"][0]["ชื่อ"] = "แก้ไข"
+    assert scraper.shared_results == {"A1": result()}
+    scraper.pipeline_enrich({"key": "B2", "keep": False, "result": result("B2")})
+    assert "B2" not in scraper.shared_results
+
+def test_profile_found_by_two_keywords_is_written_once(scraper, tmp_path):
+    checkpoint = Git1.RunCheckpoint.start(str(tmp_path / "checkpoint.json"), scraper.record_sink.path)
+    progress = StubProgress()
+    def persist(keyword, link, key, res):
+        ctx = {"keyword": keyword, "checkpoint": checkpoint, "progress": progress, "task_id": 0}
+        scraper.pipeline_persist({"ctx": ctx, "link": link, "key": key, "result": res, "batch": []})
+    persist(KW_A, "https://example.com/ResumeDetail?ResumeID=A1", "A1", result())
+    persist(KW_B, "https://example.com/ResumeDetail?ResumeID=A1&k=2", "A1", Git1.JobThaiRowScraper.copy_resume_result(result(), KW_B))
+    persist(KW_B, "https://example.com/ResumeDetail?ResumeID=B2", "B2", result("B2", KW_B))
+    scraper.record_sink.flush(); scraper.checkpoint_synced_links(checkpoint)
+
+    records = list(Git1.iter_sink_records(scraper.record_sink.path))
+    assert [r["ID"] for r in records] == ["A1", "B2"]
+    assert records[0]["Keyword"] == f"{KW_A}, {KW_B}" and records[1]["Keyword"] == KW_B
+    assert records[0]["Memory_Group"] == "วไลยอลงกรณ์_Cosmetic"
+    assert progress.advanced == 3 and len(checkpoint.processed) == 3 # ลิงก์ของทุก Keyword ลง Checkpoint แม้ Record เขียนครั้งเดียว
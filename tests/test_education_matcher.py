@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+
+import Git1
+
+fuzz = pytest.importorskip("thefuzz.fuzz")
+
+def legacy_check_fuzzy(scraped_text, target_list, threshold=85):
+    """ check_fuzzy ตัวเดิมใน step3 (thefuzz partial_ratio บนข้อความดิบ) """
+    if not target_list: return True
+    if not scraped_text: return False
+    return max(fuzz.partial_ratio(target.lower(), scraped_text.lower()) for target in target_list) >= threshold
+
+def legacy_matches(university, faculty, major):
+    return legacy_check_fuzzy(university, Git1.TARGET_UNIVERSITIES) and (
+        legacy_check_fuzzy(faculty, Git1.TARGET_FACULTIES) or legacy_check_fuzzy(major, Git1.TARGET_MAJORS))
+
+def legacy_degree_score(degree):
+    for key, val in Git1.DEGREE_SCORE_MAP.items():
+        if key in str(degree): return val
+    return 0
+
+# แถวที่เขียนตรง ๆ (ไม่มีคำย่อ/ส่วนท้าย/ช่องว่างกลางคำ) -> ผลต้องเท่ากับตัวเดิมทุกแถว
+PLAIN_ROWS = [
+    ("มหาวิทยาลัยราชภัฏวไลยอลงกรณ์", "วิทยาศาสตร์และเทคโนโลยี", "เครื่องสำอาง"),
+    ("มหาวิทยาลัยราชภัฏวไลยอลงกรณ์", "เทคโนโลยีเครื่องสำอาง", "-"),
+    ("มหาวิทยาลัยราชภัฏวไลยอลงกรณ์", "วิทยาศาสตร์", "เคมี"),
+    ("Valaya Alongkorn Rajabhat University", "Science and Technology", "Cosmetic Science"),
+    ("Valaya Alongkorn Rajabhat University", "Science", "Chemistry"),
+    ("จุฬาลงกรณ์มหาวิทยาลัย", "เภสัชศาสตร์", "เครื่องสำอาง"),
+    ("มหาวิทยาลัยแม่ฟ้าหลวง", "วิทยาศาสตร์เครื่องสำอาง", "Cosmetic Science"),
+    ("", "เครื่องสำอาง", "เครื่องสำอาง"),
+    ("มหาวิทยาลัยราชภัฏวไลยอลงกรณ์", "", ""),
+    ("โรงเรียนปทุมวิไล", "-", "วิทย์-คณิต"),
+]
+
+# แบบที่ตัวเดิมอาจพลาด (ตัวย่อ / เว้นวรรคกลางชื่อ / ส่วนท้ายพระราชูปถัมภ์) -> ตัวใหม่ต้องไม่เข้มกว่าเดิม
+NOISY_ROWS = [
+    ("มรภ.วไลยอลงกรณ์", "วิทยาศาสตร์และเทคโนโลยี", "เครื่องสำอาง"),
+    ("มหาวิทยาลัยราชภัฏ วไลย อลงกรณ์", "-", "เครื่อง สำอาง"),
+    ("มหาวิทยาลัยราชภัฏวไลยอลงกรณ์ ในพระบรมราชูปถัมภ์", "วิทยาศาสตร์", "เทคโนโลยีเครื่องสำอาง"),
+    ("Valaya Alongkorn Rajaphat Univ.", "Fac. of Sci. & Tech.", "Cosmetics"),
+    ("VALAYA ALONGKORN RAJABHAT UNIVERSITY UNDER THE ROYAL PATRONAGE", "SCIENCE", "COSMETIC"),
+    ("มรภ. วไลย  อลงกรณ์", "-", "เครื่อง  สำอาง"),
+    ("วไลย อลง กรณ์", "-", "เครื่องสำ อาง"),
+]
+
+@pytest.mark.parametrize("row", PLAIN_ROWS)
+def test_plain_rows_match_legacy(row):
+    assert Git1.EDUCATION_MATCHER.matches(*row) == legacy_matches(*row)
+
+@pytest.mark.parametrize("row", PLAIN_ROWS + NOISY_ROWS)
+def test_never_stricter_than_legacy(row):
+    if legacy_matches(*row): assert Git1.EDUCATION_MATCHER.matches(*row)
+
+def test_normalized_variants_qualify():
+    for row in NOISY_ROWS: assert Git1.EDUCATION_MATCHER.matches(*row), row
+    assert not all(legacy_matches(*row) for row in NOISY_ROWS) # มีแถวที่ตัวเดิมตกจริง
+
+@pytest.mark.parametrize("degree", ["ปริญญาเอก", "ปรัชญาดุษฎีบัณฑิต", "Ph.D. in Chemistry", "ปริญญาโท", "วิทยาศาสตรมหาบัณฑิต",
+                                    "Master of Science", "ปริญญาตรี", "วิทยาศาสตรบัณฑิต", "Bachelor's Degree",
+                                    "ปวส.", "มัธยมศึกษาตอนปลาย", "", None])
+def test_degree_score_matches_legacy(degree):
+    assert Git1.EDUCATION_MATCHER.degree_score(degree) == legacy_degree_score(degree)
+
+def test_matcher_without_targets_accepts_everything():
+    matcher = Git1.EducationMatcher([], [], [], Git1.DEGREE_SCORE_MAP)
+    assert matcher.matches("", "", "")
+
+def new_matcher():
+    return Git1.EducationMatcher(Git1.TARGET_UNIVERSITIES, Git1.TARGET_FACULTIES, Git1.TARGET_MAJORS, Git1.DEGREE_SCORE_MAP)
+
+def test_matcher_caches_verdicts():
+    matcher = new_matcher()
+    for _ in range(3): matcher.matches(*PLAIN_ROWS[0])
+    assert (matcher.misses, matcher.hits) == (1, 2)
+
+def test_counters_add_up_across_threads():
+    matcher = new_matcher()
+    rows = PLAIN_ROWS + NOISY_ROWS
+    barrier = threading.Barrier(8)
+    def worker():
+        barrier.wait()
+        for _ in range(200):
+            for row in rows: matcher.matches(*row)
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert matcher.hits + matcher.misses == 8 * 200 * len(rows)
@@ -0,0 +1,45 @@
+import Git1
+
+def person(**overrides):
+    data = {"id": "A1", "name": "สมหญิง ใจดี", "age": "25", "positions": "QC", "last_update": "18 ต.ค. 69",
+            "link": "https://example.com/A1", "company": "-", "image_path": None, "degree": "ปริญญาตรี",
+            "salary_min": 15000, "salary_max": 20000}
+    data.update(overrides)
+    return data
+
+def test_render_places_rows_between_header_and_footer():
+    renderer = Git1.EmailRenderer()
+    rows = [renderer.row(person()), renderer.row(person(id="A2", name="สมชาย รักงาน", link="https://example.com/A2"))]
+    html = renderer.render("HOT: QC", "ประวัติบริษัท", rows, "✨ ผู้สมัครรายใหม่")
+    assert html.startswith(Git1.EMAIL_HEAD_HTML)
+    assert html.endswith("<div class='footer-text'>✨ ผู้สมัครรายใหม่</div></body></html>")
+    assert html.index("<h3>HOT: QC</h3>") < html.index("<td>A1</td>") < html.index("<td>A2</td>") < html.index("footer-text'>")
+    assert "<td>15000</td>" in html and "<td>ปริญญาตรี</td>" in html
+    assert Git1.EMAIL_NO_IMAGE_HTML in rows[0][0] and rows[0][1] is None
+
+def test_row_is_rendered_once_per_unchanged_person():
+    renderer = Git1.EmailRenderer()
+    first = renderer.row(person())
+    assert renderer.row(person()) is first
+    changed = renderer.row(person(last_update="19 ต.ค. 69"))
+    assert changed is not first and "<td>19 ต.ค. 69</td>" in changed[0]
+    assert (renderer.hits, renderer.misses) == (1, 2)
+
+def test_row_cache_is_bounded():
+    renderer = Git1.EmailRenderer(max_rows=2)
+    for i in range(3): renderer.row(person(id=f"A{i}"))
+    assert len(renderer.rows) == 1 # เต็มแล้วล้างทิ้งก่อนเก็บแถวใหม่
+
+def test_image_is_embedded_by_content_id(tmp_path, monkeypatch):
+    src = tmp_path / "A1.png"; src.write_bytes(b"raw")
+    monkeypatch.setattr(Git1, "thumbnail_bytes", lambda path: (b"jpegdata", "jpeg"))
+    row_html, image, size = Git1.EmailRenderer().row(person(image_path=str(src)))
+    assert '<img src="cid:img_A1"' in row_html
+    assert image == {"cid": "img_A1", "data": b"jpegdata", "subtype": "jpeg", "filename": "A1.jpg"}
+    assert size == int(len(row_html.encode()) * 1.4) + len(b"jpegdata") * 4 // 3 + 512
+
+def test_target_companies_are_highlighted(monkeypatch):
+    monkeypatch.setattr(Git1.COMPANY_MATCHER, "is_target", lambda name, threshold=85: name == "บริษัท เป้าหมาย จำกัด")
+    html = Git1.EmailRenderer.company_html("บริษัท เป้าหมาย จำกัด, บริษัท อื่น จำกัด")
+    assert html == "<span class='highlight'>บริษัท เป้าหมาย จำกัด</span><br>บริษัท อื่น จำกัด"
+    assert Git1.EmailRenderer.company_html("-") == "-"
@@ -0,0 +1,79 @@
+import re
+
+import pytest
+
+import Git1
+
+class FakeTab:
+    def __init__(self, title, rows):
+        self.title = title
+        self.rows = rows
+    def get_all_values(self):
+        return [list(row) for row in self.rows]
+
+class FakeSpreadsheet:
+    """ values_batch_get คืนแถวตั้งแต่แถวที่ขอ (1-based) ถึงแถวสุดท้าย + จำช่วงที่ถูกขอ """
+    def __init__(self, *tabs):
+        self.tabs = {tab.title: tab for tab in tabs}
+        self.batch_calls = []
+    def worksheets(self):
+        return list(self.tabs.values())
+    def values_batch_get(self, ranges):
+        self.batch_calls.append(list(ranges))
+        out = []
+        for rng in ranges:
+            tab, start = re.match(r"'(.+)'!A(\d+):C", rng).groups()
+            out.append({"range": rng, "values": [list(r) for r in self.tabs[tab].rows[int(start) - 1:]]})
+        return {"valueRanges": out}
+
+HEADER = ["ID", "วันที่ส่ง", "ที่มา"]
+
+@pytest.fixture
+def mirror(tmp_path):
+    m = Git1.HistoryMirror(str(tmp_path / "history_mirror.sqlite"))
+    yield m
+    m.close()
+
+def test_second_sync_reads_only_appended_rows(mirror):
+    tab = FakeTab("History_A", [HEADER, ["A1", "2026-10-01", "Auto-Log"], ["A2", "2026-10-02", "Auto-Log"]])
+    sh = FakeSpreadsheet(tab, FakeTab("History_B", [HEADER]))
+    assert mirror.sync(sh, ["History_A", "History_B", "History_Missing"]) == 2
+    assert sh.batch_calls == [["'History_A'!A1:C", "'History_B'!A1:C"]] # Tab ที่ไม่มีใน Sheet ถูกข้าม
+    assert mirror.view("History_A")["A2"] == "2026-10-02"
+
+    tab.rows.append(["A3", "2026-10-03", "Auto-Log"])
+    tab.rows.append(["A1", "2026-10-04", "Manual"]) # แถวหลังทับแถวก่อน
+    assert mirror.sync(sh, ["History_A"]) == 2
+    assert sh.batch_calls[-1] == ["'History_A'!A3:C"] # เริ่มที่แถวสุดท้ายที่เคย Sync (ทับกัน 1 แถว)
+    assert mirror.get("History_A", "A1") == "2026-10-04"
+    assert mirror.get("History_A", "A3") == "2026-10-03"
+
+    assert mirror.sync(sh, ["History_A"]) == 0
+    assert sh.batch_calls[-1] == ["'History_A'!A5:C"]
+
+def test_rewritten_tab_triggers_full_resync(mirror):
+    tab = FakeTab("History_A", [HEADER, ["A1", "2026-10-01", "Auto-Log"], ["A2", "2026-10-02", "Auto-Log"]])
+    sh = FakeSpreadsheet(tab)
+    mirror.sync(sh, ["History_A"])
+    tab.rows[:] = [HEADER, ["B1", "2026-10-05", "Auto-Log"], ["B2", "2026-10-06", "Auto-Log"]] # แถวสุดท้ายที่จำไว้ไม่ตรงแล้ว
+    assert mirror.sync(sh, ["History_A"]) == 2
+    assert mirror.get("History_A", "A1") is None
+    assert mirror.export_json() == {"History_A": {"B1": "2026-10-05", "B2": "2026-10-06"}}
+
+def test_seed_from_json_accepts_per_tab_and_legacy_layout(mirror):
+    assert mirror.is_empty()
+    mirror.seed_from_json({"History_A": {"A1": "2026-09-01"}, "History_B": {"B1": "2026-09-02"}}, ["History_A", "History_B"])
+    assert mirror.export_json() == {"History_A": {"A1": "2026-09-01"}, "History_B": {"B1": "2026-09-02"}}
+
+    mirror.seed_from_json({"L1": "2026-08-01"}, ["History_C", "History_D"]) # แบบเก่า: ใช้กับทุก Tab
+    assert mirror.get("History_C", "L1") == "2026-08-01"
+    assert mirror.get("History_D", "L1") == "2026-08-01"
+
+def test_local_record_is_visible_before_next_sync(mirror):
+    sh = FakeSpreadsheet(FakeTab("History_A", [HEADER, ["A1", "2026-10-01", "Auto-Log"]]))
+    mirror.sync(sh, ["History_A"])
+    view = mirror.view("History_A")
+    view["N1"] = "2026-10-18"
+    assert "N1" in view and view.get("N9", "-") == "-"
+    assert mirror.sync(sh, ["History_A"]) == 0 # แถวที่บันทึกในเครื่องไม่ถูกนับเป็นแถวที่ Sync แล้ว
+    assert sh.batch_calls[-1] == ["'History_A'!A2:C"]
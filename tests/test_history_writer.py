@@ -0,0 +1,75 @@
+import pytest
+
+import Git1
+
+class StubWorksheet:
+    def __init__(self, title, failures=()):
+        self.title = title
+        self.failures = list(failures) # Exception ที่จะโยนก่อนสำเร็จ (ตามลำดับ)
+        self.calls = []
+    def append_rows(self, rows):
+        if self.failures: raise self.failures.pop(0)
+        self.calls.append([list(row) for row in rows])
+
+class StubSpreadsheet:
+    def __init__(self, *worksheets):
+        self.tabs = {ws.title: ws for ws in worksheets}
+    def worksheet(self, title):
+        return self.tabs[title]
+
+@pytest.fixture
+def spill(tmp_path):
+    return str(tmp_path / "history_pending.jsonl")
+
+def test_rows_are_buffered_until_threshold(spill):
+    ws = StubWorksheet("History_A")
+    writer = Git1.HistoryWriter(StubSpreadsheet(ws), spill_path=spill, flush_rows=3, flush_seconds=3600)
+    writer.append(ws, ["A1", "2026-10-18", "Auto-Log"])
+    writer.append(ws, ["A2", "2026-10-18", "Auto-Log"])
+    assert ws.calls == []
+    assert len(list(Git1.iter_sink_records(spill))) == 2 # ค้างส่งอยู่ในไฟล์แล้ว
+    writer.append(ws, ["A3", "2026-10-18", "Auto-Log"])
+    assert ws.calls == [[["A1", "2026-10-18", "Auto-Log"], ["A2", "2026-10-18", "Auto-Log"], ["A3", "2026-10-18", "Auto-Log"]]]
+    assert (writer.api_calls, writer.rows_written, writer.pending_count()) == (1, 3, 0)
+    assert not Git1.os.path.exists(spill)
+
+def test_failed_flush_spills_and_next_run_resends(spill):
+    broken = StubWorksheet("History_A", failures=[RuntimeError("quota")])
+    writer = Git1.HistoryWriter(StubSpreadsheet(broken), spill_path=spill, flush_rows=1, flush_seconds=3600)
+    writer.append(broken, ["A1", "2026-10-18", "Auto-Log"])
+    assert writer.pending_count() == 1
+    writer.append(broken, ["A2", "2026-10-18", "Auto-Log"]) # ยังไม่พ้นเวลารอ -> ไม่ลองซ้ำทุกแถว
+    assert broken.calls == [] and not broken.failures
+    assert [r["row"][0] for r in Git1.iter_sink_records(spill)] == ["A1", "A2"]
+
+    # รอบถัดไป (โปรแกรมใหม่): อ่านไฟล์ค้างส่ง แล้วเปิด Tab เองตอน Flush
+    ws = StubWorksheet("History_A")
+    resumed = Git1.HistoryWriter(StubSpreadsheet(ws), spill_path=spill, flush_rows=50, flush_seconds=3600)
+    assert resumed.pending_rows("History_A") == [["A1", "2026-10-18", "Auto-Log"], ["A2", "2026-10-18", "Auto-Log"]]
+    assert resumed.flush("จบรอบ")
+    assert ws.calls == [[["A1", "2026-10-18", "Auto-Log"], ["A2", "2026-10-18", "Auto-Log"]]]
+    assert not Git1.os.path.exists(spill)
+
+def test_transient_error_is_retried(spill, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(Git1.time, "sleep", sleeps.append)
+    ws = StubWorksheet("History_A", failures=[Git1.requests.exceptions.ConnectionError("reset")])
+    writer = Git1.HistoryWriter(StubSpreadsheet(ws), spill_path=spill, flush_rows=50, flush_seconds=3600)
+    writer.append(ws, ["A1", "2026-10-18", "Auto-Log"])
+    assert writer.flush()
+    assert len(ws.calls) == 1 and len(sleeps) == 1
+
+def test_partial_upload_keeps_only_unsent_rows(spill, monkeypatch):
+    monkeypatch.setattr(Git1, "SHEETS_UPLOAD_ROWS", 2)
+    ws = StubWorksheet("History_A")
+    writer = Git1.HistoryWriter(StubSpreadsheet(ws), spill_path=spill, flush_rows=50, flush_seconds=3600)
+    for i in range(5): writer.append(ws, [f"A{i}", "2026-10-18", "Auto-Log"])
+    original = ws.append_rows
+    def fail_second(rows):
+        if ws.calls: raise RuntimeError("quota")
+        original(rows)
+    ws.append_rows = fail_second
+    assert not writer.flush()
+    assert [row[0] for row in writer.pending_rows("History_A")] == ["A2", "A3", "A4"]
+    assert writer.rows_written == 2
+    assert [r["row"][0] for r in Git1.iter_sink_records(spill)] == ["A2", "A3", "A4"]
@@ -0,0 +1,54 @@
+import threading
+
+import Git1
+
+class StubPacer:
+    def before_request(self): pass
+    def observe(self, *args, **kwargs): pass
+    def dwell(self): pass
+    def backoff(self, attempt): pass
+
+class QuietPrinter:
+    def print(self, *args, **kwargs): pass
+
+def http_scraper(html):
+    """ Scraper โหมด HTTP แบบไม่เปิด Chrome: fetch_resume_html คืน html เดิมทุกครั้ง + จดว่าใช้ session ไหน """
+    scraper = object.__new__(Git1.JobThaiRowScraper)
+    scraper.http_session = object()
+    scraper.http_fallbacks = 0
+    scraper.http_lock = Git1.threading.Lock()
+    scraper.pacer = StubPacer()
+    scraper.used_sessions = []
+    def fetch(url, session=None):
+        scraper.used_sessions.append(session)
+        return html
+    scraper.fetch_resume_html = fetch
+    return scraper
+
+def test_fallback_counter_is_shared_across_threads():
+    scraper = http_scraper("<html><body></body></html>") # ไม่มีข้อความ -> ถอยไป Chrome ทุกครั้ง
+    session = scraper.http_session
+    barrier = threading.Barrier(8)
+    def worker():
+        barrier.wait()
+        for _ in range(25): assert scraper.scrape_detail_via_http("https://www.jobthai.com/resume/A1", "kw", QuietPrinter(), session=session) is None
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert scraper.http_fallbacks == 200 # ไม่มีการนับหาย
+    assert scraper.http_session is None  # ครบ 5 ครั้ง -> ปิดโหมด HTTP
+    assert set(scraper.used_sessions) == {session} # Thread ที่ถือ session อยู่ไม่เจอ None กลางทาง
+
+def test_rejected_page_resets_fallback_counter(resume_html):
+    html = resume_html.replace("มหาวิทยาลัยราชภัฏวไลยอลงกรณ์ ในพระบรมราชูปถัมภ์", "จุฬาลงกรณ์มหาวิทยาลัย")
+    scraper = http_scraper(html)
+    scraper.http_fallbacks = 4
+    scraper.build_records_from_raw = lambda raw, url, keyword, printer, **kwargs: ("partial", raw.get("__partial"))
+    assert scraper.scrape_detail_via_http("u", "kw", QuietPrinter()) == ("partial", True)
+    assert scraper.http_fallbacks == 0
+
+def test_closed_http_mode_returns_none():
+    scraper = http_scraper("")
+    scraper.http_session = None
+    assert scraper.scrape_detail_via_http("u", "kw", QuietPrinter()) is None
+    assert scraper.used_sessions == []
@@ -0,0 +1,75 @@
+import Git1
+
+class FakeDriver:
+    """ หน้าผลค้นหาปลอม: execute_script คืนแถว (href, วันที่) ของหน้าที่เปิดอยู่ """
+    def __init__(self, pages):
+        self.pages = pages
+        self.current = 1
+        self.visited = []
+    def execute_script(self, script, *args):
+        self.visited.append(self.current)
+        return self.pages.get(self.current, [])
+
+class NoWait:
+    def presence(self, *args, **kwargs): pass
+
+def harvester(pages, monkeypatch):
+    monkeypatch.setattr(Git1, "INCREMENTAL_PAGING", False)
+    scraper = object.__new__(Git1.JobThaiRowScraper)
+    scraper.driver = FakeDriver(pages)
+    scraper.waiter = NoWait()
+    scraper.resume_cache = None
+    scraper.listing_dates = {}
+    def goto(target, current=1):
+        scraper.driver.current = min(target, max(pages)) # เหมือนกดเลขหน้าสูงสุดที่ไปได้
+        return scraper.driver.current
+    scraper.goto_results_page = goto
+    return scraper
+
+PAGES = {
+    1: [["https://www.jobthai.com/resume/A1?from=search", "5 ต.ค. 69"], ["https://www.jobthai.com/resume/A2", None]],
+    2: [["https://www.jobthai.com/resume/A1?from=page2", "5 ต.ค. 69"], ["https://www.jobthai.com/resume/A3", "1 ต.ค. 69"]],
+    3: [["https://www.jobthai.com/resume/A4", "30 ก.ย. 69"]],
+}
+
+def test_links_dedupe_by_resume_id(monkeypatch):
+    scraper = harvester(PAGES, monkeypatch)
+    links = scraper.step3_collect_all_links("kw")
+    assert links == ["https://www.jobthai.com/resume/A1?from=search", "https://www.jobthai.com/resume/A2",
+                     "https://www.jobthai.com/resume/A3", "https://www.jobthai.com/resume/A4"]
+    assert scraper.driver.visited == [1, 2, 3]
+    assert scraper.link_markers(links) == {Git1.resume_key_from_url(links[0]): "5 ต.ค. 69", Git1.resume_key_from_url(links[2]): "1 ต.ค. 69",
+                                           Git1.resume_key_from_url(links[3]): "30 ก.ย. 69"}
+
+def test_resume_jumps_to_next_page(monkeypatch):
+    scraper = harvester(PAGES, monkeypatch)
+    saved = []
+    known = ["https://www.jobthai.com/resume/A1?from=search", "https://www.jobthai.com/resume/A2", "https://www.jobthai.com/resume/A3"]
+    links = scraper.step3_collect_all_links("kw", start_page=3, known_links=known, on_page=lambda page, links: saved.append((page, links)))
+    assert scraper.driver.visited == [3] # ไม่เปิดหน้า 1-2 ซ้ำ
+    assert links == known + ["https://www.jobthai.com/resume/A4"]
+    assert saved == [(3, links)]
+    assert not scraper.last_full_scan
+
+def test_resume_past_last_page_keeps_known_links(monkeypatch):
+    scraper = harvester(PAGES, monkeypatch)
+    known = ["https://www.jobthai.com/resume/A4"]
+    assert scraper.step3_collect_all_links("kw", start_page=4, known_links=known) == known
+    assert scraper.driver.visited == [3] # ลงได้แค่หน้าสุดท้ายที่มี ไม่มีหน้าถัดไปแล้ว
+
+def test_collect_all_links_resumes_from_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(Git1, "SEARCH_KEYWORDS", ["done", "halfway"])
+    checkpoint = Git1.RunCheckpoint.start(str(tmp_path / "checkpoint.json"), "records.jsonl")
+    checkpoint.set_collected(0, ["https://www.jobthai.com/resume/B1"], {})
+    checkpoint.set_collected(1, ["https://www.jobthai.com/resume/A1?from=search"], {"A1": "5 ต.ค. 69"}, last_page=1)
+    scraper = harvester(PAGES, monkeypatch)
+    searched = []
+    scraper.step2_search = lambda keyword: searched.append(keyword) or True
+    collected = scraper.collect_all_links(Git1.RunCheckpoint.load(checkpoint.path))
+    assert searched == ["halfway"]
+    assert scraper.driver.visited == [2, 3]
+    assert collected[0]["links"] == ["https://www.jobthai.com/resume/B1"]
+    assert collected[1]["links"] == ["https://www.jobthai.com/resume/A1?from=search", "https://www.jobthai.com/resume/A3", "https://www.jobthai.com/resume/A4"]
+    entry = Git1.RunCheckpoint.load(checkpoint.path).state["collected"]["1"]
+    assert "last_page" not in entry # เก็บครบแล้ว
+    assert entry["links"] == collected[1]["links"]
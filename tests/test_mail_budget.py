@@ -0,0 +1,83 @@
+import io
+import os
+
+import pytest
+
+import Git1
+
+@pytest.mark.parametrize("sizes, budget, overhead, expected", [
+    ([], 10, 0, []),
+    ([3, 3, 3], 10, 0, [[0, 1, 2]]),
+    ([4, 4, 4], 10, 0, [[0, 1], [2]]),
+    ([4, 4, 4], 10, 3, [[0], [1], [2]]),          # overhead นับทุกก้อน
+    ([2, 15, 2, 2], 10, 0, [[0], [1], [2, 3]]),   # ชิ้นที่ใหญ่เกินอยู่ก้อนตัวเอง
+    ([15], 10, 0, [[0]]),
+    ([5, 5, 5, 5], 10, 0, [[0, 1], [2, 3]]),      # พอดี budget ยังอยู่ก้อนเดียวกัน
+])
+def test_split_by_budget(sizes, budget, overhead, expected):
+    items = list(range(len(sizes)))
+    assert list(Git1.split_by_budget(items, sizes, budget, overhead)) == expected
+
+needs_pillow = pytest.mark.skipif(Git1.Image is None, reason="ไม่มี Pillow")
+
+def write_png(path, size, mode="RGBA"):
+    Git1.Image.new(mode, size, (200, 30, 30, 128) if mode == "RGBA" else (200, 30, 30)).save(path, "PNG")
+
+@needs_pillow
+def test_thumbnail_is_small_jpeg_and_reused(tmp_path):
+    src = str(tmp_path / "A1.png"); folder = str(tmp_path / "thumbs")
+    write_png(src, (1000, 600))
+    data, subtype = Git1.thumbnail_bytes(src, size=140, quality=80, folder=folder)
+    assert subtype == "jpeg" and len(data) < os.path.getsize(src)
+    with Git1.Image.open(io.BytesIO(data)) as img:
+        assert (img.format, img.mode, img.size) == ("JPEG", "RGB", (140, 84)) # ด้านยาวสุด = size / คงสัดส่วน
+    assert len(os.listdir(folder)) == 1
+    assert Git1.thumbnail_bytes(src, size=140, quality=80, folder=folder) == (data, "jpeg")
+    assert len(os.listdir(folder)) == 1
+
+@needs_pillow
+def test_recaptured_image_gets_new_thumbnail(tmp_path):
+    src = str(tmp_path / "A1.png"); folder = str(tmp_path / "thumbs")
+    write_png(src, (400, 400), mode="RGB")
+    first = Git1.thumbnail_bytes(src, size=140, quality=80, folder=folder)
+    write_png(src, (200, 500), mode="RGB")
+    os.utime(src, ns=(os.stat(src).st_atime_ns, os.stat(src).st_mtime_ns + 10**9))
+    second = Git1.thumbnail_bytes(src, size=140, quality=80, folder=folder)
+    with Git1.Image.open(io.BytesIO(second[0])) as img: assert img.size == (56, 140)
+    assert first != second and len(os.listdir(folder)) == 2
+
+def test_unreadable_image_falls_back_or_returns_none(tmp_path):
+    broken = tmp_path / "A1.png"; broken.write_bytes(b"not an image")
+    assert Git1.thumbnail_bytes(str(broken), folder=str(tmp_path / "thumbs")) == (b"not an image", None)
+    assert Git1.thumbnail_bytes(str(tmp_path / "missing.png"), folder=str(tmp_path / "thumbs")) is None
+
+class RecordingMailer:
+    def __init__(self): self.sent = []
+    def submit(self, msg, recipients, label="", detected_at=None): self.sent.append((msg, list(recipients), label))
+
+@pytest.fixture
+def scraper(monkeypatch):
+    monkeypatch.setenv("EMAIL_SENDER", "me@example.com")
+    monkeypatch.setenv("EMAIL_PASSWORD", "pw")
+    monkeypatch.setattr(Git1, "MANUAL_EMAIL_RECEIVERS", ["boss@example.com"])
+    scraper = object.__new__(Git1.JobThaiRowScraper)
+    scraper.mailer = RecordingMailer()
+    scraper.current_history_data = {}
+    return scraper
+
+def person(i):
+    return {"id": f"A{i}", "name": f"ผู้สมัคร {i}", "age": "25", "positions": "QC", "last_update": "18 ต.ค. 69",
+            "link": f"https://example.com/{i}", "company": "-", "image_path": None}
+
+def test_empty_people_list_sends_nothing(scraper):
+    scraper.send_single_email("สรุปผู้สมัครรายสัปดาห์: kw (0 คน)", [])
+    assert scraper.mailer.sent == []
+
+def test_oversized_batch_is_split_into_parts(scraper, monkeypatch):
+    people = [person(i) for i in range(3)]
+    row_size = Git1.EMAIL_RENDERER.row(people[0])[2]
+    overhead = Git1.EMAIL_RENDERER.overhead("🔥 kw (3 คน)", "ประวัติบริษัท", "📦 อีเมลสรุปรายสัปดาห์ (แสดงสถานะประวัติเฉพาะอีเมลแจ้งเตือนรายบุคคล)")
+    monkeypatch.setattr(Git1, "EMAIL_MAX_BYTES", overhead + 2 * row_size + 100) # พอสำหรับ 2 คนต่อฉบับ
+    scraper.send_single_email("kw", people)
+    assert [label for _, _, label in scraper.mailer.sent] == ["🔥 kw (3 คน) [ส่วนที่ 1/2]", "🔥 kw (3 คน) [ส่วนที่ 2/2]"]
+    assert all(recipients == ["boss@example.com"] for _, recipients, _ in scraper.mailer.sent)
@@ -0,0 +1,71 @@
+from email.mime.text import MIMEText
+
+import pytest
+
+import Git1
+
+class StubSMTP:
+    """ จำลอง smtplib.SMTP: failures = Exception ที่ send_message จะโยนก่อนสำเร็จ (ใช้ร่วมทุก Connection) """
+    instances = []
+    failures = []
+    def __init__(self, host, port, timeout=None):
+        self.sent = []
+        self.quit_called = False
+        StubSMTP.instances.append(self)
+    def starttls(self): pass
+    def login(self, user, password): pass
+    def noop(self): return (250, b"OK")
+    def quit(self): self.quit_called = True
+    def send_message(self, msg, from_addr=None, to_addrs=None):
+        if StubSMTP.failures: raise StubSMTP.failures.pop(0)
+        self.sent.append((msg["Subject"], msg["To"], list(to_addrs)))
+
+@pytest.fixture
+def smtp(monkeypatch):
+    StubSMTP.instances = []; StubSMTP.failures = []
+    sleeps = []
+    monkeypatch.setattr(Git1.smtplib, "SMTP", StubSMTP)
+    monkeypatch.setattr(Git1.time, "sleep", sleeps.append)
+    StubSMTP.sleeps = sleeps
+    return StubSMTP
+
+def message(subject):
+    msg = MIMEText("body", "plain", "utf-8")
+    msg["Subject"] = subject
+    return msg
+
+def run(dispatcher, *items):
+    for subject, recipients in items:
+        dispatcher.submit(message(subject), recipients, label=subject, detected_at=Git1.time.perf_counter())
+    dispatcher.close(timeout=10)
+
+def test_one_connection_and_one_message_for_all_recipients(smtp):
+    dispatcher = Git1.MailDispatcher("me@example.com", "pw", max_attempts=3)
+    run(dispatcher, ("HOT 1", ["a@example.com", "b@example.com"]), ("HOT 2", ["a@example.com"]))
+    assert len(smtp.instances) == 1 and dispatcher.connects == 1
+    assert smtp.instances[0].sent == [("HOT 1", "a@example.com, b@example.com", ["a@example.com", "b@example.com"]),
+                                      ("HOT 2", "a@example.com", ["a@example.com"])]
+    assert (dispatcher.sent, dispatcher.failed, len(dispatcher.handoff_latencies)) == (2, 0, 2)
+    assert smtp.instances[0].quit_called # close() ปิด Connection
+
+def test_dropped_connection_reconnects_and_retries(smtp):
+    smtp.failures = [Git1.smtplib.SMTPServerDisconnected("gone")]
+    dispatcher = Git1.MailDispatcher("me@example.com", "pw", max_attempts=3)
+    run(dispatcher, ("HOT", ["a@example.com"]))
+    assert (dispatcher.sent, dispatcher.failed, dispatcher.connects) == (1, 0, 2)
+    assert smtp.instances[0].sent == [] and smtp.instances[1].sent[0][0] == "HOT"
+    assert len(smtp.sleeps) == 1
+
+def test_gives_up_after_max_attempts(smtp):
+    smtp.failures = [OSError("reset")] * 3
+    dispatcher = Git1.MailDispatcher("me@example.com", "pw", max_attempts=2)
+    run(dispatcher, ("HOT", ["a@example.com"]), ("ถัดไป", ["a@example.com"]))
+    assert (dispatcher.sent, dispatcher.failed) == (1, 1) # ฉบับแรกล้มครบ 2 ครั้ง / ฉบับที่ 2 ล้ม 1 ครั้งแล้วผ่าน
+    assert dispatcher.connects == 4
+
+def test_rejected_message_is_not_retried(smtp):
+    smtp.failures = [Git1.smtplib.SMTPRecipientsRefused({"bad@example.com": (550, b"no such user")})]
+    dispatcher = Git1.MailDispatcher("me@example.com", "pw", max_attempts=3)
+    run(dispatcher, ("HOT", ["bad@example.com"]), ("HOT 2", ["a@example.com"]))
+    assert (dispatcher.sent, dispatcher.failed, dispatcher.connects) == (1, 1, 1)
+    assert smtp.sleeps == []
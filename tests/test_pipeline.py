@@ -0,0 +1,45 @@
+import threading
+
+import Git1
+
+def test_items_pass_every_stage_in_order():
+    seen = []
+    pipeline = Git1.StagedPipeline([("parse", lambda x: x * 10), ("notify", lambda x: x + 1), ("persist", seen.append)], maxsize=2).start()
+    for i in range(50): pipeline.put(i)
+    pipeline.drain()
+    assert seen == [i * 10 + 1 for i in range(50)] # drain() คืนเมื่อทุกรายการผ่านครบทุกขั้น
+    pipeline.close()
+    assert not any(t.is_alive() for t in pipeline.threads)
+    assert [pipeline.stats[name].items for name in ("parse", "notify", "persist")] == [50, 50, 50]
+
+def test_none_result_stops_item_at_that_stage():
+    seen = []
+    pipeline = Git1.StagedPipeline([("filter", lambda x: x if x % 2 else None), ("persist", seen.append)]).start()
+    for i in range(6): pipeline.put(i)
+    pipeline.drain(); pipeline.close()
+    assert seen == [1, 3, 5]
+
+def test_handler_error_goes_to_on_error_and_pipeline_keeps_running():
+    errors, seen = [], []
+    def parse(x):
+        if x == 2: raise ValueError("bad page")
+        return x
+    pipeline = Git1.StagedPipeline([("parse", parse), ("persist", seen.append)], on_error=lambda *args: errors.append(args)).start()
+    for i in range(4): pipeline.put(i)
+    pipeline.drain(); pipeline.close()
+    assert seen == [0, 1, 3]
+    assert [(name, item, str(e)) for name, item, e in errors] == [("parse", 2, "bad page")]
+
+def test_full_queue_blocks_producer():
+    release = threading.Event()
+    pipeline = Git1.StagedPipeline([("slow", lambda x: release.wait(5))], maxsize=1).start()
+    source = pipeline.track("source")
+    pipeline.put(0) # Worker หยิบไปรอ release
+    pipeline.put(1) # เต็มคิว
+    producer = threading.Thread(target=pipeline.put, args=(2, source)); producer.start()
+    producer.join(0.2)
+    assert producer.is_alive() # ขั้นช้า -> คนส่งหยุดรอ ไม่ใช่กองไว้ใน RAM
+    release.set()
+    producer.join(5); pipeline.drain(); pipeline.close()
+    assert pipeline.stats["slow"].items == 3
+    assert source.blocked > 0 and pipeline.stats["slow"].peak_queue == 1
@@ -0,0 +1,33 @@
+import Git1
+
+TARGET_ROW = {"university": "มหาวิทยาลัยราชภัฏวไลยอลงกรณ์", "degree": "ปริญญาตรี", "faculty": "-", "major": "เครื่องสำอาง"}
+OTHER_ROW = {"university": "จุฬาลงกรณ์มหาวิทยาลัย", "degree": "ปริญญาโท", "faculty": "เภสัชศาสตร์", "major": "เคมี"}
+SCHOOL_ROW = {"university": "โรงเรียนปทุมวิไล", "degree": "มัธยมศึกษาตอนปลาย", "faculty": "-", "major": "วิทย์-คณิต"}
+
+def test_qualify_education_keeps_highest_degree():
+    result = Git1.qualify_education([SCHOOL_ROW, TARGET_ROW, OTHER_ROW])
+    assert result["qualified"]
+    assert result["degree"] == "ปริญญาโท" # วุฒิสูงสุด ไม่ใช่แถวที่ผ่าน
+    assert (result["university"], result["major"]) == (TARGET_ROW["university"], TARGET_ROW["major"])
+
+def test_qualify_education_without_target_row():
+    result = Git1.qualify_education([SCHOOL_ROW, OTHER_ROW])
+    assert not result["qualified"]
+    assert result["university"] == ""
+    assert Git1.qualify_education([])["degree"] == "-"
+
+def test_rejected_early_only_on_readable_education():
+    assert Git1.rejected_early({"education": [SCHOOL_ROW, OTHER_ROW]}) is True
+    assert Git1.rejected_early({"education": [OTHER_ROW, TARGET_ROW]}) is False
+    # ตารางว่าง / อ่านไม่ได้ (หน้ายังโหลดไม่ครบ) -> ยังไม่ตัด ให้อ่านทั้งหน้าก่อน
+    assert Git1.rejected_early({"education": []}) is False
+    assert Git1.rejected_early({}) is False
+    assert Git1.rejected_early(None) is False
+
+def test_early_rule_agrees_with_full_record(resume_html):
+    """ ทางลัดกับการอ่านทั้งหน้าต้องตัดสินเหมือนกัน (ใช้ทั้งโหมด HTTP / Browser / parse_resume) """
+    for html in (resume_html, resume_html.replace("ราชภัฏวไลยอลงกรณ์", "ราชภัฏเชียงใหม่")):
+        root = Git1.parse_resume_html(html)
+        head = Git1.extract_resume_raw_from_html(root, Git1.RESUME_QUALIFY_SCHEMA)
+        full = Git1.build_resume_record(Git1.extract_resume_raw_from_html(root), "u", "kw")
+        assert Git1.rejected_early(head) == (full[0] is None)
@@ -0,0 +1,87 @@
+import Git1
+
+def read_all(path):
+    return list(Git1.iter_sink_records(str(path)))
+
+def test_round_trip_and_flush_threshold(tmp_path):
+    path = tmp_path / "records.jsonl"
+    sink = Git1.RecordSink(str(path), flush_every=3, flush_interval=3600, append=False)
+    synced = [sink.write({"Link": f"u/{i}", "ชื่อ": "ทดสอบ"}) for i in range(5)]
+    assert synced == [False, False, True, False, False] # ถึงดิสก์ตามจำนวนเท่านั้น ไม่ใช่ทุก Record
+    assert len(read_all(path)) == 3
+    assert sink.flush_if_due() is False # ยังไม่ครบเวลา/จำนวน
+    sink.close()
+    assert [r["Link"] for r in read_all(path)] == [f"u/{i}" for i in range(5)]
+    assert read_all(path)[0]["ชื่อ"] == "ทดสอบ"
+    assert sink.count == 5
+
+def test_flush_by_time(tmp_path):
+    sink = Git1.RecordSink(str(tmp_path / "records.jsonl"), flush_every=100, flush_interval=0, append=False)
+    assert sink.write({"Link": "u/1"}) is True
+    assert sink.flush_if_due() is True
+    sink.close()
+    assert sink.flush_if_due() is True
+
+def test_resume_after_truncated_line(tmp_path):
+    path = tmp_path / "records.jsonl"
+    sink = Git1.RecordSink(str(path), append=False)
+    for i in range(2): sink.write({"Link": f"u/{i}"})
+    sink.close()
+    with open(path, "a", encoding="utf-8") as f: f.write('{"Link": "u/2", "ชื่')  # ตายกลางบรรทัด
+    assert [r["Link"] for r in read_all(path)] == ["u/0", "u/1"]
+    sink = Git1.RecordSink(str(path), append=True)
+    sink.write({"Link": "u/3"})
+    sink.close()
+    assert [r["Link"] for r in read_all(path)] == ["u/0", "u/1", "u/3"]
+
+def test_truncated_single_line_file(tmp_path):
+    path = tmp_path / "records.jsonl"
+    path.write_text('{"Link": "u/0"', encoding="utf-8")
+    Git1.RecordSink(str(path), append=True).close()
+    assert path.read_text(encoding="utf-8") == ""
+
+class Progress:
+    def advance(self, task_id): pass
+
+def persisting_scraper(tmp_path, monkeypatch, flush_every):
+    monkeypatch.setattr(Git1, "SEARCH_KEYWORDS", ["kw"])
+    scraper = object.__new__(Git1.JobThaiRowScraper)
+    scraper.record_sink = Git1.RecordSink(str(tmp_path / "records.jsonl"), flush_every=flush_every, flush_interval=3600, append=False)
+    scraper.recorded_keys = set()
+    scraper.run_owners = {}
+    scraper.unsynced_links = []
+    scraper.unsynced_batch = []
+    scraper.total_profiles_viewed = 0
+    checkpoint = Git1.RunCheckpoint.start(str(tmp_path / "checkpoint.json"), scraper.record_sink.path)
+    ctx = {"keyword": "kw", "checkpoint": checkpoint, "progress": Progress(), "task_id": 0}
+    return scraper, checkpoint, ctx
+
+def item(ctx, n, batch=(), record=True, **extra):
+    data = {"Link": f"https://www.jobthai.com/resume/A{n}"} if record else None
+    return dict({"ctx": ctx, "link": f"https://www.jobthai.com/resume/A{n}", "key": f"A{n}", "result": (data, 0, None), "batch": list(batch)}, **extra)
+
+def test_checkpoint_only_durable_links(tmp_path, monkeypatch):
+    scraper, checkpoint, ctx = persisting_scraper(tmp_path, monkeypatch, flush_every=2)
+    scraper.pipeline_persist(item(ctx, 1))
+    assert Git1.RunCheckpoint.load(checkpoint.path).processed == set() # Record ยังอยู่ใน Buffer
+    scraper.pipeline_persist(item(ctx, 2, record=False)) # ไม่ผ่านเกณฑ์: ไม่มี Record แต่ยังรอ A1
+    scraper.pipeline_persist(item(ctx, 3, batch=[{"id": "A3"}]))
+    loaded = Git1.RunCheckpoint.load(checkpoint.path)
+    assert loaded.processed == {item(ctx, n)["link"] for n in (1, 2, 3)}
+    assert loaded.state["batch"] == [{"id": "A3"}]
+    assert [r["Link"] for r in read_all(scraper.record_sink.path)] == [item(ctx, n)["link"] for n in (1, 3)]
+
+def test_sent_batch_forces_sync(tmp_path, monkeypatch):
+    scraper, checkpoint, ctx = persisting_scraper(tmp_path, monkeypatch, flush_every=100)
+    scraper.pipeline_persist(item(ctx, 1, batch=[{"id": "A1"}]))
+    scraper.pipeline_persist(item(ctx, 2, force_sync=True))
+    loaded = Git1.RunCheckpoint.load(checkpoint.path)
+    assert len(loaded.processed) == 2
+    assert loaded.state["batch"] == []
+    assert len(read_all(scraper.record_sink.path)) == 2
+
+def test_profile_written_once_across_keywords(tmp_path, monkeypatch):
+    scraper, checkpoint, ctx = persisting_scraper(tmp_path, monkeypatch, flush_every=1)
+    scraper.pipeline_persist(item(ctx, 1))
+    scraper.pipeline_persist(item(ctx, 1))
+    assert len(read_all(scraper.record_sink.path)) == 1
@@ -0,0 +1,64 @@
+import pytest
+
+import Git1
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = Git1.ResumeCache(str(tmp_path / "cache.db"))
+    yield cache
+    cache.close()
+
+def test_resume_key_ignores_query():
+    assert Git1.resume_key_from_url("https://www.jobthai.com/resume/A1?from=search") == Git1.resume_key_from_url("https://www.jobthai.com/resume/A1")
+
+def test_lookup_requires_same_marker(cache):
+    url = "https://www.jobthai.com/resume/A1?from=search"
+    cache.store(url, "5 ต.ค. 69", {"app_id": "A1", "update_date": "5 ตุลาคม 2569"}, qualified=True)
+    assert cache.lookup("https://www.jobthai.com/resume/A1", "5 ต.ค. 69")["app_id"] == "A1"
+    assert cache.lookup(url, "18 ต.ค. 69") is None # โปรไฟล์อัพเดทแล้ว
+    assert cache.lookup(url, "") is None            # ไม่รู้วันที่ = ไม่ใช้ Cache
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_store_replaces_previous_raw(cache):
+    cache.store("u/resume/A1", "1 ต.ค. 69", {"app_id": "A1", "name": "old"}, qualified=False)
+    cache.store("u/resume/A1", "5 ต.ค. 69", {"app_id": "A1", "name": "new"}, qualified=True)
+    assert cache.lookup("u/resume/A1", "1 ต.ค. 69") is None
+    assert cache.lookup("u/resume/A1", "5 ต.ค. 69")["name"] == "new"
+
+PAGE = {"https://www.jobthai.com/resume/A1": "5 ต.ค. 69", "https://www.jobthai.com/resume/A2": "1 ต.ค. 69"}
+
+def test_watermark_stops_on_unchanged_page(cache):
+    assert not cache.page_is_unchanged("kw", PAGE) # ยังไม่เคยเห็น
+    cache.update_watermark("kw", PAGE)
+    assert cache.page_is_unchanged("kw", PAGE)
+    assert cache.page_is_unchanged("kw", dict(list(PAGE.items())[:1]))
+    assert not cache.page_is_unchanged("other", PAGE) # Watermark แยกตาม Keyword
+
+def test_watermark_continues_on_changed_page(cache):
+    cache.update_watermark("kw", PAGE)
+    assert not cache.page_is_unchanged("kw", {**PAGE, "https://www.jobthai.com/resume/A1": "18 ต.ค. 69"}) # อัพเดทโปรไฟล์
+    assert not cache.page_is_unchanged("kw", {**PAGE, "https://www.jobthai.com/resume/A3": "18 ต.ค. 69"}) # คนใหม่
+    assert not cache.page_is_unchanged("kw", {**PAGE, "https://www.jobthai.com/resume/A2": ""})           # อ่านวันที่ไม่ได้
+    assert not cache.page_is_unchanged("kw", {})
+
+def test_full_scan_schedule(cache):
+    assert cache.needs_full_scan("kw")
+    cache.update_watermark("kw", PAGE) # ไล่ไม่ครบ -> ยังต้องไล่ครบรอบหน้า
+    assert cache.needs_full_scan("kw")
+    cache.update_watermark("kw", PAGE, full_scan=True)
+    assert not cache.needs_full_scan("kw")
+    stale = Git1.datetime.date.today() - Git1.datetime.timedelta(days=Git1.WATERMARK_FULL_SCAN_DAYS)
+    cache.conn.execute("UPDATE watermark_scans SET last_full_scan = ? WHERE keyword = ?", (stale.isoformat(), "kw"))
+    assert cache.needs_full_scan("kw")
+
+def test_commit_watermark_uses_collected_entry(cache, monkeypatch):
+    """ Watermark ขยับจาก Entry ของ Checkpoint (เรียกหลังบันทึกครบทุกลิงก์ของ Keyword) """
+    monkeypatch.setattr(Git1, "INCREMENTAL_PAGING", True)
+    scraper = object.__new__(Git1.JobThaiRowScraper)
+    scraper.resume_cache = cache
+    markers = {Git1.resume_key_from_url(url): marker for url, marker in PAGE.items()}
+    scraper.commit_watermark("kw", {"links": list(PAGE), "markers": markers, "full_scan": True})
+    assert cache.page_is_unchanged("kw", PAGE)
+    assert not cache.needs_full_scan("kw")
+    scraper.commit_watermark("other", None) # ค้นหาไม่สำเร็จ -> ไม่มี Entry
+    assert not cache.page_is_unchanged("other", PAGE)
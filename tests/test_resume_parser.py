@@ -0,0 +1,48 @@
+import datetime
+
+import Git1
+
+def test_extract_raw_reads_every_schema_field(resume_html):
+    raw = Git1.extract_resume_raw_from_html(resume_html)
+    assert raw["app_id"] == "A1234567"
+    assert raw["update_date"] == "5 มกราคม 2567"
+    assert (raw["first_name"], raw["last_name"]) == ("สมหญิง", "ใจดี")
+    assert raw["phone"] == "081-234-5678"
+    assert raw["email"] == "somying@example.com"
+    assert raw["province"] == "ปทุมธานี"
+    assert raw["salary_expected"] == "20,000 - 25,000 บาท"
+    assert raw["photo_src"] == "/upload/resume/A1234567.jpg"
+    assert [e["degree"] for e in raw["education"]] == ["ปริญญาตรี", "มัธยมศึกษาตอนปลาย"]
+    assert [w["duration"] for w in raw["work"]] == ["มกราคม 2563 - ปัจจุบัน", "มิถุนายน 2561 - ธันวาคม 2562"]
+
+def test_parse_resume_qualified(resume_html):
+    data, days_diff, person = Git1.parse_resume(resume_html, "https://www.jobthai.com/resume/A1234567", "kw")
+    assert data["มหาลัย"] == "มหาวิทยาลัยราชภัฏวไลยอลงกรณ์ ในพระบรมราชูปถัมภ์"
+    assert data["ระดับการศึกษา"] == "ปริญญาตรี" # วุฒิสูงสุด ไม่ใช่แถวแรกที่ผ่าน
+    assert data["สาขา"] == "เครื่องสำอาง"
+    assert (data["อายุ"], data["เพศ"]) == ("28", "หญิง")
+    assert (data["Salary_Min"], data["Salary_Max"]) == ("20,000", "25,000")
+    assert data["ตำแหน่งที่ต้องการสมัคร_3"] == "นักวิจัยและพัฒนา"
+    assert data["ชื่อบริษัทที่เคยทำงาน_1"] == "บริษัท สวยใส คอสเมติกส์ จำกัด"
+    assert data["ตำแหน่งที่เคยเป็น_2"] == "ผู้ช่วยนักวิเคราะห์"
+    assert data["เงินเดือนที่เคยได้_2"] == "15,000 บาท"
+    assert data["รวมอายุงาน_2"] == "1 ปี 6 เดือน"
+    assert data["รวมอายุงาน_1"] == Git1.calculate_duration_text("มกราคม 2563 - ปัจจุบัน")
+    assert data["รูปภาพ"] == "" # โหมด Offline ไม่โหลดรูป
+    assert days_diff == (datetime.date.today() - datetime.date(2024, 1, 5)).days
+    assert person["id"] == "A1234567"
+    assert person["name"] == "สมหญิง ใจดี"
+    assert person["keyword"] == "kw"
+
+def test_parse_resume_matches_full_record(resume_html):
+    """ ทางลัด parse_resume (คัดด้วย RESUME_QUALIFY_SCHEMA ก่อน) ต้องได้ผลเท่ากับอ่านทั้งหน้า """
+    raw = Git1.extract_resume_raw_from_html(resume_html)
+    assert Git1.parse_resume(resume_html, "u", "kw") == Git1.build_resume_record(raw, "u", "kw")
+
+def test_parse_resume_rejects_other_university(resume_html):
+    html = resume_html.replace("มหาวิทยาลัยราชภัฏวไลยอลงกรณ์ ในพระบรมราชูปถัมภ์", "จุฬาลงกรณ์มหาวิทยาลัย")
+    assert Git1.parse_resume(html, "u", "kw") == (None, 999, None)
+
+def test_parse_salary_range():
+    assert Git1.parse_salary_range("20k - 25,000") == ("20,000", "25,000")
+    assert Git1.parse_salary_range("") == ("-", "-")
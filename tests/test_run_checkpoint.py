@@ -0,0 +1,87 @@
+import os
+
+import Git1
+
+def started(tmp_path):
+    return Git1.RunCheckpoint.start(str(tmp_path / "checkpoint.json"), "records.jsonl")
+
+def test_round_trip(tmp_path):
+    checkpoint = started(tmp_path)
+    checkpoint.set_collected(0, ["u1", "u2"], {"u1": "1 ม.ค. 67", "u2": ""}, full_scan=True)
+    checkpoint.begin_keyword(0, "kw")
+    checkpoint.set_links(["u1", "u2", "u3"], {"u1": "1 ม.ค. 67"})
+    checkpoint.mark_processed("u1", [{"id": "A1"}], counters={"found": 1})
+    checkpoint.mark_hot_sent("A1")
+
+    loaded = Git1.RunCheckpoint.load(checkpoint.path)
+    assert loaded.state["sink_path"] == "records.jsonl"
+    assert loaded.state["keyword"] == "kw"
+    assert loaded.state["collected"]["0"] == {"links": ["u1", "u2"], "markers": {"u1": "1 ม.ค. 67", "u2": ""}, "full_scan": True}
+    assert loaded.state["batch"] == [{"id": "A1"}]
+    assert loaded.state["counters"] == {"found": 1}
+    assert loaded.processed == {"u1"}
+    assert loaded.hot_sent == {"A1"}
+    assert loaded.pending_links() == ["u2", "u3"]
+
+    loaded.begin_keyword(0, "kw") # Keyword เดิม (--resume) -> ไม่ล้างความคืบหน้า
+    assert loaded.pending_links() == ["u2", "u3"]
+
+    loaded.finish_keyword(0)
+    reloaded = Git1.RunCheckpoint.load(checkpoint.path)
+    assert reloaded.state["keyword_index"] == 1
+    assert reloaded.state["links"] is None
+    assert reloaded.state["batch"] == []
+    assert reloaded.processed == set() and reloaded.hot_sent == set()
+    assert reloaded.state["collected"]["0"]["links"] == ["u1", "u2"]
+
+    reloaded.clear()
+    assert Git1.RunCheckpoint.load(checkpoint.path) is None
+    assert not os.path.exists(checkpoint.log_path)
+
+def test_progress_appends_instead_of_rewriting(tmp_path):
+    checkpoint = started(tmp_path)
+    checkpoint.begin_keyword(0, "kw")
+    checkpoint.set_links([f"u{i}" for i in range(50)], {})
+    with open(checkpoint.path, "rb") as f: snapshot = f.read()
+    batch = []
+    for i in range(50):
+        if i % 10 == 0: batch.append({"id": f"A{i}"})
+        checkpoint.mark_processed(f"u{i}", batch)
+    with open(checkpoint.path, "rb") as f: assert f.read() == snapshot # JSON ไม่ถูกเขียนทั้งไฟล์ใหม่
+    with open(checkpoint.log_path, encoding="utf-8") as f: lines = f.readlines()
+    assert len(lines) == 50
+    assert sum('"batch"' in line for line in lines) == 5 # Batch ลง Log เฉพาะตอนเปลี่ยน
+
+    loaded = Git1.RunCheckpoint.load(checkpoint.path)
+    assert loaded.pending_links() == []
+    assert loaded.state["batch"] == batch
+    assert not os.path.exists(checkpoint.log_path) # load รวม Log เข้า JSON แล้ว
+    assert Git1.RunCheckpoint.load(checkpoint.path).processed == loaded.processed
+
+def test_finish_keyword_compacts_log(tmp_path):
+    checkpoint = started(tmp_path)
+    checkpoint.begin_keyword(0, "kw")
+    checkpoint.mark_processed(["u1", "u2"], [])
+    assert os.path.exists(checkpoint.log_path)
+    checkpoint.finish_keyword(0)
+    assert not os.path.exists(checkpoint.log_path)
+    checkpoint.mark_processed("v1", []) # Log ใหม่ของ Keyword ถัดไป
+    assert Git1.RunCheckpoint.load(checkpoint.path).processed == {"v1"}
+
+def test_truncated_log_line_is_skipped(tmp_path):
+    checkpoint = started(tmp_path)
+    checkpoint.begin_keyword(0, "kw")
+    checkpoint.mark_processed("u1", [])
+    checkpoint.mark_hot_sent("A1")
+    with open(checkpoint.log_path, "a", encoding="utf-8") as f: f.write('{"processed": ["u2"')
+    loaded = Git1.RunCheckpoint.load(checkpoint.path)
+    assert loaded.processed == {"u1"}
+    assert loaded.hot_sent == {"A1"}
+    loaded.mark_processed("u3", [])
+    assert Git1.RunCheckpoint.load(checkpoint.path).processed == {"u1", "u3"}
+
+def test_load_ignores_broken_file(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    path.write_text("{not json", encoding="utf-8")
+    assert Git1.RunCheckpoint.load(str(path)) is None
+    assert Git1.RunCheckpoint.load(str(tmp_path / "missing.json")) is None
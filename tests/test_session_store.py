@@ -0,0 +1,47 @@
+import pytest
+
+import Git1
+
+pytestmark = pytest.mark.skipif(Git1.Fernet is None, reason="ไม่มี cryptography")
+
+COOKIES = [{"name": "sid", "value": "abc", "domain": ".jobthai.com", "path": "/", "expires": -1}]
+
+def test_passphrase_round_trip_uses_fresh_salt(tmp_path):
+    store = Git1.SessionStore(str(tmp_path / "session.enc"), secret="correct horse battery staple")
+    assert store.cipher is None # ไม่ใช่ Fernet Key -> ใช้ scrypt
+    first, second = store.seal(b"payload"), store.seal(b"payload")
+    assert first.startswith(Git1.SESSION_KDF_PREFIX) and first != second # salt ใหม่ทุกครั้ง
+    assert store.unseal(first) == store.unseal(second) == b"payload"
+
+def test_fernet_key_is_used_directly(tmp_path):
+    key = Git1.Fernet.generate_key().decode()
+    store = Git1.SessionStore(str(tmp_path / "session.enc"), secret=key)
+    blob = store.seal(b"payload")
+    assert not blob.startswith(Git1.SESSION_KDF_PREFIX)
+    assert Git1.Fernet(key.encode()).decrypt(blob) == b"payload"
+    assert store.unseal(blob) == b"payload"
+
+@pytest.mark.parametrize("secret", ["passphrase one", None])
+def test_wrong_key_is_rejected(tmp_path, secret):
+    path = str(tmp_path / "session.enc")
+    assert Git1.SessionStore(path, secret="passphrase one" if secret is None else Git1.Fernet.generate_key().decode()).save(COOKIES, "UA")
+    other = Git1.SessionStore(path, secret="passphrase two")
+    with open(path, "rb") as f: blob = f.read()
+    with pytest.raises(Git1.InvalidToken): other.unseal(blob)
+    assert other.load() is None # Key เปลี่ยน -> Login ใหม่ ไม่พัง
+
+def test_save_and_load_drop_expired_cookies(tmp_path):
+    store = Git1.SessionStore(str(tmp_path / "session.enc"), secret="passphrase")
+    expired = {"name": "old", "value": "x", "expires": Git1.time.time() - 60}
+    assert store.save(COOKIES + [expired], user_agent="UA")
+    with open(store.path, "rb") as f: assert b"abc" not in f.read() # ไม่มี Cookie แบบ Plain Text ในไฟล์
+    data = store.load()
+    assert data["user_agent"] == "UA" and data["cookies"] == COOKIES
+    store.clear()
+    assert store.load() is None
+
+def test_disabled_without_key(tmp_path):
+    store = Git1.SessionStore(str(tmp_path / "session.enc"), secret=None)
+    assert not store.enabled
+    assert store.save(COOKIES) is False and store.load() is None
+    assert Git1.session_cipher("") is None and Git1.session_cipher("not a fernet key") is None
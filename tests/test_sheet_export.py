@@ -0,0 +1,65 @@
+import Git1
+
+HEADER = ["Link", "รหัสใบสมัคร", "ชื่อ"]
+
+class FakeWorksheet:
+    def __init__(self, title, values=None):
+        self.title = title
+        self.values = [list(row) for row in (values or [])]
+        self.append_calls = 0
+        self.col_reads = 0
+    def row_values(self, n):
+        return list(self.values[n - 1]) if len(self.values) >= n else []
+    def update(self, cell, rows):
+        if self.values: self.values[0] = list(rows[0])
+        else: self.values.append(list(rows[0]))
+    def col_values(self, n):
+        self.col_reads += 1
+        return [row[n - 1] for row in self.values if len(row) >= n]
+    def append_rows(self, rows):
+        self.append_calls += 1
+        self.values.extend(list(row) for row in rows)
+
+class FakeSpreadsheet:
+    def __init__(self, *worksheets):
+        self.tabs = {ws.title: ws for ws in worksheets}
+    def worksheet(self, title):
+        return self.tabs[title]
+    def add_worksheet(self, title, rows, cols):
+        self.tabs[title] = FakeWorksheet(title)
+        return self.tabs[title]
+
+def exporter(spreadsheet, chunks):
+    scraper = object.__new__(Git1.JobThaiRowScraper)
+    scraper.sh = spreadsheet
+    scraper.sheet_id_index = {}
+    scraper.clean_final_data_with_pandas = lambda: iter([(HEADER, [list(row) for row in rows]) for rows in chunks])
+    return scraper
+
+def today_tab():
+    return Git1.datetime.datetime.now().strftime("%d-%m-%Y")
+
+def test_new_tab_dedupes_within_and_across_chunks():
+    sheet = FakeSpreadsheet()
+    chunks = [[["u1", "A1", "x"], ["u2", "A2", "x"], ["u1b", "A1", "x"]], [["u3", "A2", "x"], ["u4", "A3", "x"]]]
+    exporter(sheet, chunks).save_to_google_sheets()
+    ws = sheet.tabs[today_tab()]
+    assert ws.values[0] == HEADER
+    assert [row[1] for row in ws.values[1:]] == ["A1", "A2", "A3"]
+
+def test_existing_ids_are_skipped_and_index_is_reused():
+    ws = FakeWorksheet(today_tab(), [HEADER, ["u1", "A1", "x"]])
+    scraper = exporter(FakeSpreadsheet(ws), [[["u1", "A1", "x"], ["u2", "A2", "x"]]])
+    scraper.save_to_google_sheets()
+    assert [row[1] for row in ws.values[1:]] == ["A1", "A2"]
+    scraper.save_to_google_sheets() # เรียกซ้ำในรอบเดียวกัน: ใช้ดัชนีในเครื่อง ไม่อ่านคอลัมน์ใหม่ และไม่เพิ่มซ้ำ
+    assert ws.col_reads == 1
+    assert [row[1] for row in ws.values[1:]] == ["A1", "A2"]
+    assert scraper.sheet_id_index[ws.title] == {"A1", "A2"}
+
+def test_upload_is_chunked(monkeypatch):
+    monkeypatch.setattr(Git1, "SHEETS_UPLOAD_ROWS", 2)
+    ws = FakeWorksheet(today_tab(), [HEADER])
+    exporter(FakeSpreadsheet(ws), [[["u", f"A{i}", "x"] for i in range(5)]]).save_to_google_sheets()
+    assert ws.append_calls == 3
+    assert len(ws.values) == 6
@@ -0,0 +1,132 @@
+import datetime
+
+import pandas as pd
+import pytest
+from dateutil.relativedelta import relativedelta
+
+import Git1
+
+TODAY = datetime.date(2026, 10, 18)
+
+def legacy_duration_text(date_range_str, now):
+    """ calculate_duration_text ตัวเดิม (ก่อนย้ายออกจากคลาส) แค่รับ now แทน datetime.now() """
+    if not date_range_str: return ""
+    thai_months = {'มกราคม': 1, 'กุมภาพันธ์': 2, 'มีนาคม': 3, 'เมษายน': 4, 'พฤษภาคม': 5, 'มิถุนายน': 6, 'กรกฎาคม': 7, 'สิงหาคม': 8, 'กันยายน': 9, 'ตุลาคม': 10, 'พฤศจิกายน': 11, 'ธันวาคม': 12}
+    try:
+        clean_str = " ".join(date_range_str.split())
+        if '-' not in clean_str: return ""
+        start_str, end_str = clean_str.split('-')
+        def parse_thai_date(d_str):
+            d_str = d_str.strip()
+            if "ปัจจุบัน" in d_str: return now
+            parts = d_str.split()
+            if len(parts) < 2: return None
+            m = thai_months.get(parts[0])
+            if not m: return None
+            y = int(parts[1]) - 543
+            return datetime.datetime(y, m, 1)
+        s_date = parse_thai_date(start_str)
+        e_date = parse_thai_date(end_str)
+        if s_date and e_date:
+            diff = relativedelta(e_date, s_date)
+            txt = []
+            if diff.years > 0: txt.append(f"{diff.years} ปี")
+            if diff.months > 0: txt.append(f"{diff.months} เดือน")
+            return " ".join(txt) if txt else "น้อยกว่า 1 เดือน"
+        return ""
+    except: return ""
+
+def legacy_last_update(date_str, now):
+    """ calculate_last_update ตัวเดิม (เดือนที่อ่านไม่ออก = มกราคม) แค่รับ now แทน datetime.now() """
+    if not date_str: return "-"
+    try:
+        parts = date_str.split()
+        if len(parts) < 3: return "-"
+        thai_months = {'มกราคม': 1, 'กุมภาพันธ์': 2, 'มีนาคม': 3, 'เมษายน': 4, 'พฤษภาคม': 5, 'มิถุนายน': 6, 'กรกฎาคม': 7, 'สิงหาคม': 8, 'กันยายน': 9, 'ตุลาคม': 10, 'พฤศจิกายน': 11, 'ธันวาคม': 12}
+        update_dt = datetime.datetime(int(parts[2]) - 543, thai_months.get(parts[1], 1), int(parts[0]))
+        diff = relativedelta(now, update_dt)
+        txt = []
+        if diff.years > 0: txt.append(f"{diff.years}ปี")
+        if diff.months > 0: txt.append(f"{diff.months}เดือน")
+        if diff.days > 0: txt.append(f"{diff.days}วัน")
+        if not txt: return "วันนี้"
+        return " ".join(txt)
+    except: return "-"
+
+DURATIONS = [
+    "มกราคม 2560 - ปัจจุบัน",
+    "  กรกฎาคม   2559  -  ปัจจุบัน ",
+    "ธันวาคม 2565 - มกราคม 2566",
+    "มีนาคม 2564 - มีนาคม 2564",
+    "มิถุนายน 2561 - ธันวาคม 2562",
+    "ตุลาคม 2569 - ปัจจุบัน",          # เริ่มเดือนนี้
+    "ปัจจุบัน - ปัจจุบัน",
+    "ปัจจุบัน - มกราคม 2560",          # ช่วงกลับด้าน
+    "ปัจจุบัน - ธันวาคม 2570",         # เริ่มวันนี้ จบวันที่ 1 ของเดือนหน้า ๆ
+    "มกราคม 2566 - ธันวาคม 2565",
+    "2560 - 2562",                     # ไม่มีเดือน
+    "Jan 2560 - ปัจจุบัน",
+    "มกราคม - ปัจจุบัน",               # ไม่มีปี
+    "มกราคม 25x0 - ปัจจุบัน",
+    "มกราคม 2560",                     # ไม่มีขีด
+    "มกราคม 2560 - กุมภาพันธ์ 2560 - มีนาคม 2560",
+    "ไม่ระบุ",
+    "",
+]
+
+UPDATES = [
+    "5 มกราคม 2567",
+    "18 ตุลาคม 2569",                  # วันนี้
+    "17 ตุลาคม 2569",
+    "18 ตุลาคม 2568",
+    "29 กุมภาพันธ์ 2567",
+    "31 กุมภาพันธ์ 2567",              # วันไม่มีจริง
+    "5 Foo 2567",                      # เดือนอ่านไม่ออก -> มกราคม (แบบเดิม)
+    "5 มกราคม",
+    "มกราคม 2567",
+    "x มกราคม 2567",
+    "1 มกราคม 2570",                   # อนาคต
+    "",
+]
+
+@pytest.mark.parametrize("text", DURATIONS)
+def test_duration_matches_legacy(text):
+    now = datetime.datetime.combine(TODAY, datetime.time())
+    assert Git1.calculate_duration_text(text, today=TODAY) == legacy_duration_text(text, now)
+
+@pytest.mark.parametrize("text", UPDATES)
+def test_last_update_matches_legacy(text):
+    now = datetime.datetime.combine(TODAY, datetime.time())
+    assert Git1.calculate_last_update(text, today=TODAY) == legacy_last_update(text, now)
+
+def test_buddhist_era_years():
+    assert Git1.parse_thai_date_exact("5 มกราคม 2567") == datetime.date(2024, 1, 5)
+    assert Git1.parse_thai_month_year("ธันวาคม 2543") == datetime.datetime(2000, 12, 1)
+    assert Git1.calculate_duration_text("ธันวาคม 2565 - มกราคม 2566", today=TODAY) == "1 เดือน"
+    assert Git1.calculate_duration_text("มกราคม 2560 - ปัจจุบัน", today=TODAY) == "9 ปี 9 เดือน"
+
+def test_unreadable_dates():
+    assert Git1.parse_thai_date_exact("5 Foo 2567") is None
+    assert Git1.parse_thai_date_exact("") is None
+    assert Git1.parse_thai_month_year("มกราคม") is None
+    assert Git1.parse_thai_month_year("Foo 2567") is None
+    assert Git1.calculate_last_update("", today=TODAY) == "-"
+    assert Git1.calculate_last_update("18 ตุลาคม 2569", today=TODAY) == "วันนี้"
+
+@pytest.mark.parametrize("today", [TODAY, datetime.date(2026, 11, 1)])
+def test_duration_series_matches_scalar(today):
+    values = pd.Series(DURATIONS + [None, DURATIONS[0]])
+    expected = [Git1.calculate_duration_text(v, today=today) for v in values.fillna("")]
+    assert Git1.duration_text_series(values, today=today).tolist() == expected
+
+def test_update_series_match_scalar():
+    values = pd.Series(UPDATES + [None, UPDATES[0]])
+    expected_days = [(TODAY - d).days if d else 999 for d in (Git1.parse_thai_date_exact(v) for v in values)]
+    assert Git1.update_age_days_series(values, today=TODAY).tolist() == expected_days
+    expected_text = [Git1.calculate_last_update(v, today=TODAY) for v in values.fillna("")]
+    assert Git1.last_update_text_series(values, today=TODAY).tolist() == expected_text
+
+def test_series_keep_index():
+    values = pd.Series(["มกราคม 2560 - ปัจจุบัน"], index=[7])
+    assert Git1.duration_text_series(values, today=TODAY).index.tolist() == [7]
+    assert Git1.duration_text_series(pd.Series([], dtype=object), today=TODAY).empty